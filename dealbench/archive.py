@@ -0,0 +1,294 @@
+"""Packs many game logs into compressed, indexed archive segments.
+
+A segment (``*.dbarc``) holds any number of games. Each game is its game.jsonl
+log compressed as an independent LZMA block, so one game can be read without
+touching the others. A JSON footer indexes every game by id with its offset and
+its summary: players, winner, turn count and seed. The layout is:
+
+    MAGIC | block | block | ... | index JSON | index length (8 bytes, little endian) | END_MAGIC
+
+Analytics can read the summaries of thousands of games from a few footers, and
+replays can seek straight to one game. Convert existing logs with
+``python -m dealbench.archive logs logs/archive``; both game.jsonl logs and the old
+``turn-*_actions-*.json`` directories are converted.
+"""
+import glob
+import json
+import lzma
+import os
+import struct
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from dealbench.log_reader import GameLog, find_game_logs, iter_game_log, read_result
+from dealbench.sinks import JsonlEncoder, RESULT_RECORD_NAME
+import logging
+logger = logging.getLogger(__name__)
+
+MAGIC = b"DBARC1\n"
+END_MAGIC = b"DBAREND1"
+ARCHIVE_SUFFIX = ".dbarc"
+DEFAULT_GAMES_PER_SEGMENT = 1000
+
+_FOOTER_LENGTH = struct.Struct("<Q")
+
+
+def summarize_result(result: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """The index summary of a game, taken from its final result record (None if unfinished)."""
+    if result is None:
+        return {"finished": False, "players": [], "winner": None, "turn_count": None, "seed": None}
+    return {
+        "finished": True,
+        "players": [player["name"] if isinstance(player, dict) else player for player in result.get("players", [])],
+        "winner": result.get("winner"),
+        "turn_count": result.get("turn_count"),
+        "seed": result.get("seed"),
+    }
+
+
+class ArchiveWriter:
+    """Writes one archive segment. Games are added one at a time and the index is
+    written by ``close``; a segment that was never closed cannot be read."""
+
+    def __init__(self, path: str, preset: int = 6):
+        """
+        Args:
+            preset: LZMA compression preset, 0 (fastest) to 9 (smallest).
+        """
+        self.path = path
+        self.preset = preset
+        self._index: Dict[str, Dict[str, Any]] = {}
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = open(path, "wb")
+        self._file.write(MAGIC)
+
+    def add_game(self, game_id: str, data: bytes, summary: Dict[str, Any]):
+        """Adds one game.jsonl log.
+
+        Args:
+            data: The game's log in game.jsonl format.
+            summary: Index fields of the game, see ``summarize_result``.
+        """
+        if game_id in self._index:
+            raise ValueError(f"Game {game_id} is already in {self.path}.")
+        block = lzma.compress(data, preset=self.preset)
+        self._index[game_id] = {
+            **summary,
+            "offset": self._file.tell(),
+            "length": len(block),
+            "size": len(data),
+            "records": data.count(b"\n"),
+        }
+        self._file.write(block)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def close(self):
+        if self._file is None:
+            return
+        index = json.dumps({"games": self._index}, separators=(",", ":")).encode()
+        self._file.write(index)
+        self._file.write(_FOOTER_LENGTH.pack(len(index)))
+        self._file.write(END_MAGIC)
+        self._file.close()
+        self._file = None
+
+    def __enter__(self) -> "ArchiveWriter":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class GameArchive:
+    """Read access to one archive segment. Only the footer is read when opening it."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a game archive.")
+            f.seek(-(_FOOTER_LENGTH.size + len(END_MAGIC)), os.SEEK_END)
+            (index_length,) = _FOOTER_LENGTH.unpack(f.read(_FOOTER_LENGTH.size))
+            if f.read(len(END_MAGIC)) != END_MAGIC:
+                raise ValueError(f"{path} has no index; it was not closed after writing.")
+            f.seek(-(_FOOTER_LENGTH.size + len(END_MAGIC) + index_length), os.SEEK_END)
+            self.index: Dict[str, Dict[str, Any]] = json.loads(f.read(index_length))["games"]
+
+    @property
+    def game_ids(self) -> List[str]:
+        return list(self.index)
+
+    def __contains__(self, game_id: str) -> bool:
+        return game_id in self.index
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def read_game_bytes(self, game_id: str) -> bytes:
+        """The game.jsonl log of one game, decompressed."""
+        entry = self.index.get(game_id)
+        if entry is None:
+            raise ValueError(f"Game {game_id} is not in {self.path}.")
+        with open(self.path, "rb") as f:
+            f.seek(entry["offset"])
+            return lzma.decompress(f.read(entry["length"]))
+
+    def open_game(self, game_id: str) -> GameLog:
+        """Random access to the records of one game, see ``GameLog``."""
+        return GameLog(f"{self.path}#{game_id}", data=self.read_game_bytes(game_id))
+
+    def result(self, game_id: str) -> Optional[Dict[str, Any]]:
+        """The final summary record of one game, or None if it did not finish."""
+        if not self.index[game_id]["finished"]:
+            return None
+        return self.open_game(game_id)[-1][1]
+
+
+def find_archives(directory: str) -> List[str]:
+    """Every archive segment under `directory`, or `directory` itself if it is one."""
+    if os.path.isfile(directory):
+        return [directory]
+    return sorted(glob.glob(os.path.join(directory, "**", f"*{ARCHIVE_SUFFIX}"), recursive=True))
+
+
+# --- Lookups across archives and loose logs ---
+
+def iter_game_summaries(logs_dir: str, finished_only: bool = True) -> Iterator[Dict[str, Any]]:
+    """Summaries (game_id, players, winner, turn_count, seed) of every game under
+    `logs_dir`. Archived games are read from the segment footers; game logs that
+    are not archived yet are read from their final record. A game archived while
+    unfinished is read from its log instead if that log is still there, since the
+    game may have finished after it was archived."""
+    archived = set()
+    unfinished: Dict[str, Dict[str, Any]] = {}
+    for archive_path in find_archives(logs_dir):
+        for game_id, entry in GameArchive(archive_path).index.items():
+            if entry["finished"]:
+                archived.add(game_id)
+                yield {"game_id": game_id, "archive": archive_path, **entry}
+            else:
+                unfinished.setdefault(game_id, {"game_id": game_id, "archive": archive_path, **entry})
+    if not os.path.isfile(logs_dir):
+        for game_log in find_game_logs(logs_dir):
+            game_id = _game_id(logs_dir, game_log)
+            if game_id in archived:
+                continue
+            unfinished.pop(game_id, None)
+            summary = summarize_result(read_result(game_log))
+            if summary["finished"] or not finished_only:
+                yield {"game_id": game_id, "path": game_log, **summary}
+    if not finished_only:
+        yield from (summary for game_id, summary in unfinished.items() if game_id not in archived)
+
+
+def open_game(logs_dir: str, game_id: str) -> GameLog:
+    """The log of the game `game_id` under `logs_dir`, archived or not. A game that is
+    only archived unfinished is read from its log if that log is still there."""
+    unfinished = None
+    for archive_path in find_archives(logs_dir):
+        archive = GameArchive(archive_path)
+        if game_id in archive:
+            if archive.index[game_id]["finished"]:
+                return archive.open_game(game_id)
+            unfinished = unfinished or archive
+    path = os.path.join(logs_dir, game_id)
+    if os.path.isdir(path):
+        return GameLog(path)
+    if unfinished is not None:
+        return unfinished.open_game(game_id)
+    raise ValueError(f"Game {game_id} not found under {logs_dir}.")
+
+
+# --- Conversion ---
+
+def _game_id(logs_dir: str, game_log: str) -> str:
+    """A game's directory relative to `logs_dir`, e.g. ``2025-08-02_18-42-51_o3_gpt-5_game``."""
+    directory = os.path.dirname(game_log) if os.path.isfile(game_log) else game_log
+    return os.path.relpath(directory, logs_dir).replace(os.sep, "/")
+
+
+def _read_game(game_log: str) -> Tuple[bytes, Dict[str, Any]]:
+    """A game log in game.jsonl format plus its index summary."""
+    if os.path.isfile(game_log):
+        with open(game_log, "rb") as f:
+            data = f.read()
+        # Drop a partial last line left by a crash
+        data = data[:data.rfind(b"\n") + 1]
+        return data, summarize_result(read_result(game_log))
+
+    encoder = JsonlEncoder()
+    lines = []
+    result = None
+    for name, record in iter_game_log(game_log):
+        lines.append(encoder.encode(name, record))
+        if name == RESULT_RECORD_NAME:
+            result = record
+    return "".join(lines).encode(), summarize_result(result)
+
+
+def convert_logs(logs_dir: str, archive_dir: str, games_per_segment: int = DEFAULT_GAMES_PER_SEGMENT, preset: int = 6,
+                 include_unfinished: bool = False) -> List[str]:
+    """Archives every game log under `logs_dir` that is not yet in an archive in
+    `archive_dir`, into new segments of up to `games_per_segment` games each.
+    The original logs are left in place.
+
+    Args:
+        include_unfinished: Also archive logs without a result record. They are
+            skipped by default because they may belong to games still running; set it
+            for logs of crashed games. A game archived unfinished is archived again
+            once its log has a result.
+
+    Returns:
+        The paths of the segments written.
+    """
+    existing = find_archives(archive_dir) if os.path.isdir(archive_dir) else []
+    archived: Dict[str, bool] = {} # game_id -> whether it is archived finished
+    for path in existing:
+        for game_id, entry in GameArchive(path).index.items():
+            archived[game_id] = archived.get(game_id, False) or entry["finished"]
+    pending = [(_game_id(logs_dir, game_log), game_log) for game_log in find_game_logs(logs_dir)]
+    pending = [(game_id, game_log) for game_id, game_log in pending if not archived.get(game_id)]
+
+    segment_number = len(existing)
+    written = []
+    for start in range(0, len(pending), games_per_segment):
+        path = os.path.join(archive_dir, f"games-{segment_number:05d}{ARCHIVE_SUFFIX}")
+        while os.path.exists(path):
+            segment_number += 1
+            path = os.path.join(archive_dir, f"games-{segment_number:05d}{ARCHIVE_SUFFIX}")
+        with ArchiveWriter(path, preset=preset) as writer:
+            for game_id, game_log in pending[start:start + games_per_segment]:
+                try:
+                    data, summary = _read_game(game_log)
+                except (OSError, ValueError) as e:
+                    logger.warning("Skipping %s: %s", game_log, e)
+                    continue
+                if not summary["finished"] and (game_id in archived or not include_unfinished):
+                    logger.info("Skipping %s: the game has not finished", game_log)
+                    continue
+                writer.add_game(game_id, data, summary)
+        if not len(writer):
+            os.remove(path)
+            continue
+        logger.info("Wrote %s games to %s", len(writer), path)
+        written.append(path)
+        segment_number += 1
+    return written
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Pack game logs into compressed, indexed archive segments.")
+    parser.add_argument("logs_dir", help="Directory of game logs to convert, e.g. logs")
+    parser.add_argument("archive_dir", help="Directory to write archive segments to")
+    parser.add_argument("--games-per-segment", type=int, default=DEFAULT_GAMES_PER_SEGMENT)
+    parser.add_argument("--preset", type=int, default=6, help="LZMA preset, 0 (fastest) to 9 (smallest)")
+    parser.add_argument("--include-unfinished", action="store_true",
+                        help="Also archive logs without a result, e.g. of crashed games")
+    args = parser.parse_args()
+
+    segments = convert_logs(args.logs_dir, args.archive_dir, args.games_per_segment, args.preset, args.include_unfinished)
+    games = sum(len(GameArchive(path)) for path in segments)
+    print(f"Archived {games} games into {len(segments)} segment(s) in {args.archive_dir}")
@@ -0,0 +1,555 @@
+"""Vectorized batch simulator for random self-play.
+
+``BatchSimulator`` advances N independent games of ``TestPlayer``-style bots in
+lockstep with NumPy: every iteration draws cards, masks the legal moves of each
+game's current player, picks one uniformly at random and applies it across the
+whole batch. It is meant for baseline statistics (first-player advantage, game
+length) under deck tweaks, where playing games one at a time through ``Game``
+is far too slow.
+
+Modelled rules, following ``RulesEngine`` / ``Game`` and ``deck_config.py``:
+drawing, banking money and action cards, placing properties and wild cards,
+rent (including Double the Rent and wild rent), Pass Go, It's My Birthday,
+Debt Collector, Sly Deal, Forced Deal, Deal Breaker, houses and hotels, Just
+Say No, discarding down to the hand limit and the three-full-sets win check.
+Payments follow ``TestPlayer.provide_payment``. A game whose deck runs out
+ends without a winner, where ``Game`` would raise.
+
+The bots differ from ``TestPlayer`` in how they weigh their choices: a move is
+a (card, colour) pair, or a card to bank, picked uniformly, and a targeted
+action's opponent and properties are then picked at random. ``TestPlayer``
+picks uniformly among the full ``RulesEngine.legal_actions``, so the two give
+close but not identical statistics; compare with games played through ``Game``
+before relying on small differences.
+"""
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from dealbench.card import CardType, PropertyColor
+from dealbench.deck_config import (
+    DECK_CONFIGURATION, RENT_INFO, INITIAL_HAND_SIZE, MAX_HAND_SIZE, ACTIONS_PER_TURN,
+    DRAWS_PER_TURN, PASS_GO_DRAW_COUNT, BIRTHDAY_GIFT_AMOUNT, DEBT_COLLECTOR_AMOUNT,
+)
+
+# --- Card kinds understood by the simulator ---
+KIND_MONEY = 0
+KIND_PROPERTY = 1
+KIND_WILD = 2
+KIND_RENT = 3
+KIND_RENT_WILD = 4
+KIND_DOUBLE_RENT = 5
+KIND_PASS_GO = 6
+KIND_BIRTHDAY = 7
+KIND_DEBT_COLLECTOR = 8
+KIND_HOUSE = 9
+KIND_HOTEL = 10
+KIND_JUST_SAY_NO = 11
+KIND_DEAL_BREAKER = 12
+KIND_SLY_DEAL = 13
+KIND_FORCED_DEAL = 14
+NUM_KINDS = 15
+
+# --- Card locations outside a player's hand, bank or table ---
+# Player-owned locations are encoded as hand = p, bank = P + p, table = 2P + p.
+LOC_DECK = -1
+LOC_DISCARD = -2
+LOC_OUT = -3  # out of play, e.g. a played Just Say No or a discarded card
+
+COLORS: List[PropertyColor] = [color for color in PropertyColor if color != PropertyColor.ALL]
+NUM_COLORS = len(COLORS)
+COLOR_INDEX = {color: idx for idx, color in enumerate(COLORS)}
+NO_BUILDINGS = (PropertyColor.RAILROAD, PropertyColor.UTILITY)
+# A move plays a card with one of these variants: a colour, or BANK_VARIANT to bank it
+BANK_VARIANT = NUM_COLORS
+NUM_VARIANTS = NUM_COLORS + 1
+
+_KIND_BY_TYPE = {
+    CardType.MONEY: KIND_MONEY,
+    CardType.PROPERTY: KIND_PROPERTY,
+    CardType.PROPERTY_WILD: KIND_WILD,
+    CardType.ACTION_DOUBLE_THE_RENT: KIND_DOUBLE_RENT,
+    CardType.ACTION_JUST_SAY_NO: KIND_JUST_SAY_NO,
+    CardType.ACTION_PASS_GO: KIND_PASS_GO,
+    CardType.ACTION_BIRTHDAY: KIND_BIRTHDAY,
+    CardType.ACTION_DEBT_COLLECTOR: KIND_DEBT_COLLECTOR,
+    CardType.ACTION_DEAL_BREAKER: KIND_DEAL_BREAKER,
+    CardType.ACTION_SLY_DEAL: KIND_SLY_DEAL,
+    CardType.ACTION_FORCED_DEAL: KIND_FORCED_DEAL,
+}
+
+
+def _card_kind(item: Dict[str, Any]) -> int:
+    card_type = item['type']
+    if card_type == CardType.ACTION_RENT:
+        return KIND_RENT_WILD if item['wild'] else KIND_RENT
+    if card_type == CardType.ACTION_BUILDING:
+        class_name = item.get('card_class')
+        if class_name == 'HouseCard':
+            return KIND_HOUSE
+        elif class_name == 'HotelCard':
+            return KIND_HOTEL
+        raise ValueError(f"Unknown building card class: {class_name}")
+    if card_type not in _KIND_BY_TYPE:
+        raise ValueError(f"Unhandled card type in configuration: {card_type}")
+    return _KIND_BY_TYPE[card_type]
+
+
+@dataclass
+class BatchResult:
+    """Outcome of a batch of games. Seat 0 is the first player to act."""
+    num_players: int
+    winners: np.ndarray      # winning seat per game, -1 if the deck ran out first
+    turn_counts: np.ndarray  # Game.turn_count when the game ended (0 = first turn)
+
+    @property
+    def completed(self) -> np.ndarray:
+        return self.winners >= 0
+
+    def win_rates(self) -> np.ndarray:
+        """Share of completed games won by each seat."""
+        winners = self.winners[self.completed]
+        if not len(winners):
+            return np.zeros(self.num_players)
+        return np.bincount(winners, minlength=self.num_players) / len(winners)
+
+    def summary(self) -> Dict[str, Any]:
+        turns = self.turn_counts[self.completed]
+        return {
+            "games": int(len(self.winners)),
+            "completed": int(self.completed.sum()),
+            "win_rate_by_seat": [round(float(rate), 4) for rate in self.win_rates()],
+            "mean_turns": float(turns.mean()) if len(turns) else None,
+            "median_turns": float(np.median(turns)) if len(turns) else None,
+            "turn_percentiles": {p: float(np.percentile(turns, p)) for p in (5, 25, 75, 95)} if len(turns) else None,
+        }
+
+
+class BatchSimulator:
+    """Plays ``num_games`` random games in lockstep over a batch dimension."""
+
+    def __init__(self, num_games: int, num_players: int = 2, seed: Optional[int] = None,
+                 deck_configuration: Optional[List[Dict[str, Any]]] = None,
+                 rent_info: Optional[Dict[PropertyColor, Dict[str, Any]]] = None):
+        """
+        Args:
+            num_games: Number of independent games in the batch.
+            num_players: Players per game (2-5, as in Game).
+            seed: Seed for the batch's random generator.
+            deck_configuration: Deck to play with, in DECK_CONFIGURATION format.
+            rent_info: Rent tables and set sizes, in RENT_INFO format.
+        """
+        if num_players < 2 or num_players > 5:
+            raise ValueError("Game requires between 2 and 5 players.")
+        self.num_games = num_games
+        self.num_players = num_players
+        self.rng = np.random.default_rng(seed)
+        self._build_card_tables(deck_configuration or DECK_CONFIGURATION, rent_info or RENT_INFO)
+
+    def _build_card_tables(self, deck_configuration: List[Dict[str, Any]], rent_info: Dict[PropertyColor, Dict[str, Any]]):
+        kinds, values, colors = [], [], []
+        for item in deck_configuration:
+            kind = _card_kind(item)
+            variants = np.zeros(NUM_VARIANTS, dtype=bool)
+            # Money and every action card can be banked, properties cannot
+            variants[BANK_VARIANT] = kind not in (KIND_PROPERTY, KIND_WILD)
+            if kind == KIND_PROPERTY:
+                variants[COLOR_INDEX[item['set_color']]] = True
+            elif kind == KIND_WILD:
+                variants[[COLOR_INDEX[color] for color in item['available_colors'] if color != PropertyColor.ALL]] = True
+            elif kind == KIND_RENT:
+                variants[[COLOR_INDEX[color] for color in item['colors']]] = True
+            elif kind in (KIND_RENT_WILD, KIND_HOTEL, KIND_DEAL_BREAKER, KIND_SLY_DEAL, KIND_FORCED_DEAL):
+                variants[:NUM_COLORS] = True  # the colour of the set the action is played on
+            elif kind == KIND_HOUSE:
+                variants[:NUM_COLORS] = True
+                variants[[COLOR_INDEX[color] for color in NO_BUILDINGS]] = False
+            elif kind in (KIND_PASS_GO, KIND_BIRTHDAY, KIND_DEBT_COLLECTOR):
+                variants[0] = True  # played without a colour
+            for _ in range(item['count']):
+                kinds.append(kind)
+                values.append(item['value'])
+                colors.append(variants)
+
+        self.num_cards = len(kinds)
+        self.kind = np.array(kinds, dtype=np.int8)
+        self.value = np.array(values, dtype=np.int16)
+        # card_variants[c, v]: card c may be played with variant v (a colour, or banked) when the game state allows it
+        self.card_variants = np.array(colors, dtype=bool)
+        self.is_standard_property = self.kind == KIND_PROPERTY
+        self.is_double_rent = self.kind == KIND_DOUBLE_RENT
+        self.is_just_say_no = self.kind == KIND_JUST_SAY_NO
+        # Standard properties carry their colour from the start
+        self.home_color = np.where(self.is_standard_property, self.card_variants[:, :NUM_COLORS].argmax(axis=1), 0).astype(np.int8)
+
+        longest = max(len(rent_info[color]['rent_values']) for color in COLORS)
+        self.rent_table = np.zeros((NUM_COLORS, longest), dtype=np.int16)
+        self.rent_length = np.zeros(NUM_COLORS, dtype=np.int16)
+        self.set_size = np.zeros(NUM_COLORS, dtype=np.int16)
+        for idx, color in enumerate(COLORS):
+            rent_values = rent_info[color]['rent_values']
+            self.rent_table[idx, :len(rent_values)] = rent_values
+            self.rent_length[idx] = len(rent_values)
+            self.set_size[idx] = rent_info[color]['properties_in_set']
+
+    # --- Running the batch ---
+
+    def run(self) -> BatchResult:
+        """Plays every game in the batch to completion."""
+        N, P, C = self.num_games, self.num_players, self.num_cards
+        if C < INITIAL_HAND_SIZE * P:
+            raise ValueError("Not enough cards to deal the initial hands.")
+        rows = np.arange(N)
+
+        self.loc = np.full((N, C), LOC_DECK, dtype=np.int16)
+        self.table_color = np.tile(self.home_color, (N, 1))
+        self.house = np.zeros((N, P, NUM_COLORS), dtype=bool)
+        self.hotel = np.zeros((N, P, NUM_COLORS), dtype=bool)
+        self.deck = self.rng.permuted(np.tile(np.arange(C, dtype=np.int16), (N, 1)), axis=1)
+        self.deck_top = np.zeros(N, dtype=np.int64)
+        self.active = np.ones(N, dtype=bool)
+        self.winners = np.full(N, -1, dtype=np.int64)
+        self.turn_counts = np.zeros(N, dtype=np.int64)
+        self.current = np.zeros(N, dtype=np.int64)
+        self.actions_played = np.zeros(N, dtype=np.int64)
+
+        # Deal the initial hands player by player, as Game does
+        dealt = INITIAL_HAND_SIZE * P
+        self.loc[rows[:, None], self.deck[:, :dealt]] = np.arange(dealt) // INITIAL_HAND_SIZE
+        self.deck_top[:] = dealt
+        needs_draw = np.ones(N, dtype=bool)
+
+        while self.active.any():
+            drawing = np.flatnonzero(self.active & needs_draw)
+            self._draw(drawing, self.current[drawing], DRAWS_PER_TURN)
+            needs_draw[:] = False
+
+            counts, nonzero, standard, set_value = self._table_stats(np.flatnonzero(self.active))
+            mask = self._legal_moves(counts, standard)
+            flat = mask.reshape(N, -1)
+            num_legal = flat.sum(axis=1)
+            choosing = self.active & (num_legal > 0)
+            end_turn = self.active & (num_legal == 0)
+
+            chosen_rows = np.flatnonzero(choosing)
+            if len(chosen_rows):
+                pick = (self.rng.random(len(chosen_rows)) * num_legal[chosen_rows]).astype(np.int64)
+                cumulative = np.cumsum(flat[chosen_rows], axis=1, dtype=np.int16)
+                choice = np.argmax(cumulative > pick[:, None], axis=1)
+                self._apply(chosen_rows, choice // NUM_VARIANTS, choice % NUM_VARIANTS, counts, nonzero, standard)
+                self.actions_played[chosen_rows] += 1
+
+                # Win check for the acting player after every action
+                counts, _, standard, _ = self._table_stats(chosen_rows)
+                full = self._full_sets(counts[chosen_rows, self.current[chosen_rows]], standard[chosen_rows, self.current[chosen_rows]])
+                won = chosen_rows[(full.sum(axis=1) >= 3) & self.active[chosen_rows]]
+                self.winners[won] = self.current[won]
+                self.active[won] = False
+                end_turn |= self.active & choosing & (self.actions_played >= ACTIONS_PER_TURN)
+
+            ending = np.flatnonzero(end_turn & self.active)
+            self._discard_excess(ending)
+            self.turn_counts[ending] += 1
+            self.current[ending] = self.turn_counts[ending] % P
+            self.actions_played[ending] = 0
+            needs_draw[ending] = True
+
+        return BatchResult(num_players=P, winners=self.winners.copy(), turn_counts=self.turn_counts.copy())
+
+    # --- State queries ---
+
+    def _table_stats(self, rows: np.ndarray):
+        """Per (game, player, colour) property counts on the table for the given games.
+
+        Returns ``counts``, ``nonzero`` (cards with a value, which carry rent),
+        ``standard`` (non-wild cards) and ``set_value``, each shaped (N, P, colours).
+        Sets that are empty lose their buildings, as in ``PropertySet.remove_card``.
+        """
+        N, P = self.num_games, self.num_players
+        loc = self.loc[rows]
+        on_table = loc >= 2 * P
+        game_idx, card_idx = np.nonzero(on_table)
+        slot = (rows[game_idx] * P + (loc[game_idx, card_idx] - 2 * P)) * NUM_COLORS + self.table_color[rows[game_idx], card_idx]
+        size = N * P * NUM_COLORS
+        shape = (N, P, NUM_COLORS)
+        counts = np.bincount(slot, minlength=size).reshape(shape)
+        nonzero = np.bincount(slot, weights=self.value[card_idx] > 0, minlength=size).reshape(shape)
+        standard = np.bincount(slot, weights=self.is_standard_property[card_idx], minlength=size).reshape(shape)
+        set_value = np.bincount(slot, weights=self.value[card_idx], minlength=size).reshape(shape)
+        occupied = counts[rows] > 0
+        self.house[rows] &= occupied
+        self.hotel[rows] &= occupied
+        return counts, nonzero, standard, set_value
+
+    def _full_sets(self, counts: np.ndarray, standard: np.ndarray) -> np.ndarray:
+        # A set's size is only known once a standard property is in it (PropertySet.number_for_full_set)
+        return (counts >= self.set_size) & (standard > 0)
+
+    def _opponents(self, players: np.ndarray) -> np.ndarray:
+        """Mask of shape (len(players), P): the opponents of each given player."""
+        return np.arange(self.num_players)[None, :] != players[:, None]
+
+    def _legal_moves(self, counts: np.ndarray, standard: np.ndarray) -> np.ndarray:
+        """Boolean mask of shape (N, cards, variants) of the moves each current player may make."""
+        N, P = self.num_games, self.num_players
+        rows = np.arange(N)
+        cp = self.current
+        owned = counts[rows, cp] > 0
+        full_sets = self._full_sets(counts, standard)
+        full = full_sets[rows, cp]
+        house, hotel = self.house[rows, cp], self.hotel[rows, cp]
+        # Sly and Forced Deals only take (and give) properties of sets that are not full
+        stealable = (counts > 0) & ~full_sets
+        opponents = self._opponents(cp)[:, :, None]
+        opponent_stealable = (stealable & opponents).any(axis=1)
+
+        allowed_by_kind = np.ones((N, NUM_KINDS, NUM_VARIANTS), dtype=bool)
+        allowed_by_kind[:, KIND_RENT, :NUM_COLORS] = owned
+        allowed_by_kind[:, KIND_RENT_WILD, :NUM_COLORS] = owned
+        allowed_by_kind[:, KIND_HOUSE, :NUM_COLORS] = full & ~house & ~hotel
+        allowed_by_kind[:, KIND_HOTEL, :NUM_COLORS] = full & house & ~hotel
+        allowed_by_kind[:, KIND_DEAL_BREAKER, :NUM_COLORS] = (full_sets & opponents).any(axis=1)
+        allowed_by_kind[:, KIND_SLY_DEAL, :NUM_COLORS] = opponent_stealable
+        allowed_by_kind[:, KIND_FORCED_DEAL, :NUM_COLORS] = opponent_stealable & stealable[rows, cp].any(axis=1)[:, None]
+
+        in_hand = (self.loc == cp[:, None]) & self.active[:, None]
+        return in_hand[:, :, None] & self.card_variants[None] & allowed_by_kind[:, self.kind]
+
+    # --- Applying moves ---
+
+    def _apply(self, rows: np.ndarray, cards: np.ndarray, variants: np.ndarray, counts: np.ndarray, nonzero: np.ndarray,
+               standard: np.ndarray):
+        P = self.num_players
+        cp = self.current[rows]
+        banked = variants == BANK_VARIANT
+        # Banked cards are not played, whatever their kind
+        kinds = np.where(banked, -1, self.kind[cards])
+
+        self.loc[rows[banked], cards[banked]] = P + cp[banked]
+
+        sel = (kinds == KIND_PROPERTY) | (kinds == KIND_WILD)
+        self.loc[rows[sel], cards[sel]] = 2 * P + cp[sel]
+        self.table_color[rows[sel], cards[sel]] = variants[sel]
+
+        # Every remaining kind is an action card that goes to the discard pile
+        played = ~(banked | (kinds == KIND_PROPERTY) | (kinds == KIND_WILD))
+        self.loc[rows[played], cards[played]] = LOC_DISCARD
+
+        sel = kinds == KIND_HOUSE
+        self.house[rows[sel], cp[sel], variants[sel]] = True
+        sel = kinds == KIND_HOTEL
+        self.hotel[rows[sel], cp[sel], variants[sel]] = True
+
+        sel = kinds == KIND_PASS_GO
+        self._draw(rows[sel], cp[sel], PASS_GO_DRAW_COUNT)
+
+        sel = kinds == KIND_BIRTHDAY
+        for offset in range(1, P):
+            self._collect(rows[sel], (cp[sel] + offset) % P, cp[sel], np.full(sel.sum(), BIRTHDAY_GIFT_AMOUNT))
+
+        sel = kinds == KIND_DEBT_COLLECTOR
+        self._collect(rows[sel], self._random_opponent(cp[sel]), cp[sel], np.full(sel.sum(), DEBT_COLLECTOR_AMOUNT))
+
+        sel = (kinds == KIND_RENT) | (kinds == KIND_RENT_WILD)
+        if sel.any():
+            r, player, color = rows[sel], cp[sel], variants[sel]
+            amount = self._rent(counts[r, player, color], nonzero[r, player, color], r, player, color)
+            # Double the Rent is added automatically, as many as the remaining actions allow
+            doubles_in_hand = ((self.loc[r] == player[:, None]) & self.is_double_rent).sum(axis=1)
+            doubles = np.minimum(doubles_in_hand, ACTIONS_PER_TURN - self.actions_played[r] - 1)
+            amount = amount * 2 ** doubles
+            # Game removes a single Double the Rent card from the hand, whatever the count
+            doubled = np.flatnonzero(doubles > 0)
+            first_double = np.argmax((self.loc[r[doubled]] == player[doubled, None]) & self.is_double_rent, axis=1)
+            self.loc[r[doubled], first_double] = LOC_OUT
+
+            wild = kinds[sel] == KIND_RENT_WILD
+            self._collect(r[wild], self._random_opponent(player[wild]), player[wild], amount[wild])
+            for offset in range(1, P):
+                self._collect(r[~wild], (player[~wild] + offset) % P, player[~wild], amount[~wild])
+
+        stealing = (kinds == KIND_DEAL_BREAKER) | (kinds == KIND_SLY_DEAL) | (kinds == KIND_FORCED_DEAL)
+        if stealing.any():
+            full_sets = self._full_sets(counts[rows], standard[rows])
+            # Sets that hold the property to take: full ones for a Deal Breaker, others for Sly and Forced Deals
+            targetable = np.where((kinds == KIND_DEAL_BREAKER)[:, None, None], full_sets, (counts[rows] > 0) & ~full_sets)
+            stealable_own = ((counts[rows] > 0) & ~full_sets)[np.arange(len(rows)), cp]
+            self._steal(rows[stealing], kinds[stealing], cp[stealing], variants[stealing],
+                        targetable[stealing], stealable_own[stealing])
+
+    def _steal(self, rows: np.ndarray, kinds: np.ndarray, player: np.ndarray, color: np.ndarray, targetable: np.ndarray,
+               stealable_own: np.ndarray):
+        """Plays Deal Breakers, Sly Deals and Forced Deals on sets of colour ``color`` of a random opponent
+        with such a set, like ``Game._execute_deal_breaker`` / ``_execute_sly_deal`` / ``_execute_forced_deal``.
+
+        Args:
+            targetable: (games, P, colours) mask of the sets the action may target.
+            stealable_own: (games, colours) mask of the acting player's sets a Forced Deal may give from.
+        """
+        P = self.num_players
+        target = self._random_index(targetable[np.arange(len(rows)), :, color] & self._opponents(player))
+        keep = ~self._just_say_no(rows, player, target)
+        rows, kinds, player, color, target, stealable_own = (
+            rows[keep], kinds[keep], player[keep], color[keep], target[keep], stealable_own[keep])
+        if not len(rows):
+            return
+        loc, table_color = self.loc[rows], self.table_color[rows]
+        in_color = table_color == color[:, None]
+        target_cards = in_color & (loc == (2 * P + target)[:, None])
+
+        sel = kinds == KIND_DEAL_BREAKER
+        if sel.any():
+            r, p, t, c = rows[sel], player[sel], target[sel], color[sel]
+            # The taken set replaces any set of that colour the player had, as in Player.add_property_set
+            game_idx, card_idx = np.nonzero(in_color[sel] & (loc[sel] == (2 * P + p)[:, None]))
+            self.loc[r[game_idx], card_idx] = LOC_OUT
+            game_idx, card_idx = np.nonzero(target_cards[sel])
+            self.loc[r[game_idx], card_idx] = 2 * P + p[game_idx]
+            self.house[r, p, c], self.hotel[r, p, c] = self.house[r, t, c], self.hotel[r, t, c]
+            self.house[r, t, c] = self.hotel[r, t, c] = False
+
+        sel = kinds != KIND_DEAL_BREAKER
+        if sel.any():
+            r, p, t = rows[sel], player[sel], target[sel]
+            taken = self._random_index(target_cards[sel])
+            forced = np.flatnonzero(kinds[sel] == KIND_FORCED_DEAL)
+            own_cards = (loc[sel][forced] == (2 * P + p[forced])[:, None]) & np.take_along_axis(
+                stealable_own[sel][forced], table_color[sel][forced].astype(np.int64), axis=1)
+            given = self._random_index(own_cards)
+            self.loc[r, taken] = 2 * P + p
+            self.loc[r[forced], given] = 2 * P + t[forced]
+
+    def _rent(self, count: np.ndarray, nonzero: np.ndarray, rows: np.ndarray, player: np.ndarray, color: np.ndarray) -> np.ndarray:
+        """Rent for the given sets, as in ``PropertySet.get_rent_value``."""
+        index = np.minimum(count, self.rent_length[color]) - 1
+        rent = self.rent_table[color, np.maximum(index, 0)].astype(np.int64)
+        house = self.house[rows, player, color]
+        rent += 3 * house + 4 * (house & self.hotel[rows, player, color])
+        # Sets made only of any-colour wild cards have no rent values
+        return np.where(nonzero > 0, rent, 0)
+
+    def _random_index(self, mask: np.ndarray) -> np.ndarray:
+        """A uniformly random True column of each row of `mask`; every row needs one."""
+        return np.argmax(np.where(mask, self.rng.random(mask.shape), -1.0), axis=1)
+
+    def _random_opponent(self, player: np.ndarray) -> np.ndarray:
+        offset = self.rng.integers(1, self.num_players, size=len(player))
+        return (player + offset) % self.num_players
+
+    def _collect(self, rows: np.ndarray, payer: np.ndarray, receiver: np.ndarray, amount: np.ndarray):
+        """``payer`` pays ``amount`` to ``receiver`` in each given game, following ``TestPlayer.provide_payment``.
+
+        Bank cards are used from the smallest value up; when the bank is not enough,
+        all of it goes along with property sets in order of their total value.
+        """
+        P = self.num_players
+        keep = (amount > 0) & self.active[rows]
+        rows, payer, receiver, amount = rows[keep], payer[keep], receiver[keep], amount[keep]
+        cancelled = self._just_say_no(rows, receiver, payer)
+        rows, payer, receiver, amount = rows[~cancelled], payer[~cancelled], receiver[~cancelled], amount[~cancelled]
+        if not len(rows):
+            return
+
+        loc = self.loc[rows]
+        in_bank = loc == (P + payer)[:, None]
+        on_table = loc == (2 * P + payer)[:, None]
+        colors = self.table_color[rows]
+        game_idx = np.repeat(np.arange(len(rows)), self.num_cards).reshape(loc.shape)
+        set_value = np.bincount(
+            (game_idx * NUM_COLORS + colors)[on_table],
+            weights=np.broadcast_to(self.value, loc.shape)[on_table],
+            minlength=len(rows) * NUM_COLORS,
+        ).reshape(len(rows), NUM_COLORS)
+
+        value = np.broadcast_to(self.value, loc.shape)
+        key = np.where(in_bank, value, np.inf)
+        key = np.where(on_table, 1000 + np.take_along_axis(set_value, colors.astype(np.int64), axis=1) * 16 + colors, key)
+        order = np.argsort(key, axis=1, kind="stable")
+        payable = np.take_along_axis(in_bank | on_table, order, axis=1)
+        paid_value = np.where(payable, np.take_along_axis(value, order, axis=1), 0)
+        paid_before = np.cumsum(paid_value, axis=1) - paid_value
+        paid_sorted = payable & (paid_before < amount[:, None])
+
+        paid = np.zeros_like(paid_sorted)
+        np.put_along_axis(paid, order, paid_sorted, axis=1)
+        game_idx, card_idx = np.nonzero(paid & in_bank)
+        self.loc[rows[game_idx], card_idx] = P + receiver[game_idx]
+        game_idx, card_idx = np.nonzero(paid & on_table)
+        self.loc[rows[game_idx], card_idx] = 2 * P + receiver[game_idx]
+
+    def _just_say_no(self, rows: np.ndarray, source: np.ndarray, target: np.ndarray) -> np.ndarray:
+        """Resolves Just Say No chains like ``Game._attempt_just_say_no`` with ``TestPlayer.wants_to_negate``.
+
+        Returns a mask of the actions that end up cancelled.
+        """
+        current, other = target.copy(), source.copy()
+        played = np.zeros(len(rows), dtype=bool)
+        pending = np.ones(len(rows), dtype=bool)
+        while pending.any():
+            held = (self.loc[rows] == current[:, None]) & self.is_just_say_no
+            num_held = held.sum(axis=1)
+            # TestPlayer tries each Just Say No in its hand with probability 0.5
+            plays = pending & (num_held > 0) & (self.rng.random(len(rows)) < 1 - 0.5 ** num_held)
+            which = np.flatnonzero(plays)
+            self.loc[rows[which], np.argmax(held[which], axis=1)] = LOC_OUT
+            played |= plays
+            current[which], other[which] = other[which], current[which]
+            pending = plays
+        return played & (current == source)
+
+    def _draw(self, rows: np.ndarray, players: np.ndarray, count: int):
+        """Draws ``count`` cards for each given game; games whose deck runs out end without a winner."""
+        for _ in range(count):
+            exhausted = self.deck_top[rows] >= self.num_cards
+            self.active[rows[exhausted]] = False
+            rows, players = rows[~exhausted], players[~exhausted]
+            self.loc[rows, self.deck[rows, self.deck_top[rows]]] = players
+            self.deck_top[rows] += 1
+
+    def _discard_excess(self, rows: np.ndarray):
+        """Randomly discards down to MAX_HAND_SIZE, like ``TestPlayer.choose_cards_to_discard``."""
+        in_hand = self.loc[rows] == self.current[rows, None]
+        excess = in_hand.sum(axis=1) - MAX_HAND_SIZE
+        over = excess > 0
+        rows, in_hand, excess = rows[over], in_hand[over], excess[over]
+        if not len(rows):
+            return
+        key = np.where(in_hand, self.rng.random(in_hand.shape), np.inf)
+        rank = np.argsort(np.argsort(key, axis=1), axis=1)
+        game_idx, card_idx = np.nonzero(rank < excess[:, None])
+        self.loc[rows[game_idx], card_idx] = LOC_OUT
+
+
+def simulate(num_games: int, num_players: int = 2, seed: Optional[int] = None, batch_size: int = 10000, **kwargs) -> BatchResult:
+    """Runs ``num_games`` random games in batches of at most ``batch_size``."""
+    rng = np.random.default_rng(seed)
+    winners, turn_counts = [], []
+    remaining = num_games
+    while remaining > 0:
+        size = min(batch_size, remaining)
+        simulator = BatchSimulator(size, num_players=num_players, seed=int(rng.integers(2**63)), **kwargs)
+        result = simulator.run()
+        winners.append(result.winners)
+        turn_counts.append(result.turn_counts)
+        remaining -= size
+    return BatchResult(num_players=num_players, winners=np.concatenate(winners), turn_counts=np.concatenate(turn_counts))
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    import time
+
+    parser = argparse.ArgumentParser(description="Run a batch of random DealBench games")
+    parser.add_argument("--games", type=int, default=10000, help="Number of games to simulate")
+    parser.add_argument("--players", type=int, default=2, help="Players per game")
+    parser.add_argument("--batch-size", type=int, default=10000, help="Games advanced in lockstep")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    start = time.time()
+    result = simulate(args.games, num_players=args.players, seed=args.seed, batch_size=args.batch_size)
+    summary = result.summary()
+    summary["seconds"] = round(time.time() - start, 2)
+    print(json.dumps(summary, indent=4))
@@ -0,0 +1,70 @@
+"""Content-addressed store for large text kept out of game records.
+
+LLM prompts and reasoning are most of the volume of a game log. ``BlobStore``
+keeps each distinct text once, gzip-compressed, under the sha256 of its content,
+and records refer to it with a short ``"sha256:<hex>"`` reference that is only
+resolved when someone reads it, e.g. the replay server showing a step.
+"""
+import gzip
+import hashlib
+import os
+import tempfile
+from typing import Optional, Union
+
+DEFAULT_BLOB_DIR = os.path.join("logs", "blobs")
+REF_PREFIX = "sha256:"
+
+
+def is_blob_ref(value) -> bool:
+    return isinstance(value, str) and value.startswith(REF_PREFIX)
+
+
+class BlobStore:
+    """Blobs stored as ``<root>/<first two hex digits>/<hex>.gz``. Writes are atomic
+    and a blob that is already stored is not written again, so stores can be shared
+    by concurrent games."""
+
+    def __init__(self, root: str = DEFAULT_BLOB_DIR, compress_level: int = 6):
+        self.root = root
+        self.compress_level = compress_level
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], f"{digest}.gz")
+
+    def put(self, content: Union[str, bytes]) -> str:
+        """Stores `content` (str is UTF-8 encoded) and returns its reference."""
+        data = content.encode() if isinstance(content, str) else content
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest)
+        if not os.path.exists(path):
+            directory = os.path.dirname(path)
+            os.makedirs(directory, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(gzip.compress(data, compresslevel=self.compress_level, mtime=0))
+                os.replace(temp_path, path)
+            except BaseException:
+                os.unlink(temp_path)
+                raise
+        return REF_PREFIX + digest
+
+    def get_bytes(self, ref: str) -> bytes:
+        if not is_blob_ref(ref):
+            raise ValueError(f"Not a blob reference: {ref!r}")
+        path = self._path(ref[len(REF_PREFIX):])
+        if not os.path.exists(path):
+            raise ValueError(f"Blob {ref} not found in {self.root}.")
+        with open(path, "rb") as f:
+            return gzip.decompress(f.read())
+
+    def get(self, ref: str) -> str:
+        """The text stored under `ref`."""
+        return self.get_bytes(ref).decode()
+
+    def __contains__(self, ref: str) -> bool:
+        return is_blob_ref(ref) and os.path.exists(self._path(ref[len(REF_PREFIX):]))
+
+    def put_optional(self, content: Optional[str]) -> Optional[str]:
+        """``put`` for text that may be missing: None stays None."""
+        return None if content is None else self.put(content)
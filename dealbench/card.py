@@ -1,4 +1,4 @@
-from abc import ABC, abstractmethod
+from abc import ABC
 from enum import Enum, auto
 from typing import List, Tuple, Optional, Dict, Any
 
@@ -37,7 +37,16 @@ class PropertyColor(Enum):
 # --- Base Card Class ---
 
 class Card(ABC):
-    """Abstract Base Class for all cards in Monopoly Deal."""
+    """
+    Abstract Base Class for all cards in Monopoly Deal.
+
+    Cards are created once by the CardCatalog and shared by every game dealt from it,
+    so they never hold per-game state: the colour a wild card is played as belongs to
+    the PropertySet holding it.
+    """
+    __slots__ = ("name", "value", "card_id", "_hash")
+    card_type: CardType # Set by every concrete card class
+
     def __init__(self, name: str, value: int):
         """
         Args:
@@ -46,11 +55,12 @@ class Card(ABC):
         """
         self.name = name
         self.value = value
+        self.card_id: Optional[int] = None # Position of the card in the catalog, assigned by CardCatalog
+        self._hash = hash((name, self.card_type))
 
-    @abstractmethod
     def get_card_type(self) -> CardType:
         """Returns the specific type of the card using the CardType enum."""
-        pass
+        return self.card_type
 
     @property
     def can_use_as_money(self) -> bool:
@@ -61,8 +71,8 @@ class Card(ABC):
         return f"{type(self).__name__}(name=\'{self.name}\', value={self.value})"
 
     def __hash__(self) -> int:
-        # Basic hash based on name and type
-        return hash((self.name, self.get_card_type()))
+        # Based on name and type, computed once in __init__
+        return self._hash
 
     def to_json(self) -> Dict[str, Any]:
         return {
@@ -75,11 +85,14 @@ class Card(ABC):
 
 class MoneyCard(Card):
     """Represents a money card used purely for banking and payment."""
-    def get_card_type(self) -> CardType:
-        return CardType.MONEY
+    __slots__ = ()
+    card_type = CardType.MONEY
 
 class PropertyCard(Card):
     """Represents a standard property card belonging to a specific color set."""
+    __slots__ = ("set_color", "rent_values", "properties_in_set")
+    card_type = CardType.PROPERTY
+
     def __init__(self, name: str, value: int, set_color: PropertyColor, rent_values: List[int], properties_in_set: int):
         super().__init__(name, value)
         if not isinstance(set_color, PropertyColor) or set_color == PropertyColor.ALL:
@@ -93,9 +106,6 @@ class PropertyCard(Card):
         self.rent_values = rent_values # List: rent for 1 prop, 2 props, ..., full set
         self.properties_in_set = properties_in_set # How many needed for a full set
 
-    def get_card_type(self) -> CardType:
-        return CardType.PROPERTY
-
     def __repr__(self) -> str:
         return f"{type(self).__name__}(name=\'{self.name}\', value={self.value}, color={self.set_color.name})"
 
@@ -112,12 +122,19 @@ class PropertyCard(Card):
         return self.set_color
 
 class WildPropertyCard(PropertyCard):
-    """Represents a property wild card that can represent multiple colors."""
+    """
+    Represents a property wild card that can represent multiple colors.
+
+    The color a wild card currently represents is the color of the PropertySet
+    holding it (see Player.get_property_color).
+    """
+    __slots__ = ("available_colors",)
+    card_type = CardType.PROPERTY_WILD
+
     def __init__(self, name: str, value: int, available_colors: List[PropertyColor], rent_values: Optional[Dict[PropertyColor, List[int]]] = None, properties_in_set: Optional[Dict[PropertyColor, int]] = None):
-        Card.__init__(self, name, value) # Initialize Card attributes: name, value
+        Card.__init__(self, name, value) # Initialize Card attributes: name, value, card_id
         
         self.available_colors = available_colors
-        self.current_color: Optional[PropertyColor] = None
 
         if not available_colors:
             raise ValueError("WildPropertyCard must have available colors.")
@@ -125,37 +142,20 @@ class WildPropertyCard(PropertyCard):
         self.rent_values = rent_values
         self.properties_in_set = properties_in_set
 
-    def get_card_type(self) -> CardType:
-        return CardType.PROPERTY_WILD
-
-    def set_wild_color(self, color: PropertyColor):
-        """Sets the color this wild card represents (must be one of its available colors)."""
-        if color in self.available_colors:
-            self.current_color = color
-        else:
-            raise ValueError(f"Invalid color {color} for this wild card. Available: {self.available_colors}")
-
-    def clear_wild_color(self):
-        """Resets the color choice."""
-        self.current_color = None
-    
     def get_color(self) -> PropertyColor:
-        if self.current_color is None:
-            raise ValueError("WildPropertyCard has no color set.")
-        return self.current_color
+        raise ValueError(f"{self.name} takes the color of the property set holding it. Use Player.get_property_color instead.")
     
     @property
     def can_use_as_money(self) -> bool:
         return False
 
     def __repr__(self) -> str:
-        current_color_str = f", current={self.current_color.name}" if self.current_color else ""
         colors_str = "/\\".join(c.name for c in self.available_colors)
-        return f"{type(self).__name__}(name='{self.name}', value={self.value}, colors=[{colors_str}]{current_color_str})"
+        return f"{type(self).__name__}(name='{self.name}', value={self.value}, colors=[{colors_str}])"
 
-    def to_json(self) -> Dict[str, Any]:
+    def to_json(self, current_color: Optional[PropertyColor] = None) -> Dict[str, Any]:
+        """`current_color` is the color of the property set holding the card, if any."""
         # Call Card's base to_json() equivalent, as PropertyCard's to_json() adds fields not directly applicable here.
-        # Assumes self.name and self.value are set correctly by WildPropertyCard's __init__ (e.g. by calling Card.__init__)
         data = {
             "name": self.name, 
             "value": self.value, 
@@ -163,7 +163,7 @@ class WildPropertyCard(PropertyCard):
         }
         data.update({
             "available_colors": [color.name for color in self.available_colors],
-            "current_color": self.current_color.name if self.current_color else None
+            "current_color": current_color.name if current_color else None
         })
         return data
 
@@ -172,9 +172,9 @@ class ActionCard(Card):
     """Base class for cards that trigger an action when played."""
     # Most action cards are discarded after play, but some (House/Hotel) persist.
     # Subclasses will define specific behavior attributes.
-    def get_card_type(self) -> CardType:
-        # Default, subclasses should override if more specific type exists
-        return CardType.ACTION_OTHER
+    __slots__ = ()
+    # Default, subclasses override it with a more specific type
+    card_type = CardType.ACTION
 
     def to_json(self) -> Dict[str, Any]:
         return super().to_json()
@@ -183,6 +183,9 @@ class ActionCard(Card):
 
 class RentCard(ActionCard):
     """Action card to collect rent from other players."""
+    __slots__ = ("colors", "wild")
+    card_type = CardType.ACTION_RENT
+
     def __init__(self, name: str, value: int, colors: List[PropertyColor], wild: bool):
         super().__init__(name, value)
         if not colors:
@@ -190,9 +193,6 @@ class RentCard(ActionCard):
         self.colors = colors # List of colors rent can be charged for
         self.wild = wild
 
-    def get_card_type(self) -> CardType:
-        return CardType.ACTION_RENT
-
     def __repr__(self) -> str:
         colors_str = ",".join(c.name for c in self.colors) 
         return f"{type(self).__name__}(name='{self.name}', value={self.value}, colors=[{colors_str}])"
@@ -210,13 +210,13 @@ class RentCard(ActionCard):
 
 class BuildingCard(ActionCard):
     """Abstract base for House and Hotel cards."""
+    __slots__ = ("building_type",)
+    card_type = CardType.ACTION_BUILDING
+
     def __init__(self, name: str, value: int, building_type: str):
         super().__init__(name, value)
         self.building_type = building_type # "house" or "hotel"
 
-    def get_card_type(self) -> CardType:
-        return CardType.ACTION_BUILDING
-
     def __repr__(self) -> str:
         return f"{type(self).__name__}(name='{self.name}', value={self.value}, type='{self.building_type}')"
 
@@ -229,60 +229,67 @@ class BuildingCard(ActionCard):
 
 class HouseCard(BuildingCard):
     """Adds a House to a completed property set (excluding Railroad/Utility)."""
+    __slots__ = ()
+
     def __init__(self, name: str, value: int):
         super().__init__(name, value, building_type="house")
 
 class HotelCard(BuildingCard):
     """Adds a Hotel to a completed property set that already has a House."""
+    __slots__ = ()
+
     def __init__(self, name: str, value: int):
         super().__init__(name, value, building_type="hotel")
 
 class DoubleTheRentCard(ActionCard):
     """Action card that doubles the next rent card played."""
-    def get_card_type(self) -> CardType:
-        return CardType.ACTION_DOUBLE_THE_RENT
+    __slots__ = ()
+    card_type = CardType.ACTION_DOUBLE_THE_RENT
 
 class JustSayNoCard(ActionCard):
     """Action card to cancel an action targeting the player."""
-    def get_card_type(self) -> CardType:
-        return CardType.ACTION_JUST_SAY_NO
+    __slots__ = ()
+    card_type = CardType.ACTION_JUST_SAY_NO
 
 class PassGoCard(ActionCard):
     """Action card that allows the player to collect 2 extra cards from the deck."""
-    def get_card_type(self) -> CardType:
-        return CardType.ACTION_PASS_GO
+    __slots__ = ()
+    card_type = CardType.ACTION_PASS_GO
 
 class ItsMyBirthdayCard(ActionCard):
     """Action card that allows the player to collect $2M from the bank."""
-    def get_card_type(self) -> CardType:
-        return CardType.ACTION_BIRTHDAY
+    __slots__ = ()
+    card_type = CardType.ACTION_BIRTHDAY
 
 class DebtCollectorCard(ActionCard):
     """Action card that allows the player to collect $2M from the bank."""
-    def get_card_type(self) -> CardType:
-        return CardType.ACTION_DEBT_COLLECTOR
+    __slots__ = ()
+    card_type = CardType.ACTION_DEBT_COLLECTOR
 
 class DealBreakerCard(ActionCard):
     """Action card that allows the player to collect $2M from the bank."""
-    def get_card_type(self) -> CardType:
-        return CardType.ACTION_DEAL_BREAKER
+    __slots__ = ()
+    card_type = CardType.ACTION_DEAL_BREAKER
 
 class SlyDealCard(ActionCard):
     """Action card that allows the player to collect $2M from the bank."""
-    def get_card_type(self) -> CardType:
-        return CardType.ACTION_SLY_DEAL
+    __slots__ = ()
+    card_type = CardType.ACTION_SLY_DEAL
 
 class ForcedDealCard(ActionCard):
     """Action card that allows the player to collect $2M from the bank."""
-    def get_card_type(self) -> CardType:
-        return CardType.ACTION_FORCED_DEAL
+    __slots__ = ()
+    card_type = CardType.ACTION_FORCED_DEAL
 
 class PropertySet():
-    def __init__(self, card: Card):
+    def __init__(self, card: Card, color: Optional[PropertyColor] = None):
+        """`color` is required when the first card is a wild card."""
         if not isinstance(card, PropertyCard) and not isinstance(card, WildPropertyCard):
             raise ValueError("PropertySet must be initialized with a PropertyCard or WildPropertyCard.")
-        if isinstance(card, WildPropertyCard):
-            self.set_color = card.current_color
+        if color is not None:
+            self.set_color = color
+        elif isinstance(card, WildPropertyCard):
+            raise ValueError(f"A property set started with {card.name} needs an explicit color.")
         else:
             self.set_color = card.set_color
         self.cards: List[Card] = [] # Will store PropertyCard or WildPropertyCard
@@ -294,9 +301,8 @@ class PropertySet():
     def add_card(self, card: Card):
         """Adds a property card to the set."""
         if isinstance(card, WildPropertyCard):
-            # Assuming wild card's current_color is set appropriately before adding
-            if card.current_color == self.set_color:
-                self.cards.append(card)
+            # A wild card takes the color of the set it is added to
+            self.cards.append(card)
         elif isinstance(card, PropertyCard) and card.set_color == self.set_color:
             if self.number_for_full_set == 0:
                 self.number_for_full_set = card.properties_in_set
@@ -419,7 +425,7 @@ class PropertySet():
     def to_json(self) -> Dict[str, Any]:
         return {
             "set_color": self.set_color.name if self.set_color else "Wild cards",
-            "cards": [card.to_json() for card in self.cards],
+            "cards": [card.to_json(self.set_color) if isinstance(card, WildPropertyCard) else card.to_json() for card in self.cards],
             "number_for_full_set": self.number_for_full_set,
             "is_full_set": self.is_full_set,
             "has_house": self.has_house,
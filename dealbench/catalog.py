@@ -0,0 +1,89 @@
+"""The immutable set of physical cards that games are dealt from.
+
+``CardCatalog`` builds one ``Card`` object per physical card in a deck
+configuration and numbers them with a stable ``card_id`` (their position in the
+configuration). The cards hold no per-game state, so a single catalog is shared
+by every game in the process and dealing a new game only permutes its cards.
+"""
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+from dealbench.card import (
+    Card, CardType, PropertyColor,
+    MoneyCard, PropertyCard, WildPropertyCard, RentCard, HouseCard, HotelCard,
+    DoubleTheRentCard, JustSayNoCard, PassGoCard, ItsMyBirthdayCard, DebtCollectorCard,
+    SlyDealCard, ForcedDealCard, DealBreakerCard
+)
+from dealbench.deck_config import DECK_CONFIGURATION, RENT_INFO
+import logging
+logger = logging.getLogger(__name__)
+
+# Card class used for a configuration entry, looked up by its 'card_class' key first and its type second
+CARD_CLASSES_BY_NAME: Dict[str, Type[Card]] = {
+    cls.__name__: cls for cls in (
+        MoneyCard, PropertyCard, WildPropertyCard, RentCard, HouseCard, HotelCard,
+        DoubleTheRentCard, JustSayNoCard, PassGoCard, ItsMyBirthdayCard, DebtCollectorCard,
+        SlyDealCard, ForcedDealCard, DealBreakerCard
+    )
+}
+CARD_CLASSES_BY_TYPE: Dict[CardType, Type[Card]] = {
+    cls.card_type: cls for cls in CARD_CLASSES_BY_NAME.values() if cls not in (HouseCard, HotelCard)
+}
+
+
+class CardCatalog:
+    """Every physical card of a deck configuration, indexed by card_id."""
+
+    def __init__(self, deck_configuration: List[Dict[str, Any]] = DECK_CONFIGURATION, rent_info: Dict[PropertyColor, Dict[str, Any]] = RENT_INFO):
+        self.rent_info = rent_info
+        cards: List[Card] = []
+        for item in deck_configuration:
+            for _ in range(item['count']):
+                card = self._instantiate_card(item)
+                card.card_id = len(cards)
+                cards.append(card)
+        self.cards: Tuple[Card, ...] = tuple(cards)
+        logger.info("Card catalog built with %s cards.", len(self.cards))
+
+    def __len__(self) -> int:
+        return len(self.cards)
+
+    def __getitem__(self, card_id: int) -> Card:
+        return self.cards[card_id]
+
+    def _instantiate_card(self, item: Dict[str, Any]) -> Card:
+        """Creates the Card object described by one configuration entry."""
+        card_type = item['type']
+        class_name = item.get('card_class')
+        if class_name is not None:
+            card_class = CARD_CLASSES_BY_NAME.get(class_name)
+            if card_class is None or card_class.card_type != card_type:
+                raise ValueError(f"Unknown card class {class_name} for card type {card_type}")
+        else:
+            card_class = CARD_CLASSES_BY_TYPE.get(card_type)
+            if card_class is None:
+                raise ValueError(f"Unhandled card type in configuration: {card_type}")
+
+        name, value = item['name'], item['value']
+        if card_type == CardType.PROPERTY:
+            color_info = self.rent_info[item['set_color']]
+            return card_class(name, value, set_color=item['set_color'], rent_values=color_info['rent_values'], properties_in_set=color_info['properties_in_set'])
+        if card_type == CardType.PROPERTY_WILD:
+            colors = item['available_colors']
+            kwargs = {}
+            if len(colors) == 2:
+                kwargs['rent_values'] = {color: self.rent_info[color]['rent_values'] for color in colors}
+                kwargs['properties_in_set'] = {color: self.rent_info[color]['properties_in_set'] for color in colors}
+            return card_class(name, value, available_colors=colors, **kwargs)
+        if card_type == CardType.ACTION_RENT:
+            return card_class(name, value, colors=item['colors'], wild=item['wild'])
+        return card_class(name, value)
+
+
+_default_catalog: Optional[CardCatalog] = None
+
+def get_default_catalog() -> CardCatalog:
+    """The catalog for DECK_CONFIGURATION, built on first use and shared afterwards."""
+    global _default_catalog
+    if _default_catalog is None:
+        _default_catalog = CardCatalog()
+    return _default_catalog
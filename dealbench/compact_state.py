@@ -0,0 +1,447 @@
+"""Compact, integer-indexed game state.
+
+``CompactState`` holds the same information as a ``Game`` and its ``Player`` /
+``PropertySet`` objects, but refers to cards by their integer ``card_id`` and
+keeps card locations in flat arrays. It converts both ways with the object
+model, so code that needs throughput (self-play, search, calibration runs) can
+work on the compact form while ``RulesEngine``, ``TestPlayer`` and the logs
+keep working on the objects.
+"""
+import random
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple
+
+from dealbench.card import BuildingCard, Card, CardType, PropertyCard, PropertyColor, PropertySet, WildPropertyCard
+
+if TYPE_CHECKING:
+    from dealbench.game import Game
+    from dealbench.player import Player
+
+
+# --- Zones a card can be in ---
+ZONE_NONE = 0  # out of play, e.g. a Just Say No that was played
+ZONE_DECK = 1
+ZONE_DISCARD = 2
+ZONE_HAND = 3
+ZONE_BANK = 4
+ZONE_PROPERTY = 5
+
+NO_PLAYER = 255
+NO_COLOR = 255
+
+# --- Building flags per (player, colour) ---
+HOUSE = 1
+HOTEL = 2
+
+# Property colours in enum order; a colour index is a position in this list.
+COLORS: List[PropertyColor] = [color for color in PropertyColor if color != PropertyColor.ALL]
+NUM_COLORS = len(COLORS)
+COLOR_INDEX: Dict[PropertyColor, int] = {color: idx for idx, color in enumerate(COLORS)}
+ALL_COLORS_MASK = (1 << NUM_COLORS) - 1
+
+
+def color_mask(colors: Iterable[PropertyColor]) -> int:
+    """Returns a bitmask with one bit per colour index (ALL sets every bit)."""
+    mask = 0
+    for color in colors:
+        if color == PropertyColor.ALL:
+            return ALL_COLORS_MASK
+        mask |= 1 << COLOR_INDEX[color]
+    return mask
+
+
+class CardTable:
+    """Static per-card attributes, indexed by ``card_id``."""
+
+    def __init__(self, cards: List[Card]):
+        """
+        Args:
+            cards: Card objects where ``cards[i].card_id == i``.
+        """
+        for card_id, card in enumerate(cards):
+            if card is None or card.card_id != card_id:
+                raise ValueError(f"Card table slot {card_id} holds {card}; card ids must be contiguous.")
+        self.cards = cards
+        self.names: List[str] = [card.name for card in cards]
+        self.card_type: List[CardType] = [card.get_card_type() for card in cards]
+        self.value = bytearray(card.value for card in cards)
+        self.bankable = bytearray(card.can_use_as_money for card in cards)
+        # Colour of a standard property card, NO_COLOR for everything else
+        self.home_color = bytearray(
+            COLOR_INDEX[card.set_color] if type(card) is PropertyCard else NO_COLOR
+            for card in cards
+        )
+        # Colours a wild property can represent / a rent card can charge for
+        self.colors = [
+            color_mask(card.available_colors) if isinstance(card, WildPropertyCard)
+            else color_mask(card.colors) if card.get_card_type() == CardType.ACTION_RENT
+            else 0
+            for card in cards
+        ]
+        # 1 for rent cards that charge a single chosen player
+        self.wild_rent = bytearray(
+            card.get_card_type() == CardType.ACTION_RENT and card.is_wild for card in cards
+        )
+        # HOUSE / HOTEL for building cards, 0 for everything else
+        self.building = bytearray(
+            (HOUSE if card.building_type == "house" else HOTEL) if isinstance(card, BuildingCard) else 0
+            for card in cards
+        )
+        self.rent_values: List[Optional[List[int]]] = [None] * NUM_COLORS
+        self.set_size = bytearray(NUM_COLORS)
+        for card in cards:
+            if type(card) is PropertyCard:
+                idx = COLOR_INDEX[card.set_color]
+                self.rent_values[idx] = card.rent_values
+                self.set_size[idx] = card.properties_in_set
+
+    def __len__(self) -> int:
+        return len(self.cards)
+
+
+class CompactState:
+    """Integer-indexed snapshot of a game: card locations, sets and buildings in flat arrays.
+
+    Per-card arrays (indexed by ``card_id``): ``zone``, ``owner`` and ``color``
+    (the wild card colour, or the set colour for standard properties on the table).
+    Per ``(player, colour)`` arrays (indexed by ``player * NUM_COLORS + colour``):
+    ``need`` (cards required for a full set, 0 when unknown) and ``buildings``
+    (``HOUSE`` / ``HOTEL`` flags). Ordered membership lists mirror the list order
+    of the object model so conversions round-trip exactly.
+    """
+
+    __slots__ = (
+        "table", "num_players", "player_names", "deck", "discard", "hands", "banks",
+        "property_sets", "set_order", "zone", "owner", "color", "need", "buildings",
+        "turn_count", "actions_played", "winner",
+    )
+
+    def __init__(self, table: CardTable, player_names: List[str]):
+        num_cards = len(table)
+        self.table = table
+        self.num_players = len(player_names)
+        self.player_names = list(player_names)
+        self.deck: List[int] = []  # top of the deck is the end of the list
+        self.discard: List[int] = []
+        self.hands: List[List[int]] = [[] for _ in player_names]
+        self.banks: List[List[int]] = [[] for _ in player_names]
+        self.property_sets: List[List[List[int]]] = [[[] for _ in COLORS] for _ in player_names]
+        self.set_order: List[List[int]] = [[] for _ in player_names]  # colour indices in placement order
+        self.zone = bytearray(num_cards)  # every card starts out of play (ZONE_NONE)
+        self.owner = bytearray([NO_PLAYER]) * num_cards
+        self.color = bytearray([NO_COLOR]) * num_cards
+        self.need = bytearray(self.num_players * NUM_COLORS)
+        self.buildings = bytearray(self.num_players * NUM_COLORS)
+        self.turn_count = 0
+        self.actions_played = 0
+        self.winner = -1
+
+    # --- Conversion with the object model ---
+
+    @classmethod
+    def from_game(cls, game: "Game", table: Optional[CardTable] = None) -> "CompactState":
+        """Builds a compact copy of ``game``'s deck, players and turn counters."""
+        players = game.players
+        if table is None:
+            table = CardTable(game.deck.all_cards)
+        state = cls(table, [player.name for player in players])
+
+        for card in game.deck._cards:
+            state._place(card.card_id, ZONE_DECK, NO_PLAYER, state.deck)
+        for card in game.deck._discard_pile:
+            state._place(card.card_id, ZONE_DISCARD, NO_PLAYER, state.discard)
+        for p, player in enumerate(players):
+            for card in player.hand:
+                state._place(card.card_id, ZONE_HAND, p, state.hands[p])
+            for card in player.bank:
+                state._place(card.card_id, ZONE_BANK, p, state.banks[p])
+            for set_color, prop_set in player.property_sets.items():
+                c = COLOR_INDEX[set_color]
+                state.set_order[p].append(c)
+                for card in prop_set.cards:
+                    state._place(card.card_id, ZONE_PROPERTY, p, state.property_sets[p][c])
+                    state.color[card.card_id] = c
+                slot = p * NUM_COLORS + c
+                state.need[slot] = prop_set.number_for_full_set
+                state.buildings[slot] = (HOUSE if prop_set.has_house else 0) | (HOTEL if prop_set.has_hotel else 0)
+
+        state.turn_count = getattr(game, "turn_count", 0)
+        state.actions_played = getattr(game, "actions_played", 0)
+        winner = game.game_winner
+        if winner is not None:
+            winner_name = winner if isinstance(winner, str) else winner.name
+            state.winner = state.player_names.index(winner_name)
+        return state
+
+    @classmethod
+    def from_observation(cls, table: CardTable, game_state_dict: Dict[str, Any], observer: "Player") -> Tuple["CompactState", List[int]]:
+        """Builds the part of a game that ``observer`` can see from ``Game.to_json()``.
+
+        The observer's own hand, bank and properties are placed exactly. Opponents'
+        banks and properties are matched by card name to cards the observer does
+        not hold, and one House / Hotel per building on the table is put in the
+        discard pile. Every other card is left out of play (``ZONE_NONE``) and
+        returned as the hidden cards, for the caller to deal with ``deal_hidden``.
+
+        Returns:
+            ``(state, hidden_card_ids)``
+        """
+        players_json = game_state_dict["players"]
+        state = cls(table, [player_json["name"] for player_json in players_json])
+        me = state.player_names.index(observer.name)
+
+        for card in observer.hand:
+            state._place(card.card_id, ZONE_HAND, me, state.hands[me])
+        for card in observer.bank:
+            state._place(card.card_id, ZONE_BANK, me, state.banks[me])
+        for set_color, prop_set in observer.property_sets.items():
+            c = COLOR_INDEX[set_color]
+            state.set_order[me].append(c)
+            for card in prop_set.cards:
+                state._place(card.card_id, ZONE_PROPERTY, me, state.property_sets[me][c])
+                state.color[card.card_id] = c
+
+        # Cards nobody has been seen with, by name
+        unseen: Dict[str, List[int]] = {}
+        for card_id in range(len(table)):
+            if state.zone[card_id] == ZONE_NONE:
+                unseen.setdefault(table.names[card_id], []).append(card_id)
+
+        def take(name: str) -> int:
+            candidates = unseen.get(name)
+            if not candidates:
+                raise ValueError(f"Observed card {name} is not left in the card table.")
+            return candidates.pop()
+
+        buildings = []
+        for p, player_json in enumerate(players_json):
+            for set_name, set_json in player_json["property_sets"].items():
+                c = COLOR_INDEX[PropertyColor[set_name]]
+                slot = p * NUM_COLORS + c
+                state.need[slot] = set_json["number_for_full_set"]
+                state.buildings[slot] = (HOUSE if set_json["has_house"] else 0) | (HOTEL if set_json["has_hotel"] else 0)
+                buildings.extend(flag for flag in (HOUSE, HOTEL) if state.buildings[slot] & flag)
+                if p == me:
+                    continue
+                state.set_order[p].append(c)
+                for card_json in set_json["cards"]:
+                    card_id = take(card_json["name"])
+                    state._place(card_id, ZONE_PROPERTY, p, state.property_sets[p][c])
+                    state.color[card_id] = c
+            if p != me:
+                for card_json in player_json["banked_cards"]:
+                    state._place(take(card_json["name"]), ZONE_BANK, p, state.banks[p])
+
+        hidden = [card_id for ids in unseen.values() for card_id in ids]
+        for flag in buildings:
+            for card_id in hidden:
+                if table.building[card_id] == flag:
+                    hidden.remove(card_id)
+                    state._place(card_id, ZONE_DISCARD, NO_PLAYER, state.discard)
+                    break
+
+        state.turn_count = game_state_dict["turns_completed_in_game"]
+        state.actions_played = game_state_dict["actions_played_in_current_turn"]
+        return state, hidden
+
+    def deal_hidden(self, hidden: List[int], hand_counts: List[int], deck_size: int, rng: random.Random):
+        """Deals the out-of-play cards in ``hidden`` at random: ``hand_counts[p]`` more
+        cards to each player's hand, ``deck_size`` to the deck and the rest to the discard pile."""
+        if sum(hand_counts) + deck_size > len(hidden):
+            raise ValueError(f"Cannot deal {sum(hand_counts) + deck_size} hidden cards, only {len(hidden)} are unseen.")
+        hidden = hidden[:]
+        rng.shuffle(hidden)
+        start = 0
+        for p, count in enumerate(hand_counts):
+            for card_id in hidden[start:start + count]:
+                self._place(card_id, ZONE_HAND, p, self.hands[p])
+            start += count
+        for card_id in hidden[start:start + deck_size]:
+            self._place(card_id, ZONE_DECK, NO_PLAYER, self.deck)
+        for card_id in hidden[start + deck_size:]:
+            self._place(card_id, ZONE_DISCARD, NO_PLAYER, self.discard)
+
+    def apply_to(self, game: "Game"):
+        """Overwrites the deck, players and turn counters of ``game`` with this state."""
+        if [player.name for player in game.players] != self.player_names:
+            raise ValueError(f"Game players {[p.name for p in game.players]} do not match state players {self.player_names}.")
+        cards = self.table.cards
+        game.deck._cards = [cards[i] for i in self.deck]
+        game.deck._discard_pile = [cards[i] for i in self.discard]
+        for p, player in enumerate(game.players):
+            player.hand = [cards[i] for i in self.hands[p]]
+            player.bank = [cards[i] for i in self.banks[p]]
+            player.property_sets = {}
+            for c in self.set_order[p]:
+                member_ids = self.property_sets[p][c]
+                prop_set = PropertySet(cards[member_ids[0]], COLORS[c])
+                for card_id in member_ids[1:]:
+                    prop_set.add_card(cards[card_id])
+                slot = p * NUM_COLORS + c
+                prop_set.number_for_full_set = self.need[slot]
+                prop_set.has_house = bool(self.buildings[slot] & HOUSE)
+                prop_set.has_hotel = bool(self.buildings[slot] & HOTEL)
+                player.property_sets[COLORS[c]] = prop_set
+            player.refresh_property_state()
+
+        game.turn_count = self.turn_count
+        game.actions_played = self.actions_played
+        game.game_winner = self.player_names[self.winner] if self.winner >= 0 else None
+
+    def copy(self) -> "CompactState":
+        """Returns an independent copy that shares only the static card table."""
+        clone = CompactState.__new__(CompactState)
+        clone.table = self.table
+        clone.num_players = self.num_players
+        clone.player_names = self.player_names
+        clone.deck = self.deck[:]
+        clone.discard = self.discard[:]
+        clone.hands = [hand[:] for hand in self.hands]
+        clone.banks = [bank[:] for bank in self.banks]
+        clone.property_sets = [[members[:] for members in sets] for sets in self.property_sets]
+        clone.set_order = [order[:] for order in self.set_order]
+        clone.zone = self.zone[:]
+        clone.owner = self.owner[:]
+        clone.color = self.color[:]
+        clone.need = self.need[:]
+        clone.buildings = self.buildings[:]
+        clone.turn_count = self.turn_count
+        clone.actions_played = self.actions_played
+        clone.winner = self.winner
+        return clone
+
+    # --- Queries ---
+
+    def location(self, card_id: int) -> Tuple[int, int, int]:
+        """Returns ``(zone, owner, colour)`` for a card."""
+        return self.zone[card_id], self.owner[card_id], self.color[card_id]
+
+    def bank_value(self, player: int) -> int:
+        value = self.table.value
+        return sum(value[card_id] for card_id in self.banks[player])
+
+    def is_full_set(self, player: int, color: int) -> bool:
+        need = self.need[player * NUM_COLORS + color]
+        return bool(need) and len(self.property_sets[player][color]) >= need
+
+    def full_set_count(self, player: int) -> int:
+        return sum(1 for color in self.set_order[player] if self.is_full_set(player, color))
+
+    def has_won(self, player: int) -> bool:
+        need = self.need
+        sets = self.property_sets[player]
+        base = player * NUM_COLORS
+        count = 0
+        for color in self.set_order[player]:
+            if need[base + color] and len(sets[color]) >= need[base + color]:
+                count += 1
+                if count == 3:
+                    return True
+        return False
+
+    def rent_value(self, player: int, color: int) -> int:
+        """Rent for one of the player's sets, following ``PropertySet.get_rent_value``."""
+        members = self.property_sets[player][color]
+        if not members:
+            raise ValueError(f"Player {self.player_names[player]} has no {COLORS[color].name} properties.")
+        # Any-colour wild cards carry no value and no rent table
+        if not any(self.table.value[card_id] for card_id in members):
+            return 0
+        rent_values = self.table.rent_values[color]
+        rent = rent_values[min(len(members), len(rent_values)) - 1]
+        flags = self.buildings[player * NUM_COLORS + color]
+        if flags & HOUSE:
+            rent += 3
+            if flags & HOTEL:
+                rent += 4
+        return rent
+
+    # --- Mutations ---
+
+    def draw(self, player: int) -> int:
+        """Moves the top card of the deck into the player's hand and returns its id."""
+        if not self.deck:
+            raise ValueError("No cards left in the deck.")
+        card_id = self.deck.pop()
+        self.hands[player].append(card_id)
+        self.zone[card_id] = ZONE_HAND
+        self.owner[card_id] = player
+        return card_id
+
+    def move_to_hand(self, card_id: int, player: int):
+        self._detach(card_id)
+        self._place(card_id, ZONE_HAND, player, self.hands[player])
+
+    def move_to_bank(self, card_id: int, player: int):
+        if self.zone[card_id] == ZONE_HAND:
+            # Banking from the hand is by far the most common move in rollouts
+            self.hands[self.owner[card_id]].remove(card_id)
+        else:
+            self._detach(card_id)
+        self.banks[player].append(card_id)
+        self.zone[card_id] = ZONE_BANK
+        self.owner[card_id] = player
+
+    def move_to_discard(self, card_id: int):
+        self._detach(card_id)
+        self._place(card_id, ZONE_DISCARD, NO_PLAYER, self.discard)
+
+    def move_to_properties(self, card_id: int, player: int, color: Optional[int] = None):
+        """Adds a property card to one of the player's sets.
+
+        ``color`` defaults to the card's own colour, or the colour of the set a wild card was last in.
+        """
+        if color is None:
+            color = self.table.home_color[card_id]
+            if color == NO_COLOR:
+                color = self.color[card_id]
+            if color == NO_COLOR:
+                raise ValueError(f"No colour given for {self.table.cards[card_id].name}.")
+        self._detach(card_id)
+        members = self.property_sets[player][color]
+        if not members:
+            self.set_order[player].append(color)
+        slot = player * NUM_COLORS + color
+        if not self.need[slot] and self.table.home_color[card_id] != NO_COLOR:
+            self.need[slot] = self.table.set_size[color]
+        self._place(card_id, ZONE_PROPERTY, player, members)
+        self.color[card_id] = color
+
+    def add_building(self, player: int, color: int, building: int):
+        self.buildings[player * NUM_COLORS + color] |= building
+
+    def remove_from_play(self, card_id: int):
+        """Takes a card out of the game without discarding it, e.g. a played Just Say No."""
+        self._detach(card_id)
+
+    def _place(self, card_id: int, zone: int, player: int, container: List[int]):
+        container.append(card_id)
+        self.zone[card_id] = zone
+        self.owner[card_id] = player
+
+    def _detach(self, card_id: int):
+        """Removes a card from wherever it currently is."""
+        zone, player = self.zone[card_id], self.owner[card_id]
+        if zone == ZONE_HAND:
+            self.hands[player].remove(card_id)
+        elif zone == ZONE_BANK:
+            self.banks[player].remove(card_id)
+        elif zone == ZONE_DECK:
+            self.deck.remove(card_id)
+        elif zone == ZONE_DISCARD:
+            self.discard.remove(card_id)
+        elif zone == ZONE_PROPERTY:
+            color = self.color[card_id]
+            members = self.property_sets[player][color]
+            members.remove(card_id)
+            if not members:
+                # Mirrors PropertySet.remove_card: an emptied set loses its size and buildings
+                slot = player * NUM_COLORS + color
+                self.need[slot] = 0
+                self.buildings[slot] = 0
+                self.set_order[player].remove(color)
+        self.zone[card_id] = ZONE_NONE
+        self.owner[card_id] = NO_PLAYER
+
+    def __repr__(self) -> str:
+        return (f"CompactState(players={self.player_names}, turn={self.turn_count}, "
+                f"deck={len(self.deck)}, discard={len(self.discard)})")
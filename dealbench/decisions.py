@@ -0,0 +1,68 @@
+"""Game logic that can run both synchronously and on an event loop.
+
+The parts of the game that need an answer from a player (and the LLM player's
+decision methods, which need an answer from the model) are written as
+generators. They ``yield`` a request and receive the answer back from ``send``,
+or the exception raised while answering it from ``throw``. ``run_steps`` answers
+the requests with blocking calls and ``arun_steps`` awaits them, so the same code
+serves ``Game.run_game`` and ``Game.arun_game`` without being written twice.
+"""
+from typing import Any, Awaitable, Callable, Dict, Generator, TypeVar
+
+Request = TypeVar("Request")
+Steps = Generator[Request, Any, Any]
+
+# Prefix of the async version of a player decision method, e.g. aget_action
+ASYNC_PREFIX = "a"
+
+
+class Decision:
+    """A choice the game asks a player to make: a call of one of the Player decision
+    methods (get_action, choose_cards_to_discard, provide_payment, wants_to_negate)."""
+    __slots__ = ("player", "method", "kwargs")
+
+    def __init__(self, player, method: str, **kwargs):
+        self.player = player
+        self.method = method
+        self.kwargs: Dict[str, Any] = kwargs
+
+    def ask(self) -> Any:
+        return getattr(self.player, self.method)(**self.kwargs)
+
+    async def aask(self) -> Any:
+        return await getattr(self.player, ASYNC_PREFIX + self.method)(**self.kwargs)
+
+    def __repr__(self) -> str:
+        return f"<Decision({self.method}, player={self.player.name!r})>"
+
+
+def run_steps(steps: Steps, answer: Callable[[Any], Any]) -> Any:
+    """Runs `steps` to completion, answering every request it yields with `answer`.
+
+    Returns:
+        The generator's return value.
+    """
+    reply = error = None
+    while True:
+        try:
+            request = steps.send(reply) if error is None else steps.throw(error)
+        except StopIteration as stop:
+            return stop.value
+        try:
+            reply, error = answer(request), None
+        except Exception as e:
+            reply, error = None, e
+
+
+async def arun_steps(steps: Steps, answer: Callable[[Any], Awaitable[Any]]) -> Any:
+    """``run_steps`` with an async `answer`."""
+    reply = error = None
+    while True:
+        try:
+            request = steps.send(reply) if error is None else steps.throw(error)
+        except StopIteration as stop:
+            return stop.value
+        try:
+            reply, error = await answer(request), None
+        except Exception as e:
+            reply, error = None, e
@@ -112,11 +112,11 @@ DECK_CONFIGURATION = [
 # Standard Monopoly Deal has 106 cards (sometimes listed as 110 with extra blanks/ads)
 # Let's sum our counts:
 total_cards = sum(item['count'] for item in DECK_CONFIGURATION)
-logger.info(f"Total cards configured: {total_cards}")
+logger.info("Total cards configured: %s", total_cards)
 
 EXPECTED_TOTAL = 106
 if total_cards != EXPECTED_TOTAL:
-    logger.warning(f"WARNING: Configured card count ({total_cards}) does not match expected ({EXPECTED_TOTAL})!")
+    logger.warning("WARNING: Configured card count (%s) does not match expected (%s)!", total_cards, EXPECTED_TOTAL)
 
 INITIAL_HAND_SIZE = 5
 MAX_HAND_SIZE = 7
@@ -0,0 +1,99 @@
+"""Compact deltas between JSON values, used to delta-encode game log records.
+
+``diff(old, new)`` returns None when the two values are equal, and otherwise a
+delta that ``patch(old, delta)`` turns back into ``new``. A delta is a dict with:
+
+- ``{"v": value}``: the new value outright;
+- ``{"d": {key: delta}, "x": [keys]}``: a dict with changed or added keys in "d"
+  and deleted keys in "x";
+- ``{"i": {index: delta}}``: a list of unchanged length with changed elements;
+- ``{"s": [start, stop, items]}``: a list whose ``old[start:stop]`` is replaced
+  by ``items``, e.g. a card added to or taken from a hand;
+- ``{}``: no change.
+
+Game records change a few cards per step, so the delta of consecutive records is
+a small fraction of a full record.
+"""
+from typing import Any, Dict, Optional
+
+
+def diff(old: Any, new: Any) -> Optional[Dict[str, Any]]:
+    """The delta from `old` to `new`, or None if they are equal."""
+    if old is new:
+        return None
+    if type(old) is not type(new):
+        return {"v": new}
+    if isinstance(new, dict):
+        return _diff_dicts(old, new)
+    if isinstance(new, list):
+        return _diff_lists(old, new)
+    return None if old == new else {"v": new}
+
+
+def _diff_dicts(old: Dict[Any, Any], new: Dict[Any, Any]) -> Optional[Dict[str, Any]]:
+    changed = {}
+    for key, value in new.items():
+        if key in old:
+            delta = diff(old[key], value)
+            if delta is not None:
+                changed[key] = delta
+        else:
+            changed[key] = {"v": value}
+    removed = [key for key in old if key not in new]
+    if not changed and not removed:
+        return None
+    # Patching appends added keys; keep the delta only if that preserves the key order
+    if list(new) != [key for key in old if key in new] + [key for key in new if key not in old]:
+        return {"v": new}
+    delta: Dict[str, Any] = {}
+    if changed:
+        delta["d"] = changed
+    if removed:
+        delta["x"] = removed
+    return delta
+
+
+def _diff_lists(old: list, new: list) -> Optional[Dict[str, Any]]:
+    if len(old) == len(new):
+        changed = {}
+        for index, (old_item, new_item) in enumerate(zip(old, new)):
+            delta = diff(old_item, new_item)
+            if delta is not None:
+                changed[str(index)] = delta
+        if not changed:
+            return None
+        if len(changed) == len(new) and all("v" in delta for delta in changed.values()):
+            return {"v": new}
+        return {"i": changed}
+
+    limit = min(len(old), len(new))
+    start = 0
+    while start < limit and old[start] == new[start]:
+        start += 1
+    suffix = 0
+    while suffix < limit - start and old[-1 - suffix] == new[-1 - suffix]:
+        suffix += 1
+    return {"s": [start, len(old) - suffix, new[start:len(new) - suffix]]}
+
+
+def patch(old: Any, delta: Dict[str, Any]) -> Any:
+    """Applies a delta from ``diff``. `old` is not modified; unchanged parts are shared."""
+    if "v" in delta:
+        return delta["v"]
+    if "i" in delta:
+        new = list(old)
+        for index, item_delta in delta["i"].items():
+            index = int(index)
+            new[index] = patch(new[index], item_delta)
+        return new
+    if "s" in delta:
+        start, stop, items = delta["s"]
+        return old[:start] + items + old[stop:]
+    if "d" in delta or "x" in delta:
+        new = dict(old)
+        for key in delta.get("x", ()):
+            del new[key]
+        for key, value_delta in delta.get("d", {}).items():
+            new[key] = patch(new.get(key), value_delta)
+        return new
+    return old
@@ -0,0 +1,41 @@
+"""Blocking disk work from code running on the trio event loop.
+
+``Game.arun_game`` runs many games on one thread, so anything they do that waits
+on the disk (the response cache and results database, which may wait up to their
+busy timeout on a locked SQLite file, blob writes, closing a game log) would stall
+every other game. ``run_disk_io`` moves such a call to a worker thread. All of
+them share one small limiter, so a slow disk holds a few threads rather than one
+per game.
+"""
+import functools
+from typing import Any, Callable
+
+import trio
+
+DISK_IO_THREADS = 4
+
+# One limiter per trio.run, created on first use
+_limiter: "trio.lowlevel.RunVar[trio.CapacityLimiter]" = trio.lowlevel.RunVar("dealbench_disk_io_limiter")
+
+
+def disk_io_limiter() -> trio.CapacityLimiter:
+    try:
+        return _limiter.get()
+    except LookupError:
+        limiter = trio.CapacityLimiter(DISK_IO_THREADS)
+        _limiter.set(limiter)
+        return limiter
+
+
+def on_event_loop() -> bool:
+    """Whether the calling thread is running a trio event loop."""
+    try:
+        trio.lowlevel.current_trio_token()
+    except RuntimeError:
+        return False
+    return True
+
+
+async def run_disk_io(function: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Awaits ``function(*args, **kwargs)`` run on a worker thread."""
+    return await trio.to_thread.run_sync(functools.partial(function, *args, **kwargs), limiter=disk_io_limiter())
@@ -0,0 +1,198 @@
+"""Structured, append-only log of what happens in a game.
+
+``Game`` records an ``Event`` for everything it used to write into its free-text
+history. Events are small tuples (type, turn, action index, actor, target, card
+ids, amount, detail) and are only turned into text when read: ``EventLog`` is a
+``Sequence[str]`` whose items render to exactly the lines of the old history, so
+prompts, replays and bots keep reading it as a list of strings, while analytics
+can use ``EventLog.events`` / ``EventLog.to_records`` without parsing text.
+"""
+from bisect import bisect_left
+from enum import Enum, auto
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Union, overload
+
+from dealbench.card import Card, PropertyColor
+from dealbench.deck_config import ACTIONS_PER_TURN, MAX_HAND_SIZE, PASS_GO_DRAW_COUNT
+
+
+class EventType(Enum):
+    NOTE = auto()               # free text, see Game.add_to_game_history
+    GAME_SEED = auto()
+    PLAY_ORDER = auto()
+    DEAL = auto()
+    GAME_START = auto()
+    TURN_HEADER = auto()
+    TURN_START = auto()
+    ACTION_COUNT = auto()
+    INVALID_ACTION = auto()
+    PASS = auto()
+    BANK = auto()
+    ADD_PROPERTY = auto()
+    MOVE_PROPERTY = auto()
+    PAYMENT = auto()
+    PAYMENT_BLOCKED = auto()
+    PAYMENT_SKIPPED = auto()
+    PASS_GO = auto()
+    DEAL_BREAKER = auto()
+    SLY_DEAL = auto()
+    FORCED_DEAL = auto()
+    ACTION_BLOCKED = auto()     # a Deal Breaker, Sly Deal or Forced Deal stopped by Just Say No
+    JUST_SAY_NO = auto()
+    JUST_SAY_NO_SKIPPED = auto()
+    DISCARD_REQUIRED = auto()
+    DISCARD = auto()
+    TURN_END = auto()
+    GAME_OVER = auto()
+    WINNER = auto()
+
+
+class Event(NamedTuple):
+    """One game event. ``actor`` is the player the event is about and ``target`` the
+    other player involved, if any. ``cards`` holds card ids, and ``zones`` the zone
+    ("bank" / "properties") each paid card came from."""
+    type: EventType
+    turn: int
+    action_index: int
+    actor: Optional[str] = None
+    target: Optional[str] = None
+    cards: Tuple[int, ...] = ()
+    amount: Optional[int] = None
+    detail: Optional[str] = None
+    zones: Tuple[str, ...] = ()
+
+    def to_record(self) -> Dict[str, Any]:
+        """Compact JSON-friendly dict that leaves out unset fields."""
+        record: Dict[str, Any] = {"type": self.type.name, "turn": self.turn, "action": self.action_index}
+        if self.actor is not None:
+            record["actor"] = self.actor
+        if self.target is not None:
+            record["target"] = self.target
+        if self.cards:
+            record["cards"] = list(self.cards)
+        if self.amount is not None:
+            record["amount"] = self.amount
+        if self.detail is not None:
+            record["detail"] = self.detail
+        if self.zones:
+            record["zones"] = list(self.zones)
+        return record
+
+
+def _color(name: Optional[str]) -> Optional[PropertyColor]:
+    return PropertyColor[name] if name is not None else None
+
+
+# --- Renderers, producing the text Game used to write into its history ---
+
+_RENDERERS: Dict[EventType, Callable[[Event, Sequence[Card]], str]] = {
+    EventType.NOTE: lambda e, cards: e.detail,
+    EventType.GAME_SEED: lambda e, cards: f"Game seed: {e.amount}",
+    EventType.PLAY_ORDER: lambda e, cards: f"Play order: {e.detail}",
+    EventType.DEAL: lambda e, cards: f"Dealing initial {e.amount} cards to each player...",
+    EventType.GAME_START: lambda e, cards: "\n--- Starting Game --- ",
+    EventType.TURN_HEADER: lambda e, cards: f"\n--- {e.actor}'s Turn ---",
+    EventType.TURN_START: lambda e, cards: f"{e.actor} starts turn.",
+    EventType.ACTION_COUNT: lambda e, cards: f"{e.actor} has played {e.amount}/{ACTIONS_PER_TURN} actions.",
+    EventType.INVALID_ACTION: lambda e, cards: f"Skipping {e.actor}'s action due to invalid actions: {e.detail}",
+    EventType.PASS: lambda e, cards: f"{e.actor} has chosen to end their action phase.",
+    EventType.BANK: lambda e, cards: f"{e.actor} banked ${cards[e.cards[0]].value}M",
+    EventType.ADD_PROPERTY: lambda e, cards: f"{e.actor} added property {cards[e.cards[0]].name} to {_color(e.detail)}",
+    EventType.MOVE_PROPERTY: lambda e, cards: f"{e.actor} moved property {cards[e.cards[0]].name} to {_color(e.detail)}",
+    EventType.PAYMENT: lambda e, cards: (
+        f"{e.actor} paid {sum(cards[c].value for c in e.cards)}M ({e.amount}M requested) to {e.target} "
+        f"with cards {[(cards[c], zone) for c, zone in zip(e.cards, e.zones)]} for {e.detail}."
+    ),
+    EventType.PAYMENT_BLOCKED: lambda e, cards: f"{e.actor}'s Just Say No cancelled the {e.detail} request from {e.target}.",
+    EventType.PAYMENT_SKIPPED: lambda e, cards: f"Skipping payment due to invalid inputs: {e.detail}",
+    EventType.PASS_GO: lambda e, cards: f"{e.actor} received {PASS_GO_DRAW_COUNT} cards from Pass Go. {e.actor} now has {e.amount} cards.",
+    EventType.DEAL_BREAKER: lambda e, cards: f"{e.actor} stole property set {_color(e.detail)} from {e.target} with a deal breaker.",
+    EventType.SLY_DEAL: lambda e, cards: f"{e.actor} stole property {cards[e.cards[0]].name} from {e.target} with a sly deal.",
+    EventType.FORCED_DEAL: lambda e, cards: f"{e.actor} forced deal {cards[e.cards[0]].name} to {e.target} and received {cards[e.cards[1]].name}.",
+    EventType.ACTION_BLOCKED: lambda e, cards: f"{e.actor} cancelled the {e.detail} from {e.target} with Just Say No.",
+    EventType.JUST_SAY_NO: lambda e, cards: f"{e.actor} played Just Say No!",
+    EventType.JUST_SAY_NO_SKIPPED: lambda e, cards: "Skipping Just Say No due to invalid inputs.",
+    EventType.DISCARD_REQUIRED: lambda e, cards: f"{e.actor} has more than {MAX_HAND_SIZE} cards! Discard {e.amount} cards",
+    EventType.DISCARD: lambda e, cards: f"{e.actor} discards {cards[e.cards[0]]}",
+    EventType.TURN_END: lambda e, cards: f"{e.actor} ends turn.",
+    EventType.GAME_OVER: lambda e, cards: f"\n--- GAME OVER --- {e.actor} wins! ---",
+    EventType.WINNER: lambda e, cards: f"{e.actor} is the winner after {e.amount} turns!",
+}
+
+
+class EventLog(Sequence[str]):
+    """Append-only list of events that reads like the old list of history strings.
+
+    Indexing or iterating renders events to text on first access and keeps the
+    text, so building a prompt never re-formats lines it has already seen.
+    """
+
+    def __init__(self, cards: Sequence[Card]):
+        """
+        Args:
+            cards: The game's cards indexed by card_id, used to render card ids.
+        """
+        self.cards = cards
+        self._events: List[Event] = []
+        self._turns: List[int] = []  # turn of each event, for slicing by turn
+        self._rendered: List[str] = []  # text of the first len(_rendered) events
+
+    def append(self, event: Event):
+        self._events.append(event)
+        self._turns.append(event.turn)
+
+    def truncate(self, length: int):
+        """Drops every event after the first `length`, e.g. when a Game branch is restored."""
+        del self._events[length:]
+        del self._turns[length:]
+        del self._rendered[length:]
+
+    @property
+    def events(self) -> List[Event]:
+        """The events themselves. Must not be modified."""
+        return self._events
+
+    def render(self, event: Event) -> str:
+        return _RENDERERS[event.type](event, self.cards)
+
+    def _render_up_to(self, stop: int):
+        rendered, events = self._rendered, self._events
+        for index in range(len(rendered), stop):
+            rendered.append(self.render(events[index]))
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    @overload
+    def __getitem__(self, index: int) -> str: ...
+    @overload
+    def __getitem__(self, index: slice) -> List[str]: ...
+    def __getitem__(self, index: Union[int, slice]) -> Union[str, List[str]]:
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self._events))
+            self._render_up_to(stop)
+            return self._rendered[start:stop:step]
+        if index < 0:
+            index += len(self._events)
+        if not 0 <= index < len(self._events):
+            raise IndexError("event index out of range")
+        self._render_up_to(index + 1)
+        return self._rendered[index]
+
+    def __iter__(self) -> Iterator[str]:
+        self._render_up_to(len(self._events))
+        return iter(self._rendered[:])
+
+    # --- Queries ---
+
+    def index_of_turn(self, turn: int) -> int:
+        """Index of the first event of `turn` or any later turn."""
+        return bisect_left(self._turns, turn)
+
+    def events_for_turns(self, first_turn: int, last_turn: Optional[int] = None) -> List[Event]:
+        """Events from `first_turn` up to and including `last_turn` (default: the latest turn)."""
+        stop = len(self._events) if last_turn is None else self.index_of_turn(last_turn + 1)
+        return self._events[self.index_of_turn(first_turn):stop]
+
+    def to_records(self, start: int = 0, stop: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Compact dicts for the events in ``[start, stop)``, see ``Event.to_record``."""
+        return [event.to_record() for event in self._events[start:stop]]
@@ -0,0 +1,655 @@
+"""Game rules over ``CompactState``, for search and self-play.
+
+The functions here play the same game as ``Game`` and ``RulesEngine`` on the
+integer-indexed ``CompactState``, without building ``Action`` objects, JSON
+state or history strings. A move is a plain tuple::
+
+    (kind, card, color, target, extra, extra2)
+
+with ``-1`` for the fields a kind does not use:
+
+- ``MOVE_PROPERTY``: ``color`` is the set the card is placed in.
+- ``MOVE_WILD``: moves a placed wild ``card`` to set ``color`` (costs no action).
+- ``MOVE_RENT``: charges the ``color`` set, ``extra`` is the Double the Rent count
+  and ``target`` is the charged player for wild rent cards.
+- ``MOVE_BUILDING``: adds ``card`` to the full ``color`` set.
+- ``MOVE_DEBT`` / ``MOVE_DEAL_BREAKER``: ``target`` player (and ``color`` set).
+- ``MOVE_SLY_DEAL``: takes card ``extra`` from ``target``'s ``color`` set.
+- ``MOVE_FORCED_DEAL``: swaps the player's card ``extra2`` for ``target``'s card ``extra``.
+
+Rules quirks of ``Game`` are kept on purpose so that search results transfer:
+Double the Rent multiplies the rent by ``2 ** count`` but only one card is
+removed from the hand, played Just Say No cards and hand-size discards leave
+play, and a Deal Breaker replaces a same-coloured set of the thief. Only the
+pile of played action cards differs: banked and placed cards are not also put
+in the discard pile. Opponent responses follow fixed policies: Just Say No is
+always played when held and payments follow ``TestPlayer.provide_payment``.
+"""
+import functools
+import math
+import random
+from typing import Callable, List, Optional, Tuple
+
+from dealbench.card import CardType, PropertyColor
+from dealbench.compact_state import CardTable, CompactState, COLOR_INDEX, NUM_COLORS, HOUSE, HOTEL, ZONE_BANK
+from dealbench.deck_config import (
+    MAX_HAND_SIZE, ACTIONS_PER_TURN, DRAWS_PER_TURN, PASS_GO_DRAW_COUNT,
+    BIRTHDAY_GIFT_AMOUNT, DEBT_COLLECTOR_AMOUNT,
+)
+
+# --- Move kinds ---
+MOVE_PASS = 0
+MOVE_BANK = 1
+MOVE_PROPERTY = 2
+MOVE_WILD = 3
+MOVE_RENT = 4
+MOVE_BUILDING = 5
+MOVE_PASS_GO = 6
+MOVE_BIRTHDAY = 7
+MOVE_DEBT = 8
+MOVE_DEAL_BREAKER = 9
+MOVE_SLY_DEAL = 10
+MOVE_FORCED_DEAL = 11
+
+Move = Tuple[int, int, int, int, int, int]
+PASS_MOVE: Move = (MOVE_PASS, -1, -1, -1, -1, -1)
+
+# Action kinds that can hand the player properties (payments may include them)
+_GAINS_PROPERTIES = frozenset((MOVE_RENT, MOVE_BIRTHDAY, MOVE_DEBT, MOVE_DEAL_BREAKER, MOVE_SLY_DEAL, MOVE_FORCED_DEAL))
+
+NO_BUILDING_COLORS = (COLOR_INDEX[PropertyColor.RAILROAD], COLOR_INDEX[PropertyColor.UTILITY])
+
+_PROPERTY = CardType.PROPERTY
+_PROPERTY_WILD = CardType.PROPERTY_WILD
+_RENT = CardType.ACTION_RENT
+_BUILDING = CardType.ACTION_BUILDING
+_PASS_GO = CardType.ACTION_PASS_GO
+_BIRTHDAY = CardType.ACTION_BIRTHDAY
+_DEBT_COLLECTOR = CardType.ACTION_DEBT_COLLECTOR
+_DEAL_BREAKER = CardType.ACTION_DEAL_BREAKER
+_SLY_DEAL = CardType.ACTION_SLY_DEAL
+_FORCED_DEAL = CardType.ACTION_FORCED_DEAL
+_DOUBLE_THE_RENT = CardType.ACTION_DOUBLE_THE_RENT
+_JUST_SAY_NO = CardType.ACTION_JUST_SAY_NO
+
+
+def current_player(state: CompactState) -> int:
+    return state.turn_count % state.num_players
+
+
+# --- Move generation ---
+
+def legal_moves(state: CompactState, player: int, include_wild_moves: bool = True) -> List[Move]:
+    """All moves ``RulesEngine.legal_actions`` would offer, with PASS last.
+
+    Like ``RulesEngine``, cards with the same name are only considered once and
+    properties are identified by name within a set, so one move stands for every
+    interchangeable card.
+    """
+    moves: List[Move] = []
+    table = state.table
+    if state.actions_played < ACTIONS_PER_TURN:
+        max_double_the_rent = _max_double_the_rent(state, player)
+        seen = set()
+        for card_id in state.hands[player]:
+            name = table.names[card_id]
+            if name in seen:
+                continue
+            seen.add(name)
+            _card_moves(state, player, card_id, max_double_the_rent, moves)
+
+    if include_wild_moves:
+        colors = table.colors
+        for color in state.set_order[player]:
+            seen = set()
+            for card_id in state.property_sets[player][color]:
+                if table.card_type[card_id] is not _PROPERTY_WILD or table.names[card_id] in seen:
+                    continue
+                seen.add(table.names[card_id])
+                mask = colors[card_id]
+                for target_color in range(NUM_COLORS):
+                    if mask >> target_color & 1 and target_color != color:
+                        moves.append((MOVE_WILD, card_id, target_color, -1, -1, -1))
+
+    moves.append(PASS_MOVE)
+    return moves
+
+
+def _max_double_the_rent(state: CompactState, player: int) -> int:
+    card_type = state.table.card_type
+    held = sum(1 for card_id in state.hands[player] if card_type[card_id] is _DOUBLE_THE_RENT)
+    return min(held, ACTIONS_PER_TURN - state.actions_played - 1)
+
+
+def _card_moves(state: CompactState, player: int, card_id: int, max_double_the_rent: int, moves: List[Move]):
+    """Appends every way of playing one card from the hand, mirroring ``RulesEngine._legal_actions_for_card``."""
+    table = state.table
+    card_type = table.card_type[card_id]
+
+    if card_type is _PROPERTY:
+        moves.append((MOVE_PROPERTY, card_id, table.home_color[card_id], -1, -1, -1))
+        return
+    if card_type is _PROPERTY_WILD:
+        mask = table.colors[card_id]
+        for color in range(NUM_COLORS):
+            if mask >> color & 1:
+                moves.append((MOVE_PROPERTY, card_id, color, -1, -1, -1))
+        return
+
+    if table.bankable[card_id]:
+        moves.append((MOVE_BANK, card_id, -1, -1, -1, -1))
+
+    num_players = state.num_players
+    if card_type is _RENT:
+        mask = table.colors[card_id]
+        wild = table.wild_rent[card_id]
+        for color in state.set_order[player]:
+            if not wild and not mask >> color & 1:
+                continue
+            for count in range(max_double_the_rent + 1):
+                if wild:
+                    for opponent in range(num_players):
+                        if opponent != player:
+                            moves.append((MOVE_RENT, card_id, color, opponent, count, -1))
+                else:
+                    moves.append((MOVE_RENT, card_id, color, -1, count, -1))
+    elif card_type is _BUILDING:
+        building = table.building[card_id]
+        for color in state.set_order[player]:
+            if color in NO_BUILDING_COLORS or not state.is_full_set(player, color):
+                continue
+            flags = state.buildings[player * NUM_COLORS + color]
+            if building == HOUSE:
+                allowed = not flags
+            else:
+                allowed = flags & HOUSE and not flags & HOTEL
+            if allowed:
+                moves.append((MOVE_BUILDING, card_id, color, -1, -1, -1))
+    elif card_type is _PASS_GO:
+        moves.append((MOVE_PASS_GO, card_id, -1, -1, -1, -1))
+    elif card_type is _BIRTHDAY:
+        moves.append((MOVE_BIRTHDAY, card_id, -1, -1, -1, -1))
+    elif card_type is _DEBT_COLLECTOR:
+        for opponent in range(num_players):
+            if opponent != player:
+                moves.append((MOVE_DEBT, card_id, -1, opponent, -1, -1))
+    elif card_type is _DEAL_BREAKER:
+        for opponent in range(num_players):
+            if opponent == player:
+                continue
+            for color in state.set_order[opponent]:
+                if state.is_full_set(opponent, color):
+                    moves.append((MOVE_DEAL_BREAKER, card_id, color, opponent, -1, -1))
+    elif card_type is _SLY_DEAL:
+        for opponent in range(num_players):
+            if opponent == player:
+                continue
+            for color, target_id in stealable_properties(state, opponent):
+                moves.append((MOVE_SLY_DEAL, card_id, color, opponent, target_id, -1))
+    elif card_type is _FORCED_DEAL:
+        own = stealable_properties(state, player)
+        if not own:
+            return
+        for opponent in range(num_players):
+            if opponent == player:
+                continue
+            for _, own_id in own:
+                for color, target_id in stealable_properties(state, opponent):
+                    moves.append((MOVE_FORCED_DEAL, card_id, color, opponent, target_id, own_id))
+
+
+def stealable_properties(state: CompactState, player: int) -> List[Tuple[int, int]]:
+    """``(colour, card_id)`` of one card per name in each of the player's sets that is not full."""
+    names = state.table.names
+    stealable = []
+    for color in state.set_order[player]:
+        if state.is_full_set(player, color):
+            continue
+        seen = set()
+        for card_id in state.property_sets[player][color]:
+            if names[card_id] not in seen:
+                seen.add(names[card_id])
+                stealable.append((color, card_id))
+    return stealable
+
+
+def move_key(state: CompactState, move: Move) -> tuple:
+    """Identifies a move by card names rather than card ids, so that the same move
+    can be recognised across determinizations and matched to an ``Action``."""
+    kind, card_id, color, target, extra, extra2 = move
+    if kind == MOVE_PASS:
+        return (MOVE_PASS,)
+    names = state.table.names
+    name = names[card_id]
+    if kind == MOVE_BANK or kind == MOVE_PASS_GO or kind == MOVE_BIRTHDAY:
+        return (kind, name)
+    if kind == MOVE_PROPERTY or kind == MOVE_BUILDING:
+        return (kind, name, color)
+    if kind == MOVE_WILD:
+        return (kind, name, state.color[card_id], color)
+    if kind == MOVE_RENT:
+        return (kind, name, color, target, extra)
+    if kind == MOVE_DEBT:
+        return (kind, name, target)
+    if kind == MOVE_DEAL_BREAKER:
+        return (kind, name, color, target)
+    if kind == MOVE_SLY_DEAL:
+        return (kind, name, color, target, names[extra])
+    if kind == MOVE_FORCED_DEAL:
+        return (kind, name, color, target, names[extra], names[extra2], state.color[extra2])
+    raise ValueError(f"Unknown move kind {kind}")
+
+
+# --- Applying moves ---
+
+def apply_move(state: CompactState, player: int, move: Move):
+    """Plays a move for ``player`` and counts it against the turn's actions, like
+    ``Game._take_turn``. Sets ``state.winner`` if the player now has three full sets."""
+    kind, card_id, color, target, extra, extra2 = move
+    if kind == MOVE_BANK:
+        state.move_to_bank(card_id, player)
+        state.actions_played += 1
+        return
+    if kind == MOVE_PASS:
+        raise ValueError("Pass moves end the turn and are not applied.")
+    if kind == MOVE_PROPERTY or kind == MOVE_WILD:
+        state.move_to_properties(card_id, player, color)
+        if kind == MOVE_PROPERTY:
+            state.actions_played += 1
+        # Only the set the card went to can have been completed
+        if state.is_full_set(player, color) and state.has_won(player):
+            state.winner = player
+        return
+    state.move_to_discard(card_id)
+    _play_action_card(state, player, move)
+    state.actions_played += 1
+    if kind in _GAINS_PROPERTIES and state.has_won(player):
+        state.winner = player
+
+
+def _play_action_card(state: CompactState, player: int, move: Move):
+    kind, card_id, color, target, extra, extra2 = move
+    if kind == MOVE_RENT:
+        rent = state.rent_value(player, color)
+        if extra:
+            rent *= 2 ** extra
+            card_type = state.table.card_type
+            for double_id in state.hands[player]:
+                if card_type[double_id] is _DOUBLE_THE_RENT:
+                    state.remove_from_play(double_id)
+                    break
+        if target >= 0:
+            collect(state, player, target, rent)
+        else:
+            for opponent in range(state.num_players):
+                if opponent != player:
+                    collect(state, player, opponent, rent)
+    elif kind == MOVE_BUILDING:
+        state.add_building(player, color, state.table.building[card_id])
+    elif kind == MOVE_PASS_GO:
+        for _ in range(PASS_GO_DRAW_COUNT):
+            state.draw(player)
+    elif kind == MOVE_BIRTHDAY:
+        for opponent in range(state.num_players):
+            if opponent != player:
+                collect(state, player, opponent, BIRTHDAY_GIFT_AMOUNT)
+    elif kind == MOVE_DEBT:
+        collect(state, player, target, DEBT_COLLECTOR_AMOUNT)
+    elif kind == MOVE_DEAL_BREAKER:
+        if not just_say_no(state, player, target):
+            _take_property_set(state, player, target, color)
+    elif kind == MOVE_SLY_DEAL:
+        if not just_say_no(state, player, target):
+            state.move_to_properties(extra, player, color)
+    elif kind == MOVE_FORCED_DEAL:
+        if not just_say_no(state, player, target):
+            state.move_to_properties(extra2, target, state.color[extra2])
+            state.move_to_properties(extra, player, color)
+    else:
+        raise ValueError(f"Unexpected move kind {kind}")
+
+
+def _take_property_set(state: CompactState, player: int, target: int, color: int):
+    """Moves a whole set, replacing any set of that colour the player already had."""
+    for card_id in state.property_sets[player][color][:]:
+        state.remove_from_play(card_id)
+    source_slot, slot = target * NUM_COLORS + color, player * NUM_COLORS + color
+    need, buildings = state.need[source_slot], state.buildings[source_slot]
+    for card_id in state.property_sets[target][color][:]:
+        state.move_to_properties(card_id, player, color)
+    state.need[slot] = need
+    state.buildings[slot] = buildings
+
+
+def just_say_no(state: CompactState, source: int, target: int) -> bool:
+    """Plays out a Just Say No chain where everyone negates while they can.
+    Returns True if the pending action is cancelled."""
+    card_type = state.table.card_type
+    current, other = target, source
+    played = False
+    while True:
+        for card_id in state.hands[current]:
+            if card_type[card_id] is _JUST_SAY_NO:
+                state.remove_from_play(card_id)
+                break
+        else:
+            break
+        played = True
+        current, other = other, current
+    return played and current == source
+
+
+def collect(state: CompactState, source: int, target: int, amount: int):
+    """``target`` pays ``amount`` to ``source``, like ``Game._get_money_from``."""
+    if amount == 0:
+        return
+    if just_say_no(state, source, target):
+        return
+    for card_id in choose_payment(state, target, amount):
+        if state.zone[card_id] == ZONE_BANK:
+            state.move_to_bank(card_id, source)
+        else:
+            state.move_to_properties(card_id, source, state.color[card_id])
+
+
+def choose_payment(state: CompactState, player: int, amount: int) -> List[int]:
+    """The cards ``TestPlayer.provide_payment`` would hand over."""
+    value = state.table.value
+    bank = state.banks[player]
+    bank_value = sum(value[card_id] for card_id in bank)
+    payment: List[int] = []
+    total = 0
+    if bank_value >= amount:
+        for card_id in sorted(bank, key=value.__getitem__):
+            payment.append(card_id)
+            total += value[card_id]
+            if total >= amount:
+                break
+        return payment
+
+    payment = bank[:]
+    total = bank_value
+    sets = state.property_sets[player]
+    for color in sorted(state.set_order[player], key=lambda c: sum(value[card_id] for card_id in sets[c])):
+        for card_id in sets[color]:
+            payment.append(card_id)
+            total += value[card_id]
+            if total >= amount:
+                return payment
+    return payment
+
+
+# --- Turns ---
+
+def start_turn(state: CompactState):
+    """Draws the current player's cards for the turn. Raises ValueError when the deck runs out."""
+    player = current_player(state)
+    for _ in range(DRAWS_PER_TURN):
+        state.draw(player)
+    state.actions_played = 0
+
+
+def end_turn(state: CompactState):
+    """Discards down to the hand limit, checks for a win and passes the turn on."""
+    player = current_player(state)
+    hand = state.hands[player]
+    if len(hand) > MAX_HAND_SIZE:
+        for card_id in sorted(hand, key=lambda c: _keep_score(state, c))[:len(hand) - MAX_HAND_SIZE]:
+            state.remove_from_play(card_id)
+    if state.has_won(player):
+        state.winner = player
+        return
+    state.turn_count += 1
+    state.actions_played = 0
+
+
+def _keep_score(state: CompactState, card_id: int) -> int:
+    """How much a card in hand is worth keeping; the lowest scores are discarded first."""
+    table = state.table
+    card_type = table.card_type[card_id]
+    if card_type is _PROPERTY or card_type is _PROPERTY_WILD:
+        return 20 + table.value[card_id]
+    if card_type is _JUST_SAY_NO:
+        return 15
+    return table.value[card_id]
+
+
+def rollout_move(state: CompactState, player: int, rng: random.Random) -> Optional[Move]:
+    """Picks a move for the default rollout policy, or None to end the turn.
+
+    A random card from the hand is played: properties are placed, action cards are
+    played rather than banked three times out of four, and Just Say No / Double the
+    Rent are only banked when nothing else is in hand. Each way of playing the card
+    is equally likely, but only the chosen one is built, see ``_RolloutPlan``.
+    """
+    if state.actions_played >= ACTIONS_PER_TURN or not state.hands[player]:
+        return None
+    return _rollout_move(state, player, _rollout_plan(state.table), rng.random)
+
+
+def _rollout_move(state: CompactState, player: int, plan: "_RolloutPlan", random_: Callable[[], float]) -> Move:
+    hand = state.hands[player]
+    card_id = hand[int(random_() * len(hand))]
+    reserved = plan.reserved
+    if reserved[card_id]:
+        # Uniform over the other cards, if there are any
+        playable = [other for other in hand if not reserved[other]]
+        if playable:
+            card_id = playable[int(random_() * len(playable))]
+    return plan.samplers[card_id](state, player, card_id, random_)
+
+
+# --- Rollout move samplers ---
+# Each draws one of the moves _card_moves would list for a card, with the odds of
+# rollout_move's policy, without listing them.
+
+def _pick(count: int, random_: Callable[[], float]) -> int:
+    """Index of the play to make out of `count`, or -1 to bank the card instead."""
+    if not count:
+        return -1
+    if random_() < 0.75:
+        return int(random_() * count)
+    return int(random_() * (count + 1)) - 1
+
+
+def _bank_move(card_id: int) -> Move:
+    return (MOVE_BANK, card_id, -1, -1, -1, -1)
+
+
+def _sample_bank(state: CompactState, player: int, card_id: int, random_) -> Move:
+    return _bank_move(card_id)
+
+
+def _sample_property(state: CompactState, player: int, card_id: int, random_) -> Move:
+    return (MOVE_PROPERTY, card_id, state.table.home_color[card_id], -1, -1, -1)
+
+
+def _sample_wild(state: CompactState, player: int, card_id: int, random_) -> Move:
+    colors = _rollout_plan(state.table).wild_colors[card_id]
+    return (MOVE_PROPERTY, card_id, colors[int(random_() * len(colors))], -1, -1, -1)
+
+
+def _sample_rent(state: CompactState, player: int, card_id: int, random_) -> Move:
+    table = state.table
+    wild = table.wild_rent[card_id]
+    if wild:
+        colors = state.set_order[player]
+    else:
+        mask = table.colors[card_id]
+        colors = [color for color in state.set_order[player] if mask >> color & 1]
+    if not colors:
+        return _bank_move(card_id)
+    doubles = _max_double_the_rent(state, player) + 1
+    targets = state.num_players - 1 if wild else 1
+    index = _pick(len(colors) * doubles * targets, random_)
+    if index < 0:
+        return _bank_move(card_id)
+    index, color = divmod(index, len(colors))
+    target, count = divmod(index, doubles)
+    if not wild:
+        target = -1
+    elif target >= player:
+        target += 1
+    return (MOVE_RENT, card_id, colors[color], target, count, -1)
+
+
+def _sample_building(state: CompactState, player: int, card_id: int, random_) -> Move:
+    building = state.table.building[card_id]
+    buildings = state.buildings
+    colors = []
+    for color in state.set_order[player]:
+        if color in NO_BUILDING_COLORS or not state.is_full_set(player, color):
+            continue
+        flags = buildings[player * NUM_COLORS + color]
+        if (not flags) if building == HOUSE else (flags & HOUSE and not flags & HOTEL):
+            colors.append(color)
+    index = _pick(len(colors), random_)
+    return (MOVE_BUILDING, card_id, colors[index], -1, -1, -1) if index >= 0 else _bank_move(card_id)
+
+
+def _sample_pass_go(state: CompactState, player: int, card_id: int, random_) -> Move:
+    return (MOVE_PASS_GO, card_id, -1, -1, -1, -1) if _pick(1, random_) == 0 else _bank_move(card_id)
+
+
+def _sample_birthday(state: CompactState, player: int, card_id: int, random_) -> Move:
+    return (MOVE_BIRTHDAY, card_id, -1, -1, -1, -1) if _pick(1, random_) == 0 else _bank_move(card_id)
+
+
+def _sample_debt(state: CompactState, player: int, card_id: int, random_) -> Move:
+    target = _pick(state.num_players - 1, random_)
+    if target < 0:
+        return _bank_move(card_id)
+    return (MOVE_DEBT, card_id, -1, target + 1 if target >= player else target, -1, -1)
+
+
+def _sample_deal_breaker(state: CompactState, player: int, card_id: int, random_) -> Move:
+    full_sets = [
+        (opponent, color)
+        for opponent in range(state.num_players) if opponent != player
+        for color in state.set_order[opponent] if state.is_full_set(opponent, color)
+    ]
+    index = _pick(len(full_sets), random_)
+    if index < 0:
+        return _bank_move(card_id)
+    opponent, color = full_sets[index]
+    return (MOVE_DEAL_BREAKER, card_id, color, opponent, -1, -1)
+
+
+def _sample_sly_deal(state: CompactState, player: int, card_id: int, random_) -> Move:
+    targets = [
+        (opponent, color, target_id)
+        for opponent in range(state.num_players) if opponent != player
+        for color, target_id in stealable_properties(state, opponent)
+    ]
+    index = _pick(len(targets), random_)
+    if index < 0:
+        return _bank_move(card_id)
+    opponent, color, target_id = targets[index]
+    return (MOVE_SLY_DEAL, card_id, color, opponent, target_id, -1)
+
+
+def _sample_forced_deal(state: CompactState, player: int, card_id: int, random_) -> Move:
+    own = stealable_properties(state, player)
+    targets = [
+        (opponent, color, target_id)
+        for opponent in range(state.num_players) if opponent != player
+        for color, target_id in stealable_properties(state, opponent)
+    ] if own else []
+    index = _pick(len(own) * len(targets), random_)
+    if index < 0:
+        return _bank_move(card_id)
+    target, own_index = divmod(index, len(own))
+    opponent, color, target_id = targets[target]
+    return (MOVE_FORCED_DEAL, card_id, color, opponent, target_id, own[own_index][1])
+
+
+_SAMPLERS = {
+    _PROPERTY: _sample_property,
+    _PROPERTY_WILD: _sample_wild,
+    _RENT: _sample_rent,
+    _BUILDING: _sample_building,
+    _PASS_GO: _sample_pass_go,
+    _BIRTHDAY: _sample_birthday,
+    _DEBT_COLLECTOR: _sample_debt,
+    _DEAL_BREAKER: _sample_deal_breaker,
+    _SLY_DEAL: _sample_sly_deal,
+    _FORCED_DEAL: _sample_forced_deal,
+}
+
+
+class _RolloutPlan:
+    """Per-card lookups of the rollout policy, built once per card table."""
+
+    def __init__(self, table: CardTable):
+        self.samplers = [_SAMPLERS.get(card_type, _sample_bank) for card_type in table.card_type]
+        # Cards only banked when nothing else is in hand
+        self.reserved = bytearray(card_type is _JUST_SAY_NO or card_type is _DOUBLE_THE_RENT for card_type in table.card_type)
+        self.wild_colors = [tuple(color for color in range(NUM_COLORS) if mask >> color & 1) for mask in table.colors]
+
+
+@functools.lru_cache(maxsize=16)
+def _rollout_plan(table: CardTable) -> _RolloutPlan:
+    return _RolloutPlan(table)
+
+
+def play_turn(state: CompactState, rng: random.Random):
+    """Plays the rest of the current player's action phase with ``rollout_move``."""
+    player = current_player(state)
+    plan = _rollout_plan(state.table)
+    random_ = rng.random
+    hand = state.hands[player]
+    while state.winner < 0 and state.actions_played < ACTIONS_PER_TURN and hand:
+        apply_move(state, player, _rollout_move(state, player, plan, random_))
+
+
+def playout(state: CompactState, rng: random.Random, max_turns: int, turn_over: bool = False):
+    """Plays on from ``state`` in place with the rollout policy for up to ``max_turns``
+    turn changes, or until someone wins or the deck runs out.
+
+    Args:
+        turn_over: The current player's action phase has already ended (they passed).
+    """
+    try:
+        if not turn_over:
+            play_turn(state, rng)
+        for _ in range(max_turns):
+            if state.winner >= 0:
+                return
+            end_turn(state)
+            if state.winner >= 0:
+                return
+            start_turn(state)
+            play_turn(state, rng)
+    except ValueError:
+        # Game raises when the deck runs out; the position is scored as it stands
+        pass
+
+
+# --- Evaluation ---
+
+def player_score(state: CompactState, player: int) -> float:
+    """Heuristic progress towards three full sets, in full-set units."""
+    value = state.table.value
+    set_size = state.table.set_size
+    score = 0.0
+    partial = []
+    for color in state.set_order[player]:
+        members = state.property_sets[player][color]
+        if state.is_full_set(player, color):
+            score += 1.0
+        else:
+            partial.append(len(members) / set_size[color])
+    # Only the closest sets count towards the missing full sets
+    partial.sort(reverse=True)
+    score += 0.6 * sum(partial[:max(0, 3 - int(score))])
+    score += 0.02 * min(sum(value[card_id] for card_id in state.banks[player]), 15)
+    return score
+
+
+def evaluate(state: CompactState, player: int) -> float:
+    """Value of ``state`` for ``player`` in [0, 1]: 1 for a win, 0 for a loss and a
+    logistic function of the score difference to the best opponent otherwise."""
+    if state.winner >= 0:
+        return 1.0 if state.winner == player else 0.0
+    best_opponent = max(player_score(state, p) for p in range(state.num_players) if p != player)
+    return 1.0 / (1.0 + math.exp(-2.0 * (player_score(state, player) - best_opponent)))
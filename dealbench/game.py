@@ -1,109 +1,266 @@
 import random
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from dealbench.deck import Deck
 from dealbench.player import Player
-from dealbench.card import BuildingCard, Card, MoneyCard, PropertyCard, WildPropertyCard, RentCard, CardType, PropertyColor, PassGoCard, ItsMyBirthdayCard, DebtCollectorCard, DealBreakerCard, SlyDealCard, ForcedDealCard
-from dealbench.action import Action, ActionType, ActionPropertyInfo
+from dealbench.card import BuildingCard, Card, PropertyCard, CardType
+from dealbench.action import Action, ActionType
 from dealbench.rules_engine import RulesEngine
-import json
+from dealbench.decisions import Decision, Steps, run_steps, arun_steps
+from dealbench.disk_io import run_disk_io
+from dealbench.logging_setup import configure_logging, game_logging
+from dealbench.results_db import ResultsDB, player_model
+from dealbench.sinks import EventSink, NullSink, BackgroundSink, JsonlFileSink, GAME_LOG_FILE_NAME, RESULT_RECORD_NAME
+from dealbench.undo import UndoLog, GameSnapshot
+from dealbench.events import Event, EventLog, EventType
 from dealbench.deck_config import INITIAL_HAND_SIZE, MAX_HAND_SIZE, ACTIONS_PER_TURN, DRAWS_PER_TURN, PASS_GO_DRAW_COUNT, BIRTHDAY_GIFT_AMOUNT, DEBT_COLLECTOR_AMOUNT
 from dealbench.llm import qwen3_235b, deepseek_r1, meta_maverick, gpt_4_1_nano, claude_4_sonnet, openai_o4_mini, openai_o3, gemini_2_5_pro, kimi_k2
 import logging 
 import time
 import os 
+import threading
+from contextlib import nullcontext
+import trio
 
 logger = logging.getLogger(__name__)
 
+# Game identifiers handed out by this process, see _claim_game_identifier
+_claimed_identifiers = set()
+_claimed_identifiers_lock = threading.Lock()
+
+
+def _claim_game_identifier(prefix: str) -> str:
+    """A game identifier starting with `prefix` that no other game of this process has and
+    that has no logs folder yet. Games with the same players started in the same second
+    get a numbered suffix instead of sharing one log."""
+    with _claimed_identifiers_lock:
+        identifier, number = f"{prefix}_game", 1
+        while identifier in _claimed_identifiers or os.path.exists(os.path.join("logs", identifier)):
+            number += 1
+            identifier = f"{prefix}_{number}_game"
+        _claimed_identifiers.add(identifier)
+        return identifier
+
+
 class Game:
     """Orchestrates the Monopoly Deal game flow."""
 
-    def __init__(self, players: List[Player]):
+    def __init__(self, players: List[Player], sink: Optional[EventSink] = None, headless: bool = False, seed: Optional[int] = None,
+                 results_db: Optional[ResultsDB] = None):
         """
         Initializes the game with a list of players.
 
         Args:
             players: A list of Player objects participating in the game.
+            sink: Where game records are saved. Defaults to one line per action in
+                logs/<game_identifier>/game.jsonl, written on a background thread, or to
+                a NullSink in headless mode.
+            headless: Run without a text game history or progress output. Meant for
+                high-throughput simulations with bots that do not read the history.
+            seed: Seed for the game's random streams (seating, deck order and one per
+                player). Drawn from the global random module when not given.
+            results_db: Where the result, per-turn statistics and LLM call metrics are
+                recorded when the game ends. Defaults to logs/results.sqlite, or to no
+                database in headless mode.
         """
         if not players or len(players) < 2 or len(players) > 5:
             raise ValueError("Game requires between 2 and 5 players.")
 
-        self.game_history = []
-        logger.info("Initializing Game...")
+        self.headless = headless
+        self.turn_count = 0
+        self.actions_played = 0
+        self.seed = seed if seed is not None else random.getrandbits(32)
+        logger.info("Initializing Game with seed %s...", self.seed)
         # 1. Create and shuffle the deck
-        self.deck: Deck = Deck() 
-        logger.info(f"Created deck with {self.deck.total_cards} cards.")
-        random.shuffle(players)
+        self.deck: Deck = Deck(rng=self._rng_stream("deck"))
+        logger.info("Created deck with %s cards.", self.deck.total_cards)
+        self.game_history = EventLog(self.deck.all_cards)
+        self._saved_event_count = 0 # Events already handed to the sink
+        self._rng_stream("seating").shuffle(players)
         self.players = players
-        self.add_to_game_history(f"Play order: {', '.join([p.name for p in players])}")
+        for player in self.players:
+            player.rng = self._rng_stream(f"player:{player.name}")
+        # Shared by the deck and the players so snapshot()/restore() can roll back their changes
+        self.undo_log = UndoLog()
+        self.deck.undo_log = self.undo_log
+        for player in self.players:
+            player.undo_log = self.undo_log
+        self._log(EventType.GAME_SEED, amount=self.seed)
+        self._log(EventType.PLAY_ORDER, detail=', '.join([p.name for p in players]))
 
         # 4. Initialize Action Handler
         self.rules_engine = RulesEngine()
 
         # 5. Deal initial hands
-        self.add_to_game_history(f"Dealing initial {INITIAL_HAND_SIZE} cards to each player...")
+        self._log(EventType.DEAL, amount=INITIAL_HAND_SIZE)
         for player in self.players:
             for _ in range(INITIAL_HAND_SIZE):
                 card = self.deck.draw_card()
                 player.add_card_to_hand(card)
         
         self.game_winner = None
+        self._json_cache: Dict[bool, Tuple[tuple, Dict[str, Any]]] = {} # debug -> (state key, to_json() result)
         player_names_for_file = "_".join([p.name.replace("/", "_") for p in self.players])
-        self.game_identifier = f"{time.strftime('%Y-%m-%d_%H-%M-%S')}_{player_names_for_file}_game"
+        self.started_at = time.strftime("%Y-%m-%d %H:%M:%S")
+        self.game_identifier = _claim_game_identifier(f"{time.strftime('%Y-%m-%d_%H-%M-%S')}_{player_names_for_file}")
+        self.tournament_id: Optional[str] = None # Set by Tournament
+        if sink is None:
+            sink = NullSink() if headless else BackgroundSink(JsonlFileSink(os.path.join("logs", self.game_identifier, GAME_LOG_FILE_NAME)))
+        self.sink = sink
+        if results_db is None and not headless:
+            results_db = ResultsDB()
+        self.results_db = results_db
         logger.info("Initial hands dealt.")
 
         logger.info("Game Setup Complete.")
 
+    def _rng_stream(self, name: str) -> random.Random:
+        """An independent random stream derived from the game seed, so that e.g. the deal
+        does not change when a bot draws more or fewer random numbers."""
+        return random.Random(f"{self.seed}:{name}")
+
     def add_to_game_history(self, message: str, debug=False):
+        """Records a free-text note in the game history."""
         if debug:
             logger.info(message)
-        self.game_history.append(message)
+        self._log(EventType.NOTE, detail=message)
+
+    def _log(self, event_type: EventType, actor: Optional[str] = None, target: Optional[str] = None, cards: Tuple[int, ...] = (),
+             amount: Optional[int] = None, detail: Optional[str] = None, zones: Tuple[str, ...] = ()):
+        """Appends an event to the game history, stamped with the current turn and action."""
+        if not self.headless:
+            self.game_history.append(Event(event_type, self.turn_count, self.actions_played, actor, target, cards, amount, detail, zones))
     
-    def save_game(self, file_name: str = "result.json", action: Optional[Action] = None, metadata: Optional[Dict[str, Any]] = None):
+    def save_game(self, file_name: str = RESULT_RECORD_NAME, action: Optional[Action] = None, metadata: Optional[Dict[str, Any]] = None,
+                  full_history: bool = False):
         """Save the current game state.
 
+        Each record carries the events since the previous record as compact dicts
+        (see events.Event.to_record).
+
         Args:
-            file_name: Name of the file within the game log directory.
+            file_name: Name of the record, i.e. the file within the game log directory for file sinks.
+            full_history: Also include the whole game history as text and the model of every
+                player, as the final record does.
         """
+        if not self.sink.enabled:
+            return
+        event_count = len(self.game_history)
         things_to_save = {
             "winner": self.game_winner,
+            "seed": self.seed,
             "turn_count": self.turn_count,
             "players": [p.to_json(debug=True) for p in self.players],
-            "game_history": self.game_history,
+            "events": self.game_history.to_records(self._saved_event_count, event_count),
             "game_state": self.to_json(debug=True),
             "metadata": metadata,
             "action": action.human_readable() if action else None
         }
-        os.makedirs(f"logs/{self.game_identifier}", exist_ok=True)
-        with open(f"logs/{self.game_identifier}/{file_name}", "w") as f:
-            json.dump(things_to_save, f, indent=4)
+        if full_history:
+            things_to_save["game_history"] = list(self.game_history)
+            things_to_save["player_models"] = {p.name: player_model(p) for p in self.players}
+        self._saved_event_count = event_count
+        self.sink.write(file_name, things_to_save)
     
+    # --- Branching ---
+
+    def snapshot(self) -> GameSnapshot:
+        """
+        Marks the current state so it can be returned to with restore(). Until the
+        snapshot is restored or committed, every change to the deck and the players is
+        journaled, which makes branching cost proportional to what the branch changes.
+
+        Snapshots nest and must be closed in LIFO order. Records already handed to the
+        game's sink are not taken back, so lookahead should run on headless games.
+        """
+        return GameSnapshot(
+            mark=self.undo_log.mark(),
+            turn_count=self.turn_count,
+            actions_played=self.actions_played,
+            game_winner=self.game_winner,
+            history_length=len(self.game_history),
+        )
+
+    def restore(self, snapshot: GameSnapshot):
+        """Rolls the game back to `snapshot` and closes it."""
+        self.undo_log.rollback(snapshot.mark)
+        self.turn_count = snapshot.turn_count
+        self.actions_played = snapshot.actions_played
+        self.game_winner = snapshot.game_winner
+        self.game_history.truncate(snapshot.history_length)
+        self._saved_event_count = min(self._saved_event_count, snapshot.history_length)
+
+    def commit(self, snapshot: GameSnapshot):
+        """Keeps everything since `snapshot` and closes it."""
+        self.undo_log.commit(snapshot.mark)
+
+    # --- Game loop ---
+    # The game logic is made of generators that yield a Decision whenever a player has
+    # to choose (see dealbench.decisions); run_game asks the players' blocking methods,
+    # arun_game awaits their async versions.
+
     def run_game(self):
         """Runs the main game loop until a winner is determined."""
-        self.add_to_game_history("\n--- Starting Game --- ")
+        try:
+            with self._logging_context():
+                run_steps(self._game_steps(), Decision.ask)
+        finally:
+            self._finish()
+
+    async def arun_game(self):
+        """``run_game`` on the caller's trio event loop: player decisions are awaited
+        through Player.aget_action and friends, so many games can share one thread."""
+        try:
+            with self._logging_context():
+                await arun_steps(self._game_steps(), self._aask)
+        finally:
+            # Closing the log and recording the result wait on the disk; shielded so
+            # that a cancelled game is still closed and recorded
+            with trio.CancelScope(shield=True):
+                await run_disk_io(self._finish)
+
+    async def _aask(self, decision: Decision) -> Any:
+        # Records the sink could not take without blocking the loop are handed over first
+        await self.sink.await_room()
+        return await decision.aask()
+
+    def _logging_context(self):
+        return nullcontext() if self.headless else game_logging(self.game_identifier)
+
+    def _finish(self):
+        self.sink.close()
+        if self.results_db is not None:
+            try:
+                self.results_db.record_game(self)
+            except Exception as e:
+                logger.error("Could not record %s in %s: %s", self.game_identifier, self.results_db.path, e)
+
+    def _game_steps(self) -> Steps:
+        self._log(EventType.GAME_START)
         self.turn_count = 0
         while self.game_winner is None:
             current_player = self._get_current_player()
-            self.add_to_game_history(f"\n--- {current_player.name}'s Turn ---")
-            self._take_turn(current_player)
+            self._log(EventType.TURN_HEADER, current_player.name)
+            yield from self._take_turn(current_player)
+            self.sink.flush()
             has_won = self.rules_engine.check_win_condition(current_player)
             if has_won:
                 self.game_winner = current_player.name
-                self.add_to_game_history(f"\n--- GAME OVER --- {self.game_winner} wins! ---")
+                self._log(EventType.GAME_OVER, self.game_winner)
                 break
             self.turn_count += 1
-            if self.turn_count % 5 == 0:
+            if self.turn_count % 5 == 0 and not self.headless:
                 print(f"UPDATE: {self.game_identifier} has completed {self.turn_count} turns.")
 
         if self.game_winner:
-            self.add_to_game_history(f"{self.game_winner} is the winner after {self.turn_count} turns!")
-            self.save_game()
+            self._log(EventType.WINNER, self.game_winner, amount=self.turn_count)
+            self.save_game(full_history=True)
 
     def _get_current_player(self):
         return self.players[self.turn_count%len(self.players)]
         
-    def _take_turn(self, player: Player):
+    def _take_turn(self, player: Player) -> Steps:
         """Handles the logic for a single player's turn."""
-        self.add_to_game_history(f"{player.name} starts turn.")
+        self._log(EventType.TURN_START, player.name)
         # print(json.dumps(self.to_json(debug=True), indent=4))
         # draw two cards first 
         for _ in range(DRAWS_PER_TURN):
@@ -114,16 +271,16 @@ class Game:
         self.actions_played = 0
         while self.actions_played < ACTIONS_PER_TURN:
             # TODO: Display game state to player (hand, properties, bank etc.)
-            self.add_to_game_history(f"{player.name} has played {self.actions_played}/{ACTIONS_PER_TURN} actions.")
+            self._log(EventType.ACTION_COUNT, player.name, amount=self.actions_played)
 
             valid = False
             error_reason = None
             attempts = 0
             while not valid and attempts < 2:
                 if error_reason:
-                    logger.info(f"Invalid action chosen: {error_reason}. Trying again.")
+                    logger.info("Invalid action chosen: %s. Trying again.", error_reason)
                 try:
-                    action, metadata = player.get_action(self.to_json(), self.game_history)
+                    action, metadata = yield Decision(player, "get_action", game_state_dict=self.to_json(), game_history=self.game_history)
                     target_players = [self._get_player_by_name(n) for n in action.target_player_names]
                     valid, error_reason = self.rules_engine.validate_action(action, player, target_players, self.actions_played)
                     attempts += 1
@@ -133,11 +290,11 @@ class Game:
                     continue
             
             if not valid:
-                self.add_to_game_history(f"Skipping {player.name}'s action due to invalid actions: {error_reason}")
+                self._log(EventType.INVALID_ACTION, player.name, detail=error_reason)
                 break
 
             if action.action_type == ActionType.PASS:  # Player chose to end turn
-                self.add_to_game_history(f"{player.name} has chosen to end their action phase.")
+                self._log(EventType.PASS, player.name)
                 # Save when a player passes
                 self.save_game(f"turn-{self.turn_count}_actions-{self.actions_played}.json", action, metadata)
                 break
@@ -146,13 +303,13 @@ class Game:
             self.save_game(f"turn-{self.turn_count}_actions-{self.actions_played}.json", action, metadata)
             
             # now execute action
-            successfully_executed = self.execute(action)
+            successfully_executed = yield from self._execute_steps(action)
             if action.action_type != ActionType.MOVE_PROPERTY:
                 self.actions_played += 1  # Move property does not count towards actions per turn
             if successfully_executed:
-                logger.info(f"Action successful: {action}")
+                logger.info("Action successful: %s", action)
             else:
-                logger.info(f"Could not execute action: {action}")
+                logger.info("Could not execute action: %s", action)
 
 
             has_won = self.rules_engine.check_win_condition(player)
@@ -163,27 +320,44 @@ class Game:
         # 3. Discard excess cards
         if player.cards_in_hand > MAX_HAND_SIZE:
             num_cards_to_discard = player.cards_in_hand - MAX_HAND_SIZE
-            self.add_to_game_history(f"{player.name} has more than {MAX_HAND_SIZE} cards! Discard {num_cards_to_discard} cards")
-            cards_to_discard = player.choose_cards_to_discard(num_cards_to_discard, self.to_json(), self.game_history)
+            self._log(EventType.DISCARD_REQUIRED, player.name, amount=num_cards_to_discard)
+            cards_to_discard = yield Decision(player, "choose_cards_to_discard", num_cards_to_discard=num_cards_to_discard,
+                                              game_state_dict=self.to_json(), game_history=self.game_history)
             # TODO: Separate out the functions where a player chooses what to do, and the functions that control player state?
             for card in cards_to_discard:
-                self.add_to_game_history(f"{player.name} discards {card}")
+                self._log(EventType.DISCARD, player.name, cards=(card.card_id,))
                 player.remove_card_from_hand(card)
             if player.cards_in_hand > MAX_HAND_SIZE:
                 raise ValueError(f"Player {player.name} still has {player.cards_in_hand} cards in hand. player hand: {player.hand}")
 
-        self.add_to_game_history(f"{player.name} ends turn.")
+        self._log(EventType.TURN_END, player.name)
 
     def to_json(self, debug=False) -> Dict[str, Any]:
-        """Exposes all the game state that a player should have access to."""
+        """Exposes all the game state that a player should have access to.
+
+        The result is cached until a card moves or the turn counters change, and is
+        shared between callers, so it must not be modified.
+        """
+        key = (self.state_version, self.turn_count, self.actions_played, self.deck.cards_left)
+        cached = self._json_cache.get(debug)
+        if cached is not None and cached[0] == key:
+            return cached[1]
         json_state = {
             "current_player_name": self._get_current_player().name,
             "turns_completed_in_game": self.turn_count,
             "actions_played_in_current_turn": self.actions_played,
+            "deck_cards_left": self.deck.cards_left,
             "players": [player.to_json(debug) for player in self.players],
+            "state_version": key[0],
         }
+        self._json_cache[debug] = (key, json_state)
         return json_state
 
+    @property
+    def state_version(self) -> int:
+        """Changes whenever any card changes hands, so it can key caches of derived state."""
+        return sum(player.version for player in self.players)
+
     def _get_player_by_name(self, name: str) -> Optional[Player]:
         """Finds the Player object corresponding to a name."""
         for player in self._get_all_players():
@@ -196,7 +370,12 @@ class Game:
         return self.players 
 
     def execute(self, action: Action) -> bool:
-        """Handle playing an action card."""
+        """Handle playing an action card, asking the players' blocking decision methods
+        for any payment or Just Say No it needs."""
+        return run_steps(self._execute_steps(action), Decision.ask)
+
+    def _execute_steps(self, action: Action) -> Steps:
+        """Generator version of ``execute``, see ``_game_steps``."""
         # Assuming Card object has a method like is_action() or check type
         # if not self.card.is_action(): 
         #     raise ValueError(f"Card {self.card.name} is not an action card.")
@@ -218,7 +397,7 @@ class Game:
             case ActionType.PASS:
                 return self._execute_pass(action)
             case ActionType.PLAY_ACTION:
-                return self._execute_action(action)
+                return (yield from self._execute_action(action))
             case _:
                 raise ValueError(f"Unexpected action type: {action_type}")
 
@@ -228,7 +407,7 @@ class Game:
         card = action.card
         
         player.add_card_to_bank(card)
-        self.add_to_game_history(f"{player.name} banked ${card.value}M")
+        self._log(EventType.BANK, player.name, cards=(card.card_id,))
         return True
 
     def _execute_add_to_properties(self, action: Action):
@@ -236,13 +415,12 @@ class Game:
         player = action.source_player
         card = action.card
         
-        if isinstance(card, WildPropertyCard):
-            card.current_color = action.target_property_set
         if isinstance(card, PropertyCard):
-            player.add_card_to_properties(card)
+            player.add_card_to_properties(card, action.target_property_set)
         elif isinstance(card, BuildingCard):
             player.add_card_to_properties(card, action.target_property_set)
-        self.add_to_game_history(f"{player.name} added property {card.name} to {action.target_property_set}")
+        self._log(EventType.ADD_PROPERTY, player.name, cards=(card.card_id,),
+                  detail=action.target_property_set.name if action.target_property_set else None)
         return True    
     
     def _execute_move_property(self, action: Action):
@@ -254,41 +432,41 @@ class Game:
         player.remove_card_from_properties(card)
         player.add_card_to_properties(card, target_property_set)
 
-        self.add_to_game_history(f"{player.name} moved property {card.name} to {target_property_set}")
+        self._log(EventType.MOVE_PROPERTY, player.name, cards=(card.card_id,), detail=target_property_set.name)
         return True
 
     def _execute_pass(self, action):
         raise ValueError("Pass action should not be executed.")
 
-    def _execute_action(self, action):
+    def _execute_action(self, action) -> Steps:
         """Handle playing an action card."""
         match action.card.get_card_type():
             case CardType.ACTION_RENT:
-                return self._execute_action_rent(action)
+                return (yield from self._execute_action_rent(action))
             case CardType.ACTION_BUILDING:
                 return self._execute_add_to_properties(action)
             case CardType.ACTION_PASS_GO:
                 return self._execute_pass_go(action)
             case CardType.ACTION_BIRTHDAY:
-                return self._execute_its_my_birthday(action)
+                return (yield from self._execute_its_my_birthday(action))
             case CardType.ACTION_DEBT_COLLECTOR:
-                return self._execute_debt_collector(action)
+                return (yield from self._execute_debt_collector(action))
             case CardType.ACTION_DEAL_BREAKER:
-                return self._execute_deal_breaker(action)
+                return (yield from self._execute_deal_breaker(action))
             case CardType.ACTION_SLY_DEAL:
-                return self._execute_sly_deal(action)
+                return (yield from self._execute_sly_deal(action))
             case CardType.ACTION_FORCED_DEAL:
-                return self._execute_forced_deal(action)
+                return (yield from self._execute_forced_deal(action))
             case _:
                 raise ValueError(f"Unexpected action type: {action.card.get_card_type()}")
     
-    def _get_money_from(self, source_player: Player, target_player: Player, amount: int, reason: str):
+    def _get_money_from(self, source_player: Player, target_player: Player, amount: int, reason: str) -> Steps:
         if amount==0:
             return True
-        if self._attempt_just_say_no(f"collect {amount} for {reason}", source_player, target_player):
-            self.add_to_game_history(f"{target_player.name}'s Just Say No cancelled the {reason} request from {source_player.name}.")
+        if (yield from self._attempt_just_say_no(f"collect {amount} for {reason}", source_player, target_player)):
+            self._log(EventType.PAYMENT_BLOCKED, target_player.name, source_player.name, detail=reason)
             return False
-        payment_cards = target_player.provide_payment(reason=reason,amount=amount, game_state_dict=self.to_json(), game_history=self.game_history)
+        payment_cards = yield Decision(target_player, "provide_payment", reason=reason, amount=amount, game_state_dict=self.to_json(), game_history=self.game_history)
         if payment_cards:
             valid, reason_msg = self.rules_engine.validate_rent_payment(payment_cards)
         else:
@@ -296,21 +474,23 @@ class Game:
             reason_msg="payment_cards is None"  
         attempts = 0
         while not valid and attempts < 2:
-            logger.error(f"Invalid payment: {reason_msg}. Trying again.")
-            payment_cards = target_player.provide_payment(reason=reason,amount=amount, game_state_dict=self.to_json(), game_history=self.game_history)
+            logger.error("Invalid payment: %s. Trying again.", reason_msg)
+            payment_cards = yield Decision(target_player, "provide_payment", reason=reason, amount=amount, game_state_dict=self.to_json(), game_history=self.game_history)
             valid, reason_msg = self.rules_engine.validate_rent_payment(payment_cards)
             attempts += 1
         if not valid:
-            self.add_to_game_history(f"Skipping payment due to invalid inputs: {reason_msg}")
+            self._log(EventType.PAYMENT_SKIPPED, target_player.name, source_player.name, detail=reason_msg)
             return False
-        actual_amount_paid = sum(card.value for card, _ in payment_cards)
-        self.add_to_game_history(f"{target_player.name} paid {actual_amount_paid}M ({amount}M requested) to {source_player.name} with cards {payment_cards} for {reason}.")
+        self._log(EventType.PAYMENT, target_player.name, source_player.name, cards=tuple(card.card_id for card, _ in payment_cards),
+                  amount=amount, detail=reason, zones=tuple(source for _, source in payment_cards))
         for card, source in payment_cards:
-            source_player.add_card(card, source)
+            # Paid properties keep the color they were played as
+            color = target_player.get_property_color(card) if source == "properties" else None
+            source_player.add_card(card, source, color)
             target_player.remove_card(card, source)
         return True
 
-    def _execute_action_rent(self, action: Action): #TODO: handle double the rent
+    def _execute_action_rent(self, action: Action) -> Steps: #TODO: handle double the rent
         """Handle playing a rent card."""
         player = action.source_player
         card = action.card
@@ -325,89 +505,93 @@ class Game:
             success = []
             for other_player in self._get_all_players():
                 if other_player != player:
-                    success.append(self._get_money_from(player, other_player, rent_value, "rent"))
+                    success.append((yield from self._get_money_from(player, other_player, rent_value, "rent")))
             return any(success)
         else:
             target_player_name = action.target_player_names[0]
             target_player = self._get_player_by_name(target_player_name)
             if target_player is None:
                 raise ValueError(f"Target player {target_player_name} not found.")
-            return self._get_money_from(player, target_player, rent_value, "rent")
+            return (yield from self._get_money_from(player, target_player, rent_value, "rent"))
     
     def _execute_pass_go(self, action: Action):
         player = action.source_player
         for _ in range(PASS_GO_DRAW_COUNT):
             card = self.deck.draw_card()
             player.add_card_to_hand(card)
-        self.add_to_game_history(f"{player.name} received {PASS_GO_DRAW_COUNT} cards from Pass Go. {player.name} now has {player.cards_in_hand} cards.")
+        self._log(EventType.PASS_GO, player.name, amount=player.cards_in_hand)
         return True
 
-    def _execute_its_my_birthday(self, action: Action):
+    def _execute_its_my_birthday(self, action: Action) -> Steps:
         player = action.source_player
         success = []
         for other_player in self._get_all_players():
             if other_player != player:
-                success.append(self._get_money_from(player, other_player, BIRTHDAY_GIFT_AMOUNT, "birthday"))
+                success.append((yield from self._get_money_from(player, other_player, BIRTHDAY_GIFT_AMOUNT, "birthday")))
         return any(success)
         
     
-    def _execute_debt_collector(self, action: Action):
+    def _execute_debt_collector(self, action: Action) -> Steps:
         player = action.source_player
         target_player_name = action.target_player_names[0]
         target_player = self._get_player_by_name(target_player_name)
         if target_player is None:
             raise ValueError(f"Target player {target_player_name} not found for action {action}.")
-        return self._get_money_from(player, target_player, DEBT_COLLECTOR_AMOUNT, "debt collection")
+        return (yield from self._get_money_from(player, target_player, DEBT_COLLECTOR_AMOUNT, "debt collection"))
     
-    def _execute_deal_breaker(self, action: Action):
+    def _execute_deal_breaker(self, action: Action) -> Steps:
         player = action.source_player
         target_player_name = action.target_player_names[0]
         target_player = self._get_player_by_name(target_player_name)
         if target_player is None:
             raise ValueError(f"Target player {target_player_name} not found for action {action}.")
-        if self._attempt_just_say_no(f"deal breaker - steal property set {action.target_property_set}", player, target_player):
-            self.add_to_game_history(f"{target_player.name} cancelled the Deal Breaker from {player.name} with Just Say No.")
+        if (yield from self._attempt_just_say_no(f"deal breaker - steal property set {action.target_property_set}", player, target_player)):
+            self._log(EventType.ACTION_BLOCKED, target_player.name, player.name, detail="Deal Breaker")
             return False
         set_color = action.target_property_set
         property_set = target_player.remove_property_set(set_color)
         player.add_property_set(set_color, property_set)
-        self.add_to_game_history(f"{player.name} stole property set {set_color} from {target_player_name} with a deal breaker.")
+        self._log(EventType.DEAL_BREAKER, player.name, target_player_name, cards=tuple(card.card_id for card in property_set.cards),
+                  detail=set_color.name)
         return True
     
-    def _execute_sly_deal(self, action: Action):
+    def _execute_sly_deal(self, action: Action) -> Steps:
         player = action.source_player
         target_player_name = action.target_player_names[0]
         target_player = self._get_player_by_name(target_player_name)
         if target_player is None:
             raise ValueError(f"Target player {target_player_name} not found for action {action}.")
-        if self._attempt_just_say_no(f"sly deal - steal property {action.forced_or_sly_deal_target_property_info.name}", player, target_player):
-            self.add_to_game_history(f"{target_player.name} cancelled the Sly Deal from {player.name} with Just Say No.")
+        if (yield from self._attempt_just_say_no(f"sly deal - steal property {action.forced_or_sly_deal_target_property_info.name}", player, target_player)):
+            self._log(EventType.ACTION_BLOCKED, target_player.name, player.name, detail="Sly Deal")
             return False
-        stolen_card = target_player.get_card_from_properties(action.forced_or_sly_deal_target_property_info)
+        target_info = action.forced_or_sly_deal_target_property_info
+        stolen_card = target_player.get_card_from_properties(target_info)
         target_player.remove_card_from_properties(stolen_card)
-        player.add_card_to_properties(stolen_card)
-        self.add_to_game_history(f"{player.name} stole property {stolen_card.name} from {target_player_name} with a sly deal.")
+        player.add_card_to_properties(stolen_card, target_info.prop_color)
+        self._log(EventType.SLY_DEAL, player.name, target_player_name, cards=(stolen_card.card_id,), detail=target_info.prop_color.name)
         return True
         
-    def _execute_forced_deal(self, action: Action):
+    def _execute_forced_deal(self, action: Action) -> Steps:
         player = action.source_player
         target_player_name = action.target_player_names[0]
         target_player = self._get_player_by_name(target_player_name)
         if target_player is None:
             raise ValueError(f"Target player {target_player_name} not found for action {action}.")
-        if self._attempt_just_say_no(f"forced deal - take away {action.forced_or_sly_deal_target_property_info.name} and receive {action.forced_deal_source_property_info.name}", player, target_player):
-            self.add_to_game_history(f"{target_player.name} cancelled the Forced Deal from {player.name} with Just Say No.")
+        if (yield from self._attempt_just_say_no(f"forced deal - take away {action.forced_or_sly_deal_target_property_info.name} and receive {action.forced_deal_source_property_info.name}", player, target_player)):
+            self._log(EventType.ACTION_BLOCKED, target_player.name, player.name, detail="Forced Deal")
             return False
-        source_card = player.get_card_from_properties(action.forced_deal_source_property_info)
-        target_card = target_player.get_card_from_properties(action.forced_or_sly_deal_target_property_info)
+        source_info = action.forced_deal_source_property_info
+        target_info = action.forced_or_sly_deal_target_property_info
+        source_card = player.get_card_from_properties(source_info)
+        target_card = target_player.get_card_from_properties(target_info)
         player.remove_card_from_properties(source_card)
-        target_player.add_card_to_properties(source_card)
+        target_player.add_card_to_properties(source_card, source_info.prop_color)
         target_player.remove_card_from_properties(target_card)
-        player.add_card_to_properties(target_card)
-        self.add_to_game_history(f"{player.name} forced deal {source_card.name} to {target_player_name} and received {target_card.name}.")
+        player.add_card_to_properties(target_card, target_info.prop_color)
+        self._log(EventType.FORCED_DEAL, player.name, target_player_name, cards=(source_card.card_id, target_card.card_id))
         return True
 
-    def _attempt_just_say_no(self, reason: str, source_player: Player, target_player: Player) -> bool:
+    def _attempt_just_say_no(self, reason: str, source_player: Player, target_player: Player) -> Steps:
         """Handle a possible chain of Just Say No cards.
 
         Returns True if the pending action should be cancelled."""
@@ -422,18 +606,19 @@ class Game:
             attempts = 0
             while not valid and attempts < 3:
                 if attempts:
-                    logger.error(f"Invalid Just Say No action: {reason}. Trying again.")
-                action = current.wants_to_negate(action_chain_str=action_chain_str, target_player_name=other.name, game_state_dict=self.to_json(), game_history=self.game_history)
+                    logger.error("Invalid Just Say No action: %s. Trying again.", reason)
+                action = yield Decision(current, "wants_to_negate", action_chain_str=action_chain_str, target_player_name=other.name,
+                                        game_state_dict=self.to_json(), game_history=self.game_history)
                 valid, reason = self.rules_engine.validate_action(action, current, [other], None)
                 attempts += 1
 
             if not valid:
-                self.add_to_game_history("Skipping Just Say No due to invalid inputs.")
+                self._log(EventType.JUST_SAY_NO_SKIPPED, current.name, other.name)
                 break
             if not action:
                 break
             current.remove_card_from_hand(action.card)
-            self.add_to_game_history(f"{current.name} played Just Say No!")
+            self._log(EventType.JUST_SAY_NO, current.name, other.name, cards=(action.card.card_id,))
             action_chain_str += f"\n{current.name} played Just Say No!"
             jsn_played = True
             current, other = other, current
@@ -444,165 +629,29 @@ class Game:
 class TestPlayer(Player):
     def get_action(self, game_state_dict: dict, game_history: List[str]) -> Optional[Action]:
         """
-        Build a list of every *legal* move the player can make in the current
-        state, then pick one uniformly at random.  
-        Falls back to a PASS action if nothing is available.
+        Pick uniformly at random among the legal moves from RulesEngine.legal_actions.
+        Moving a wild card costs nothing, so all wild card moves together count as a
+        single option, and only while some other move is still available.
+        Falls back to a PASS action if nothing else is legal.
         """
-        valid_actions: list[Action] = []
-
-        # Pre‑compute data that several cards may need
-        property_sets         = self.get_property_sets()
-        my_property_colors    = list(property_sets.keys())
-        other_player_names    = [p["name"] for p in game_state_dict["players"] if p["name"] != self.name]
-        double_the_rent_count = sum(
-            1 for c in self.hand if getattr(c, "get_card_type", lambda: None)() == CardType.ACTION_DOUBLE_THE_RENT
-        )
-        double_the_rent_count = min(double_the_rent_count, ACTIONS_PER_TURN -game_state_dict['actions_played_in_current_turn'] - 1)
-
-        for card in self.hand:
+        valid_actions = []
+        move_actions = []
+        for action in RulesEngine.legal_actions(self, game_state_dict):
+            if action.action_type == ActionType.MOVE_PROPERTY:
+                move_actions.append(action)
+            elif action.action_type != ActionType.PASS:
+                valid_actions.append(action)
 
-            # --- Money ----------------------------------------------------------
-            if isinstance(card, MoneyCard):
-                valid_actions.append(
-                    Action(source_player=self, card=card,
-                        action_type=ActionType.ADD_TO_BANK)
-                )
-
-            # --- Wild property --------------------------------------------------
-            elif isinstance(card, WildPropertyCard):
-                for color in card.available_colors:
-                    valid_actions.append(
-                        Action(source_player=self, card=card,
-                            action_type=ActionType.ADD_TO_PROPERTIES,
-                            target_property_set=color)
-                    )
-
-            # --- Standard property ---------------------------------------------
-            elif isinstance(card, PropertyCard):
-                valid_actions.append(
-                    Action(source_player=self, card=card,
-                        action_type=ActionType.ADD_TO_PROPERTIES)
-                )
-            
-            elif isinstance(card, BuildingCard):
-                full_sets = [(color, property_set) for color, property_set in property_sets.items() if property_set.is_full_set]
-                if full_sets:
-                    if card.building_type == "house":
-                        for color, property_set in full_sets:
-                            if not (property_set.has_house or color in (PropertyColor.RAILROAD, PropertyColor.UTILITY)):
-                                valid_actions.append(
-                                    Action(source_player=self, card=card,
-                                        action_type=ActionType.PLAY_ACTION,
-                                        target_property_set=color)
-                                )
-                    elif card.building_type == "hotel":
-                        for color, property_set in full_sets:
-                            if property_set.has_house and not property_set.has_hotel:
-                                valid_actions.append(
-                                    Action(source_player=self, card=card,
-                                        action_type=ActionType.PLAY_ACTION,
-                                        target_property_set=color)
-                                )
-
-            # --- Rent card ------------------------------------------------------
-            elif isinstance(card, RentCard) and my_property_colors:
-                if not card.is_wild:
-                    # Coloured rent card
-                    for color in my_property_colors:
-                        if color in card.colors:
-                            valid_actions.append(
-                                Action(source_player=self, card=card,
-                                    action_type=ActionType.PLAY_ACTION,
-                                    rent_color=color,
-                                    double_the_rent_count=double_the_rent_count)
-                            )
-                else:
-                    # Wild rent card: can pick any colour + any single opponent
-                    for color in my_property_colors:
-                        for target in other_player_names:
-                            valid_actions.append(
-                                Action(source_player=self, card=card,
-                                    action_type=ActionType.PLAY_ACTION,
-                                    rent_color=color,
-                                    target_player_names=[target],
-                                    double_the_rent_count=double_the_rent_count)
-                            )
-            elif isinstance(card, PassGoCard):
-                valid_actions.append(
-                    Action(source_player=self, card=card,
-                        action_type=ActionType.PLAY_ACTION)
-                )
-            
-            elif isinstance(card, ItsMyBirthdayCard):
-                valid_actions.append(
-                    Action(source_player=self, card=card,
-                        action_type=ActionType.PLAY_ACTION)
-                )
-            
-            elif isinstance(card, DebtCollectorCard):
-                target_player = random.choice(other_player_names)
-                valid_actions.append(
-                    Action(source_player=self, card=card,target_player_names=[target_player],
-                        action_type=ActionType.PLAY_ACTION)
-                )
-            
-            elif isinstance(card, DealBreakerCard):
-                for target_player in game_state_dict['players']:
-                    if target_player['name'] == self.name:
-                        continue
-                    for color, set in target_player['property_sets'].items():
-                        if set['is_full_set']:
-                            valid_actions.append(
-                                Action(source_player=self, card=card,target_player_names=[target_player['name']],
-                                    action_type=ActionType.PLAY_ACTION,
-                                    target_property_set=PropertyColor[color])
-                            )
-            elif isinstance(card, SlyDealCard):
-                for target_player in game_state_dict['players']:
-                    if target_player['name'] == self.name:
-                        continue
-                    for color, set in target_player['property_sets'].items():
-                        if not set['is_full_set']:
-                            property_cards = [c for c in set['cards'] if 'set_color' in c or 'current_color' in c]
-                            card_choice = random.choice(property_cards)
-                            color_key = card_choice.get('set_color') or card_choice.get('current_color')
-                            target_info = ActionPropertyInfo(name=card_choice['name'], prop_color=PropertyColor[color_key])
-                            valid_actions.append(
-                                Action(source_player=self, card=card,target_player_names=[target_player['name']],
-                                    action_type=ActionType.PLAY_ACTION, forced_or_sly_deal_target_property_info=target_info)
-                            )
-            elif isinstance(card, ForcedDealCard):
-                hand_properties = [card for prop_set in self.get_property_sets().values() for card in prop_set.cards if isinstance(card, PropertyCard)]
-                if len(hand_properties) > 0:
-                    source_property = random.choice(hand_properties)
-                    for target_player in game_state_dict['players']:
-                        if target_player['name'] == self.name:
-                            continue
-                        for color, set in target_player['property_sets'].items():
-                            if not set['is_full_set']:
-                                property_cards = [c for c in set['cards'] if 'set_color' in c or 'current_color' in c]
-                                target_property = random.choice(property_cards)
-                                target_color_key = target_property.get('set_color') or target_property.get('current_color')
-                                source_info = ActionPropertyInfo(name=source_property.name, prop_color=source_property.get_color())
-                                target_info = ActionPropertyInfo(name=target_property['name'], prop_color=PropertyColor[target_color_key])
-                                valid_actions.append(
-                                    Action(source_player=self, card=card,target_player_names=[target_player['name']],
-                                        action_type=ActionType.PLAY_ACTION, forced_deal_source_property_info=source_info,
-                                        forced_or_sly_deal_target_property_info=target_info)
-                                )
-
-        # ------------------------------------------------------------------------
-        # Choose and return one action (or PASS if none are legal)
-        # ------------------------------------------------------------------------
         if valid_actions:
-            return random.choice(valid_actions), None
+            if move_actions:
+                valid_actions.append(self.rng.choice(move_actions))
+            return self.rng.choice(valid_actions), None
 
-        # TODO: Test move property action
         return Action(source_player=self, action_type=ActionType.PASS), None
     
     
     def choose_cards_to_discard(self, num_cards_to_discard, game_state_dict, game_history: List[str]) -> List[Card]:
-        cards_to_discard = random.sample(self.hand,num_cards_to_discard)
+        cards_to_discard = self.rng.sample(self.hand,num_cards_to_discard)
         return cards_to_discard
     
     def provide_payment(self, reason: str, amount: int, game_state_dict: dict, game_history: List[str]):
@@ -630,21 +679,21 @@ class TestPlayer(Player):
     
     def wants_to_negate(self, action_chain_str: str, target_player_name: str, game_state_dict: dict, game_history: List[str]) -> Optional[Action]:
         for card in self.hand:
-            if card.get_card_type() == CardType.ACTION_JUST_SAY_NO and random.random() < 0.5:
+            if card.get_card_type() == CardType.ACTION_JUST_SAY_NO and self.rng.random() < 0.5:
                 return Action(action_type=ActionType.PLAY_ACTION, source_player=self, card=card, target_player_names=[target_player_name])
         return None
 
-def setup_logging(log_file_folder: str):
-    os.makedirs(f'logs/{log_file_folder}', exist_ok=True)
-    logging.basicConfig(
-        filename=f'logs/{log_file_folder}/prompts.log',
-        level=logging.INFO,
-        format="%(asctime)s - %(name)s - %(threadName)s - %(levelname)s - %(message)s"
-    ) 
+def setup_logging(log_file_folder: str, prompt_level: Optional[int] = None):
+    """Logs to logs/<log_file_folder>/prompts.log, with each game's records in its own
+    logs/<game_identifier>/prompts.log. See logging_setup.configure_logging."""
+    configure_logging(default_path=f'logs/{log_file_folder}/prompts.log', prompt_level=prompt_level)
 
 if __name__ == "__main__":
     import argparse
     from dealbench.llm import LLMPlayer
+    from dealbench.mcts import MCTSPlayer
+    from dealbench.history import HistoryPolicy
+    from dealbench.response_cache import ResponseCache
 
     parser = argparse.ArgumentParser(description="Run a single DealBench game")
     parser.add_argument(
@@ -652,17 +701,32 @@ if __name__ == "__main__":
         nargs="+",
         dest="models",
         required=True,
-        help="Space separated list of model names. Use 'random' for a TestPlayer.",
+        help="Space separated list of model names. Use 'random' for a TestPlayer and 'mcts' for an MCTSPlayer.",
     )
+    parser.add_argument("--headless", action="store_true", help="Do not write any logs or game history.")
+    parser.add_argument("--history-turns", type=int, default=None,
+                        help="Show LLM players only the last N turns of history verbatim, plus a summary of older turns.")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for a reproducible deal, seating and bot play.")
+    parser.add_argument("--prompt-log-level", default="INFO", choices=["DEBUG", "INFO", "WARNING"],
+                        help="DEBUG also logs full prompt and reasoning text; WARNING switches prompt logging off.")
+    parser.add_argument("--response-cache", default=None, metavar="PATH",
+                        help="Answer repeated LLM requests from this cache file, e.g. logs/llm_cache.sqlite.")
     args = parser.parse_args()
 
+    response_cache = ResponseCache(args.response_cache) if args.response_cache else None
     players = []
     for idx, model in enumerate(args.models, start=1):
         if model.lower() == "random":
             players.append(TestPlayer(name=f"random_{idx}"))
+        elif model.lower() == "mcts":
+            players.append(MCTSPlayer(name=f"mcts_{idx}"))
         else:
-            players.append(LLMPlayer(model_name=model))
-
-    game = Game(players)
-    setup_logging(game.game_identifier)
-    game.run_game()
\ No newline at end of file
+            players.append(LLMPlayer(model_name=model, history_policy=HistoryPolicy(recent_turns=args.history_turns),
+                                     response_cache=response_cache))
+
+    game = Game(players, headless=args.headless, seed=args.seed)
+    if not args.headless:
+        setup_logging(game.game_identifier, prompt_level=getattr(logging, args.prompt_log_level))
+    game.run_game()
+    if response_cache is not None:
+        print(f"Response cache: {response_cache.stats()}")
@@ -0,0 +1,130 @@
+"""How much of the game history goes into an LLM prompt.
+
+The game state is already in every prompt, so older history mostly costs tokens.
+``HistoryPolicy`` keeps the last few turns of an ``EventLog`` verbatim and
+replaces everything before them with a short, deterministic summary built from
+the events: cards played per player, payments between players and every
+property that changed hands.
+"""
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from dealbench.card import CardType
+from dealbench.events import Event, EventLog, EventType
+
+# Payment reasons, as passed to Game._get_money_from, and the card that caused them
+_PAYMENT_CARDS = {"rent": "Rent", "birthday": "It's My Birthday", "debt collection": "Debt Collector"}
+
+_ACTION_EVENTS = {
+    EventType.PASS_GO: "Pass Go",
+    EventType.SLY_DEAL: "Sly Deal",
+    EventType.FORCED_DEAL: "Forced Deal",
+    EventType.DEAL_BREAKER: "Deal Breaker",
+    EventType.JUST_SAY_NO: "Just Say No",
+}
+
+_PROPERTY_TRANSFERS = (EventType.SLY_DEAL, EventType.FORCED_DEAL, EventType.DEAL_BREAKER)
+
+
+class HistoryPolicy:
+    """Selects the history shown in prompts: the last `recent_turns` turns verbatim and,
+    optionally, a summary of the turns before them."""
+
+    def __init__(self, recent_turns: Optional[int] = None, summarize_older: bool = True):
+        """
+        Args:
+            recent_turns: Number of most recent turns (one player's turn each, the current one
+                included) shown verbatim. None shows the whole history.
+            summarize_older: Replace the older turns with a summary instead of dropping them.
+        """
+        if recent_turns is not None and recent_turns < 1:
+            raise ValueError("recent_turns must be at least 1.")
+        self.recent_turns = recent_turns
+        self.summarize_older = summarize_older
+        self._summary_cache: Optional[Tuple[EventLog, Event, List[str]]] = None # (log, last summarized event, lines)
+
+    def apply(self, game_history: Sequence[str]) -> Tuple[List[str], Sequence[str]]:
+        """Returns ``(summary_lines, recent_history)`` for a prompt.
+
+        Plain lists of strings carry no turn information and are passed through whole.
+        """
+        if self.recent_turns is None or not isinstance(game_history, EventLog) or not len(game_history):
+            return [], game_history
+        events = game_history.events
+        first_recent_turn = events[-1].turn - self.recent_turns + 1
+        start = game_history.index_of_turn(first_recent_turn)
+        if not start:
+            return [], game_history
+        recent = game_history[start:]
+        if not self.summarize_older:
+            return [], recent
+
+        cached = self._summary_cache
+        if cached is None or cached[0] is not game_history or cached[1] is not events[start - 1]:
+            cached = self._summary_cache = (game_history, events[start - 1], summarize(game_history, events[:start]))
+        return cached[2], recent
+
+
+def summarize(game_history: EventLog, events: List[Event]) -> List[str]:
+    """Deterministic summary of `events`: one line of cards played per player, one line
+    per payer and payee pair, and one line per property that changed hands."""
+    if not events:
+        return []
+    cards = game_history.cards
+    placed: Counter = Counter()
+    banked: Counter = Counter()
+    banked_value: Counter = Counter()
+    played: Dict[str, Counter] = {}
+    payments: Dict[Tuple[str, str], List[int]] = {}
+    transfers: List[str] = []
+    payment_requests = set()
+    players: List[str] = []
+
+    def seen(name: Optional[str]):
+        if name is not None and name not in players:
+            players.append(name)
+
+    for event in events:
+        event_type = event.type
+        if event_type == EventType.PLAY_ORDER:
+            for name in event.detail.split(", "):
+                seen(name)
+        elif event_type == EventType.BANK:
+            banked[event.actor] += 1
+            banked_value[event.actor] += cards[event.cards[0]].value
+        elif event_type == EventType.ADD_PROPERTY:
+            card = cards[event.cards[0]]
+            if card.get_card_type() == CardType.ACTION_BUILDING:
+                played.setdefault(event.actor, Counter())[card.name] += 1
+            else:
+                placed[event.actor] += 1
+        elif event_type in (EventType.PAYMENT, EventType.PAYMENT_BLOCKED, EventType.PAYMENT_SKIPPED):
+            # One rent card can charge several players; count the card once
+            requester = event.target
+            request = (event.turn, event.action_index, requester, event.detail)
+            if event_type != EventType.PAYMENT_SKIPPED and request not in payment_requests:
+                payment_requests.add(request)
+                played.setdefault(requester, Counter())[_PAYMENT_CARDS.get(event.detail, event.detail)] += 1
+            if event_type == EventType.PAYMENT:
+                payments.setdefault((event.actor, requester), []).append(sum(cards[c].value for c in event.cards))
+                properties = [cards[c].name for c, zone in zip(event.cards, event.zones) if zone == "properties"]
+                if properties:
+                    transfers.append(f"Turn {event.turn}: {event.actor} paid {requester} with properties {', '.join(properties)}.")
+        elif event_type == EventType.ACTION_BLOCKED:
+            played.setdefault(event.target, Counter())[event.detail] += 1
+        if event_type in _ACTION_EVENTS:
+            played.setdefault(event.actor, Counter())[_ACTION_EVENTS[event_type]] += 1
+        if event_type in _PROPERTY_TRANSFERS:
+            transfers.append(f"Turn {event.turn}: {game_history.render(event)}")
+        seen(event.actor)
+
+    lines = [f"Turns {events[0].turn}-{events[-1].turn}, summarized:"]
+    for name in players:
+        parts = [f"placed {placed[name]} properties", f"banked {banked[name]} cards (${banked_value[name]}M)"]
+        if played.get(name):
+            parts.append("played " + ", ".join(f"{card} x{count}" for card, count in sorted(played[name].items())))
+        lines.append(f"{name}: " + "; ".join(parts))
+    for (payer, payee), amounts in payments.items():
+        lines.append(f"{payer} paid {payee} ${sum(amounts)}M in {len(amounts)} payment(s)")
+    lines.extend(transfers)
+    return lines
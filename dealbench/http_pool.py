@@ -0,0 +1,137 @@
+"""Shared keep-alive HTTP sessions for LLM API calls.
+
+Every decision of an LLM player is an HTTPS request, and a game makes hundreds
+of them in sequence. ``SessionPool`` keeps one ``requests.Session`` per endpoint
+(scheme and host) whose connections stay open between calls, so only the first
+call to an endpoint pays the TCP and TLS handshake. The sessions are shared by
+all game threads; ``pool_size`` bounds the open connections per endpoint, and a
+thread that needs one while all are busy waits for the next to be returned.
+Async callers (``Game.arun_game``) get the same from one ``httpx.AsyncClient``
+per endpoint, shared by all games on the event loop.
+"""
+import threading
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+import logging
+logger = logging.getLogger(__name__)
+
+DEFAULT_POOL_SIZE = 6
+# (connect, read) in seconds; reasoning models can take minutes to answer
+DEFAULT_TIMEOUT: Tuple[float, float] = (10.0, 600.0)
+
+
+class SessionPool:
+    """Thread-safe pool of keep-alive sessions, one per endpoint."""
+
+    def __init__(self, pool_size: int = DEFAULT_POOL_SIZE, timeout: Tuple[float, float] = DEFAULT_TIMEOUT):
+        """
+        Args:
+            pool_size: Maximum open connections per endpoint. Set it to the number of
+                games played at once, see ``Tournament``.
+            timeout: (connect, read) timeout in seconds, used when a call gives none.
+        """
+        if pool_size < 1:
+            raise ValueError("pool_size must be at least 1.")
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self._sessions: Dict[str, requests.Session] = {}
+        self._async_clients: Dict[str, httpx.AsyncClient] = {}
+        self._retired_async_clients: List[httpx.AsyncClient] = [] # Replaced by resize, closed by aclose
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _endpoint(url: str) -> str:
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}"
+
+    def _new_session(self, endpoint: str) -> requests.Session:
+        session = requests.Session()
+        # Retries are up to the caller, which knows which failures are safe to repeat
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=0, pool_block=True)
+        session.mount(endpoint + "/", adapter)
+        return session
+
+    def session(self, url: str) -> requests.Session:
+        """The shared session for the endpoint of `url`."""
+        endpoint = self._endpoint(url)
+        with self._lock:
+            session = self._sessions.get(endpoint)
+            if session is None:
+                session = self._sessions[endpoint] = self._new_session(endpoint)
+                logger.info("Opened HTTP session pool for %s (%s connections)", endpoint, self.pool_size)
+            return session
+
+    def post(self, url: str, timeout: Optional[Tuple[float, float]] = None, **kwargs) -> requests.Response:
+        """``requests.post`` over a pooled connection."""
+        return self.session(url).post(url, timeout=timeout or self.timeout, **kwargs)
+
+    # --- Async ---
+
+    def _httpx_timeout(self, timeout: Tuple[float, float]) -> httpx.Timeout:
+        connect, read = timeout
+        return httpx.Timeout(read, connect=connect)
+
+    def async_client(self, url: str) -> httpx.AsyncClient:
+        """The shared async client for the endpoint of `url`."""
+        endpoint = self._endpoint(url)
+        with self._lock:
+            client = self._async_clients.get(endpoint)
+            if client is None:
+                limits = httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size)
+                client = httpx.AsyncClient(limits=limits, timeout=self._httpx_timeout(self.timeout))
+                self._async_clients[endpoint] = client
+                logger.info("Opened async HTTP client for %s (%s connections)", endpoint, self.pool_size)
+            return client
+
+    async def apost(self, url: str, timeout: Optional[Tuple[float, float]] = None, **kwargs) -> httpx.Response:
+        """``post`` for async callers, through httpx."""
+        if timeout is not None:
+            kwargs["timeout"] = self._httpx_timeout(timeout)
+        return await self.async_client(url).post(url, **kwargs)
+
+    async def aclose(self):
+        """Closes the async clients. Their connections belong to the event loop they were
+        opened on, so call this before that loop ends (Tournament does)."""
+        with self._lock:
+            clients = list(self._async_clients.values()) + self._retired_async_clients
+            self._async_clients, self._retired_async_clients = {}, []
+        for client in clients:
+            await client.aclose()
+
+    def resize(self, pool_size: int):
+        """Changes the connections allowed per endpoint. Sessions are reopened on their
+        next use; requests in flight finish on their old connections."""
+        if pool_size < 1:
+            raise ValueError("pool_size must be at least 1.")
+        with self._lock:
+            if pool_size == self.pool_size:
+                return
+            self.pool_size = pool_size
+            sessions, self._sessions = self._sessions, {}
+            self._retired_async_clients.extend(self._async_clients.values())
+            self._async_clients = {}
+        for session in sessions.values():
+            session.close()
+
+    def close(self):
+        with self._lock:
+            sessions, self._sessions = self._sessions, {}
+        for session in sessions.values():
+            session.close()
+
+
+_default_pool: Optional[SessionPool] = None
+_default_pool_lock = threading.Lock()
+
+
+def get_session_pool() -> SessionPool:
+    """The process-wide pool used by LLM players that were not given one."""
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = SessionPool()
+        return _default_pool
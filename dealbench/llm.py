@@ -1,34 +1,56 @@
 import os
 import json
 import re
-import requests
-from typing import List, Dict, Any, Optional, Tuple
+import sqlite3
+from typing import List, Dict, Any, Optional, Sequence, Tuple
 from dotenv import load_dotenv
-from jinja2 import Environment, FileSystemLoader
 from dealbench.player import Player
 from dealbench.action import Action, ActionType, ActionPropertyInfo
 from dealbench.card import Card, PropertyColor, CardType
 from dealbench.deck_config import ACTIONS_PER_TURN
+from dealbench.blobs import BlobStore
+from dealbench.decisions import Steps, run_steps, arun_steps
+from dealbench.disk_io import run_disk_io
+from dealbench.events import EventLog
+from dealbench.history import HistoryPolicy
+from dealbench.http_pool import SessionPool, get_session_pool
+from dealbench.logging_setup import PROMPT_LOGGER_NAME
+from dealbench.messages import build_messages, cached_tokens, user_text
+from dealbench.response_cache import ResponseCache
+from dealbench import templates
 import sys 
-from requests.exceptions import RequestException
+from requests.exceptions import ConnectTimeout, RequestException
+import httpx
+import trio
 import time 
 import logging
 logger = logging.getLogger(__name__)
+prompt_logger = logging.getLogger(PROMPT_LOGGER_NAME)
 
 load_dotenv()
 
 class LLMHandler():
-    def __init__(self, model_name: str):
+    def __init__(self, model_name: str, blob_store: Optional[BlobStore] = None, session_pool: Optional[SessionPool] = None,
+                 response_cache: Optional[ResponseCache] = None):
+        """
+        Args:
+            blob_store: Where prompts and reasoning are stored; records and prompts.log only
+                keep their references. Defaults to a store under logs/blobs.
+            session_pool: Keep-alive HTTP sessions for API calls. Defaults to the pool shared
+                by the whole process, see http_pool.get_session_pool.
+            response_cache: Answers requests that were made before from disk. No caching
+                when None.
+        """
         self.model_name = model_name
+        self.blob_store = blob_store if blob_store is not None else BlobStore()
+        self.session_pool = session_pool if session_pool is not None else get_session_pool()
+        self.response_cache = response_cache
+        self.call_metrics: List[Dict[str, Any]] = [] # One entry per call_llm, see ResultsDB llm_calls
         self.url = "https://openrouter.ai/api/v1/chat/completions"
-        prompts_path = os.path.join(os.path.dirname(__file__), 'prompts')
-        self.template_env = Environment(loader=FileSystemLoader(prompts_path))
+        self.template_env = templates.get_environment() # Shared by all players, see dealbench.templates
 
-    def _extract_json(self, response):
-        if self.model_name.startswith("anthropic"):
-            response = json.loads(response.text.strip())
-        else:
-            response = response.json()
+    def _extract_json(self, response_text: str):
+        response = json.loads(response_text.strip())
         if response.get('choices',[])[0].get('error'):
             raise ValueError(f"{response}")
         text = response['choices'][0]['message']['content']
@@ -39,9 +61,13 @@ class LLMHandler():
             text = text.replace("`","").strip()
         else:
             reasoning = response['choices'][0]['message']['reasoning']
-        logger.info(f"=== LLM REASONING === \n{reasoning}\n===END LLM REASONING===")
-        logger.info(f"=== LLM OUTPUT === \n{text}\n===END LLM OUTPUT===")
-        metadata = {"reasoning": reasoning}
+        reasoning_ref = self.blob_store.put_optional(reasoning)
+        prompt_logger.info("=== LLM REASONING === %s", reasoning_ref)
+        prompt_logger.debug("=== LLM REASONING TEXT === \n%s\n===END LLM REASONING===", reasoning)
+        prompt_logger.info("=== LLM OUTPUT === \n%s\n===END LLM OUTPUT===", text)
+        metadata = {"reasoning_ref": reasoning_ref}
+        if response.get("usage"):
+            metadata["usage"] = response["usage"]
         return json.loads(text), metadata
         # return response
 
@@ -50,6 +76,18 @@ class LLMHandler():
         template = self.template_env.get_template(template_name)
         return template.render(**kwargs)
     
+    def _render_history(self, game_history: Sequence[str], history_summary: Optional[List[str]] = None,
+                        history_split: Optional[int] = None, **_) -> Tuple[str, str]:
+        """The history section of a prompt in two parts that concatenate to the whole: the
+        settled part, up to `history_split` (by default all of it), which later calls repeat
+        as a prefix, and the lines after it, e.g. the turn in progress."""
+        if history_split is None:
+            history_split = len(game_history)
+        settled = self._render_template(templates.HISTORY_TEMPLATE, game_history=game_history[:history_split],
+                                        history_summary=history_summary)
+        current = self._render_template(templates.HISTORY_TEMPLATE, game_history=game_history[history_split:], lines_only=True)
+        return settled, current
+
     def _get_structured_output_format(self, format, **kwargs):
         match format:
             case "action":
@@ -219,25 +257,58 @@ class LLMHandler():
 
     def call_llm(self, template_name: str, response_format: str, **template_kwargs) -> Tuple[Dict[str, Any], Dict[str, Any]]:
         """Call the LLM with a rendered template."""
-        prompt = self._render_template(template_name, **template_kwargs)
-        logger.info(f"===PROMPT=== {template_name} {self.model_name} \n{prompt}\n===END PROMPT===")
+        headers, payload, call = self._prepare_call(template_name, response_format, **template_kwargs)
+        start = time.perf_counter()
+        try:
+            cache_key, response_text = self._cached_response(payload, call)
+            if response_text is None:
+                response_text = self._post_with_retries(headers, payload, call)
+            result, metadata = self._extract_json(response_text)
+            self._cache_response(cache_key, response_text, call)
+        finally:
+            call["latency_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        return self._complete_call(call, result, metadata)
+
+    async def acall_llm(self, template_name: str, response_format: str, **template_kwargs) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """``call_llm`` that awaits the response instead of blocking the thread. The
+        blob store and response cache are used from worker threads, see dealbench.disk_io."""
+        headers, payload, call = await run_disk_io(self._prepare_call, template_name, response_format, **template_kwargs)
+        start = time.perf_counter()
+        try:
+            cache_key, response_text = await run_disk_io(self._cached_response, payload, call)
+            if response_text is None:
+                response_text = await self._apost_with_retries(headers, payload, call)
+            result, metadata = await run_disk_io(self._extract_json, response_text)
+            await run_disk_io(self._cache_response, cache_key, response_text, call)
+        finally:
+            call["latency_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        return self._complete_call(call, result, metadata)
+
+    def _prepare_call(self, template_name: str, response_format: str, **template_kwargs) -> Tuple[Dict[str, str], Dict[str, Any], Dict[str, Any]]:
+        """Headers, payload and metrics entry of one call. A ``game_history`` argument (with
+        ``history_summary`` and ``history_split``) is rendered ahead of the template, see
+        dealbench.messages."""
+        settled_history = current_history = None
+        if "game_history" in template_kwargs:
+            settled_history, current_history = self._render_history(**template_kwargs)
+        messages = build_messages(self.model_name, templates.game_rules(), settled_history, current_history,
+                                  self._render_template(template_name, **template_kwargs))
+        prompt = user_text(messages)
+        prompt_ref = self.blob_store.put(prompt)
+        prompt_logger.info("===PROMPT=== %s %s %s", template_name, self.model_name, prompt_ref)
+        prompt_logger.debug("===PROMPT TEXT=== \n%s\n===END PROMPT===", prompt)
         headers = {
             "Authorization": f"Bearer {os.getenv('OPENROUTER_API_KEY')}",
             "Content-Type": "application/json"
         }
 
-        game_rules = self._render_template("game_rules.j2")
-        system_message = {
-            "role": "system",
-            "content": game_rules,
-        }
-            
         payload = {
             "model": self.model_name,
-            "messages": [system_message, {"role": "user", "content": prompt}],
+            "messages": messages,
             "temperature": 0.0,
             "response_format": self._get_structured_output_format(response_format, **template_kwargs),
             "structured_outputs": True,
+            "usage": {"include": True}, # Adds cached prompt tokens to the response's usage
             # "thinking": {
             #     "type": "enabled",
             #     "budget_tokens": 500
@@ -249,28 +320,75 @@ class LLMHandler():
                 "type": "enabled",
                 # "budget_tokens": 10000
             }
+        call = {
+            "model": self.model_name,
+            "template": template_name,
+            "started_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "latency_ms": None,
+            "attempts": 0,
+            "success": 0,
+            "prompt_tokens": None,
+            "completion_tokens": None,
+            "cached_tokens": None,
+            "prompt_ref": prompt_ref,
+            "cached": 0,
+        }
+        self.call_metrics.append(call)
+        return headers, payload, call
+
+    def _cached_response(self, payload: Dict[str, Any], call: Dict[str, Any]) -> Tuple[Optional[str], Optional[str]]:
+        """(cache key, cached response body) of a request; both None without a cache."""
+        if self.response_cache is None:
+            return None, None
+        cache_key = self.response_cache.key(payload)
+        response_text = self.response_cache.get(cache_key)
+        call["cached"] = int(response_text is not None)
+        return cache_key, response_text
+
+    def _cache_response(self, cache_key: Optional[str], response_text: str, call: Dict[str, Any]):
+        """Stores a response that parsed, unless it came from the cache."""
+        if cache_key is None or call["cached"]:
+            return
+        try:
+            self.response_cache.put(cache_key, response_text, self.model_name)
+        except sqlite3.Error as e:
+            logger.error("Could not cache a response of %s: %s", self.model_name, e)
+
+    def _complete_call(self, call: Dict[str, Any], result: Dict[str, Any], metadata: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        metadata["prompt_ref"] = call["prompt_ref"]
+        usage = metadata.get("usage", {})
+        call.update(success=1, prompt_tokens=usage.get("prompt_tokens"), completion_tokens=usage.get("completion_tokens"),
+                    cached_tokens=cached_tokens(usage))
+        return result, metadata
+
+    def _post_with_retries(self, headers: Dict[str, str], payload: Dict[str, Any], call: Dict[str, Any]) -> str:
+        """The body of a successful response to `payload`."""
         max_retries = 3          # total attempts = 1 original + 2 retries
         backoff_base = 1.0       # seconds; grows exponentially
 
         for attempt in range(1, max_retries + 1):
+            call["attempts"] = attempt
             try:
-                response = requests.post(self.url, headers=headers, data=json.dumps(payload))
+                response = self.session_pool.post(self.url, headers=headers, data=json.dumps(payload))
                 # If the status isn’t 500, raise_for_status() will do the right thing
                 if response.status_code != 500:
                     response.raise_for_status()
                     # print(f"Response status: {response.status_code}")
                     # print(f"Response headers: {response.headers}")
                     # print(f"Response content: {response.text}")
-                    return self._extract_json(response)
+                    return response.text
 
                 # We got a 500 – decide whether to retry.
-                logger.error(f"Attempt {attempt}: received 500 from server.")
+                logger.error("Attempt %s: received 500 from server.", attempt)
                 if attempt == max_retries:
                     response.raise_for_status()   # will raise HTTPError
             except RequestException as err:
                 # Covers network errors as well as HTTPError from raise_for_status()
-                # Only retry on the specific 500 case handled above; otherwise bubble up.
-                if not getattr(err.response, "status_code", None) == 500:
+                # Only retry on the specific 500 case handled above, or when the connection
+                # could not be opened and nothing was sent; otherwise bubble up.
+                if isinstance(err, ConnectTimeout) and attempt < max_retries:
+                    logger.error("Attempt %s: timed out connecting to %s.", attempt, self.url)
+                elif not getattr(err.response, "status_code", None) == 500:
                     raise
 
             # Exponential back-off before the next retry
@@ -279,13 +397,58 @@ class LLMHandler():
         
         raise RuntimeError("call_llm: exhausted retries and still receiving HTTP 500s")
 
+    async def _apost_with_retries(self, headers: Dict[str, str], payload: Dict[str, Any], call: Dict[str, Any]) -> str:
+        """``_post_with_retries`` over the pool's async client."""
+        max_retries = 3
+        backoff_base = 1.0
+
+        for attempt in range(1, max_retries + 1):
+            call["attempts"] = attempt
+            try:
+                response = await self.session_pool.apost(self.url, headers=headers, content=json.dumps(payload))
+                if response.status_code != 500:
+                    response.raise_for_status()
+                    return response.text
+
+                logger.error("Attempt %s: received 500 from server.", attempt)
+                if attempt == max_retries:
+                    response.raise_for_status()
+            except httpx.HTTPError as err:
+                if isinstance(err, httpx.ConnectTimeout) and attempt < max_retries:
+                    logger.error("Attempt %s: timed out connecting to %s.", attempt, self.url)
+                elif not (isinstance(err, httpx.HTTPStatusError) and err.response.status_code == 500):
+                    raise
+
+            await trio.sleep(backoff_base * (2 ** (attempt - 1)))
+
+        raise RuntimeError("acall_llm: exhausted retries and still receiving HTTP 500s")
+
 
 
 class LLMPlayer(Player, LLMHandler):
-    def __init__(self, model_name: str):
+    def __init__(self, model_name: str, history_policy: Optional[HistoryPolicy] = None, blob_store: Optional[BlobStore] = None,
+                 session_pool: Optional[SessionPool] = None, response_cache: Optional[ResponseCache] = None):
+        """
+        Args:
+            history_policy: How much game history goes into prompts. Defaults to the whole history.
+            blob_store: See LLMHandler.
+            session_pool: See LLMHandler.
+            response_cache: See LLMHandler.
+        """
         Player.__init__(self, name=model_name)
-        LLMHandler.__init__(self, model_name)
+        LLMHandler.__init__(self, model_name, blob_store, session_pool, response_cache)
         self.model_name = model_name
+        self.history_policy = history_policy if history_policy is not None else HistoryPolicy()
+
+    def _history_kwargs(self, game_history: List[str]) -> Dict[str, Any]:
+        """Template arguments for the history section of a prompt."""
+        summary, recent = self.history_policy.apply(game_history)
+        history_split = len(recent)
+        if isinstance(game_history, EventLog) and len(game_history):
+            # The turn in progress is the only part that changes before the next turn starts
+            current_turn_start = game_history.index_of_turn(game_history.events[-1].turn)
+            history_split = max(current_turn_start - (len(game_history) - len(recent)), 0)
+        return {"game_history": recent, "history_summary": summary, "history_split": history_split}
 
     @staticmethod
     def convert_to_none(string):
@@ -322,14 +485,11 @@ class LLMPlayer(Player, LLMHandler):
             if not card_name:
                 raise ValueError("'card_name' required for non-PASS actions")
             if action_type == ActionType.MOVE_PROPERTY:
-                for pset in self.property_sets.values():
-                    if pset.has_card(card_name):
-                        card = pset.get_card(card_name)
-                        break
+                card = self.find_card(card_name, "properties")
                 if not card:
                     raise ValueError(f"Card {card_name} not found in properties")
             else:
-                card = next((c for c in self.hand if c.name == card_name), None)
+                card = self.find_card(card_name, "hand")
             if not card:
                 raise ValueError(f"Card {card_name} not found in hand")
 
@@ -364,15 +524,32 @@ class LLMPlayer(Player, LLMHandler):
             forced_or_sly_deal_target_property_info=build_info(response.get('forced_or_sly_deal_target_property_info'))
         )
     
+    # --- Decisions ---
+    # Each decision is a generator that yields one LLM request, (template_name,
+    # response_format, template_kwargs), and gets back call_llm's result. The blocking
+    # methods answer it with call_llm, the async ones (used by Game.arun_game) with
+    # acall_llm; see dealbench.decisions.
+
+    def _request(self, request: Tuple[str, str, Dict[str, Any]]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        template_name, response_format, template_kwargs = request
+        return self.call_llm(template_name, response_format, **template_kwargs)
+
+    async def _arequest(self, request: Tuple[str, str, Dict[str, Any]]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        template_name, response_format, template_kwargs = request
+        return await self.acall_llm(template_name, response_format, **template_kwargs)
+
     def get_action(self, game_state_dict: dict, game_history: List[str]) -> Optional[Action]:
         """Get the next action from the LLM."""
-        response, metadata = self.call_llm(
+        return run_steps(self._get_action_steps(game_state_dict, game_history), self._request)
+
+    async def aget_action(self, game_state_dict: dict, game_history: List[str]) -> Optional[Action]:
+        return await arun_steps(self._get_action_steps(game_state_dict, game_history), self._arequest)
+
+    def _get_action_steps(self, game_state_dict: dict, game_history: List[str]) -> Steps:
+        response, metadata = yield (
             'get_action_prompt.j2',
-            response_format="action",
-            player=self,
-            game_state=game_state_dict,
-            actions_per_turn=ACTIONS_PER_TURN,
-            game_history=game_history
+            "action",
+            dict(player=self, game_state=game_state_dict, actions_per_turn=ACTIONS_PER_TURN, **self._history_kwargs(game_history))
         )
 
         if not isinstance(response, dict):
@@ -384,23 +561,22 @@ class LLMPlayer(Player, LLMHandler):
 
     def choose_cards_to_discard(self, num_cards_to_discard: int, game_state_dict: dict, game_history: List[str]) -> List[Card]:
         """Choose cards to discard using the LLM."""
-        response, _ = self.call_llm(
+        return run_steps(self._discard_steps(num_cards_to_discard, game_state_dict, game_history), self._request)
+
+    async def achoose_cards_to_discard(self, num_cards_to_discard: int, game_state_dict: dict, game_history: List[str]) -> List[Card]:
+        return await arun_steps(self._discard_steps(num_cards_to_discard, game_state_dict, game_history), self._arequest)
+
+    def _discard_steps(self, num_cards_to_discard: int, game_state_dict: dict, game_history: List[str]) -> Steps:
+        response, _ = yield (
             'choose_cards_to_discard_prompt.j2',
-            response_format="discard",
-            player=self,
-            game_state=game_state_dict,
-            num_cards_to_discard=num_cards_to_discard,
-            actions_per_turn=ACTIONS_PER_TURN,
-            game_history=game_history
+            "discard",
+            dict(player=self, game_state=game_state_dict, num_cards_to_discard=num_cards_to_discard,
+                 actions_per_turn=ACTIONS_PER_TURN, **self._history_kwargs(game_history))
         )
         
         discarded_cards = []
         for card_name in response['card_names']:
-            card = None
-            for c in self.hand:
-                if c.name == card_name and c not in discarded_cards:
-                    card = c
-                    break
+            card = next((c for c in self.find_cards(card_name, "hand") if c not in discarded_cards), None)
             if card:
                 discarded_cards.append(card)
                     
@@ -408,16 +584,18 @@ class LLMPlayer(Player, LLMHandler):
 
     def provide_payment(self, reason: str, amount: int, game_state_dict: dict, game_history: List[str]) -> List:
         """Provide payment using the LLM to choose which cards to use, returning (Card, source) tuples."""
+        return run_steps(self._payment_steps(reason, amount, game_state_dict, game_history), self._request)
+
+    async def aprovide_payment(self, reason: str, amount: int, game_state_dict: dict, game_history: List[str]) -> List:
+        return await arun_steps(self._payment_steps(reason, amount, game_state_dict, game_history), self._arequest)
+
+    def _payment_steps(self, reason: str, amount: int, game_state_dict: dict, game_history: List[str]) -> Steps:
         try:
-            response, _ = self.call_llm(
+            response, _ = yield (
                 'provide_payment_prompt.j2',
-                response_format="payment",
-                player=self,
-                reason=reason,
-                amount=amount,
-                game_state=game_state_dict,
-                actions_per_turn=ACTIONS_PER_TURN,
-                game_history=game_history
+                "payment",
+                dict(player=self, reason=reason, amount=amount, game_state=game_state_dict,
+                     actions_per_turn=ACTIONS_PER_TURN, **self._history_kwargs(game_history))
             )
             
             payment_cards = []
@@ -426,47 +604,38 @@ class LLMPlayer(Player, LLMHandler):
                 card_name = item['card_name']
                 source = item['source']
                 card = None
-                if source == "bank":
-                    for c in self.bank:
-                        if c.name == card_name and c not in taken:
-                            card = c 
-                            taken.add(c)
-                            break
-                elif source == "properties":
-                    # Search all property sets
-                    for prop_set in self.property_sets.values():
-                        for c in prop_set.cards:
-                            if c.name == card_name and c not in taken:
-                                card = c
-                                taken.add(c)
-                                break
-                        if card:
-                            break
+                if source in ("bank", "properties"):
+                    card = next((c for c in self.find_cards(card_name, source) if c not in taken), None)
+                    if card:
+                        taken.add(card)
                 if card:
                     payment_cards.append((card, source))
                 else:
-                    logger.error(f"Warning: Card '{card_name}' with source '{source}' not found in player's {source}.")
+                    logger.error("Warning: Card '%s' with source '%s' not found in player's %s.", card_name, source, source)
             return payment_cards
         except Exception as e:
-            logger.error(f"Exception. Error in provide_payment: {e}")
+            logger.error("Exception. Error in provide_payment: %s", e)
             return None
 
     def wants_to_negate(self, action_chain_str: str, target_player_name: str, game_state_dict: dict, game_history: List[str]) -> bool:
         """Determine if the player wants to negate an action with a Just Say No card."""
+        return run_steps(self._negate_steps(action_chain_str, target_player_name, game_state_dict, game_history), self._request)
+
+    async def awants_to_negate(self, action_chain_str: str, target_player_name: str, game_state_dict: dict, game_history: List[str]) -> bool:
+        return await arun_steps(self._negate_steps(action_chain_str, target_player_name, game_state_dict, game_history), self._arequest)
+
+    def _negate_steps(self, action_chain_str: str, target_player_name: str, game_state_dict: dict, game_history: List[str]) -> Steps:
         # Check if we have a Just Say No card
         just_say_no_cards = [c for c in self.hand if c.get_card_type() == CardType.ACTION_JUST_SAY_NO]
         if not len(just_say_no_cards):
             return None
             
         try:
-            response, _ = self.call_llm(
+            response, _ = yield (
                 'wants_to_negate_prompt.j2',
-                response_format="negate",
-                player=self,
-                action_chain_str=action_chain_str,
-                game_state=game_state_dict,
-                actions_per_turn=ACTIONS_PER_TURN,
-                game_history=game_history
+                "negate",
+                dict(player=self, action_chain_str=action_chain_str, game_state=game_state_dict,
+                     actions_per_turn=ACTIONS_PER_TURN, **self._history_kwargs(game_history))
             )
             
             if response.get('negate', False):
@@ -475,7 +644,7 @@ class LLMPlayer(Player, LLMHandler):
             return None
             
         except Exception as e:
-            logger.error(f"Error in wants_to_negate: {e}")
+            logger.error("Error in wants_to_negate: %s", e)
             return None
 
 qwen3_235b = LLMPlayer(model_name="qwen/qwen3-235b-a22b:free")
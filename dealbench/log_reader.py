@@ -0,0 +1,258 @@
+"""Reads the records a Game saved, whatever sink wrote them.
+
+A game log is either a ``game.jsonl`` file written by ``JsonlFileSink`` or a
+directory in the original layout of one JSON file per record, as written by
+``DirectoryFileSink``. A game.jsonl file holds one line per record: keyframes,
+``{"name": ..., "record": {...}}``, and in between deltas from the previous
+record, ``{"name": ..., "delta": {...}}`` (see ``dealbench.delta``). Both layouts
+read back as ``(name, record)`` pairs in the order they were written, either
+streamed with ``iter_game_log`` or with random access through ``GameLog``.
+"""
+import glob
+import io
+import json
+import os
+import re
+from bisect import bisect_right
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Sequence, Tuple, Union, overload
+
+from dealbench.delta import patch
+from dealbench.sinks import GAME_LOG_FILE_NAME, RESULT_RECORD_NAME
+import logging
+logger = logging.getLogger(__name__)
+
+_STEP_FILE_PATTERN = re.compile(r"turn-(\d+)_actions-(\d+)\.json$")
+
+# The start of every game.jsonl line, so that indexing a log does not parse whole records
+_LINE_PREFIX_PATTERN = re.compile(rb'\{"name":("(?:[^"\\]|\\.)*"),"(record|delta)":')
+
+# Bytes read at a time when scanning a game.jsonl file backwards for its summary line
+_TAIL_BLOCK_SIZE = 1 << 16
+
+
+def _jsonl_path(path: str) -> Optional[str]:
+    """The game.jsonl file for `path`, which may be the file itself or its game directory."""
+    if os.path.isfile(path):
+        return path
+    candidate = os.path.join(path, GAME_LOG_FILE_NAME)
+    return candidate if os.path.isfile(candidate) else None
+
+
+def _step_sort_key(file_path: str) -> Tuple[int, int]:
+    match = _STEP_FILE_PATTERN.search(file_path)
+    return (int(match.group(1)), int(match.group(2))) if match else (-1, -1)
+
+
+def _legacy_files(directory: str) -> List[str]:
+    if not os.path.isdir(directory):
+        raise ValueError(f"No game log found at {directory}.")
+    files = sorted(glob.glob(os.path.join(directory, "turn-*_actions-*.json")), key=_step_sort_key)
+    result_path = os.path.join(directory, RESULT_RECORD_NAME)
+    if os.path.isfile(result_path):
+        files.append(result_path)
+    return files
+
+
+def _apply_entry(previous: Optional[Dict[str, Any]], entry: Dict[str, Any]) -> Dict[str, Any]:
+    if "record" in entry:
+        return entry["record"]
+    if previous is None:
+        raise ValueError(f"Delta record {entry['name']} has no keyframe before it.")
+    return patch(previous, entry["delta"])
+
+
+def iter_game_log(path: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Yields the ``(name, record)`` pairs of one game in the order they were written.
+
+    Records share unchanged parts with the records before them and must not be modified.
+
+    Args:
+        path: A game.jsonl file, or a game log directory in either layout.
+    """
+    jsonl_path = _jsonl_path(path)
+    if jsonl_path is None:
+        for file_path in _legacy_files(path):
+            with open(file_path) as f:
+                yield os.path.basename(file_path), json.load(f)
+        return
+
+    record = None
+    with open(jsonl_path) as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                # A crash can leave a partial last line behind
+                logger.warning("Skipping unreadable line %s of %s.", line_number, jsonl_path)
+                continue
+            record = _apply_entry(record, entry)
+            yield entry["name"], record
+
+
+class GameLog(Sequence[Tuple[str, Dict[str, Any]]]):
+    """Random access to the ``(name, record)`` pairs of one game.
+
+    Opening a game.jsonl log indexes the byte offset of every line without parsing
+    the records. Reading a record seeks to the nearest keyframe at or before it (or
+    the last record read, if that is closer) and applies the deltas from there, so
+    any step costs at most one keyframe interval of lines and stepping forward
+    costs one line. Returned records must not be modified.
+    """
+
+    def __init__(self, path: str, data: Optional[bytes] = None):
+        """
+        Args:
+            path: A game.jsonl file, or a game log directory in either layout.
+            data: The contents of a game.jsonl log held in memory, e.g. read from a
+                ``GameArchive``. `path` then only names the log.
+        """
+        self.path = path
+        self._data = data
+        self._jsonl_path = path if data is not None else _jsonl_path(path)
+        self._names: List[str] = []
+        self._offsets: List[int] = []
+        self._keyframes: List[int] = []  # indexes of keyframe lines
+        self._files: List[str] = []
+        self._cached: Optional[Tuple[int, Dict[str, Any]]] = None  # last (index, record) read
+        if self._jsonl_path is None:
+            self._files = _legacy_files(path)
+            self._names = [os.path.basename(file_path) for file_path in self._files]
+        else:
+            self._index()
+
+    def _open(self) -> BinaryIO:
+        return io.BytesIO(self._data) if self._data is not None else open(self._jsonl_path, "rb")
+
+    def _index(self):
+        with self._open() as f:
+            offset = 0
+            for line in f:
+                line_offset, offset = offset, offset + len(line)
+                if not line.endswith(b"\n"):
+                    logger.warning("Skipping partial last line of %s.", self._jsonl_path)
+                    break
+                match = _LINE_PREFIX_PATTERN.match(line)
+                if match is not None:
+                    name, kind = json.loads(match.group(1)), match.group(2).decode()
+                elif line.strip():
+                    entry = json.loads(line)
+                    name, kind = entry["name"], "record" if "record" in entry else "delta"
+                else:
+                    continue
+                if kind == "record":
+                    self._keyframes.append(len(self._names))
+                self._names.append(name)
+                self._offsets.append(line_offset)
+
+    @property
+    def names(self) -> List[str]:
+        """Record names in order. Must not be modified."""
+        return self._names
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    @overload
+    def __getitem__(self, index: int) -> Tuple[str, Dict[str, Any]]: ...
+    @overload
+    def __getitem__(self, index: slice) -> List[Tuple[str, Dict[str, Any]]]: ...
+    def __getitem__(self, index: Union[int, slice]) -> Union[Tuple[str, Dict[str, Any]], List[Tuple[str, Dict[str, Any]]]]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("record index out of range")
+        return self._names[index], self.record(index)
+
+    def record(self, index: int) -> Dict[str, Any]:
+        """The record at `index`, reconstructed from the nearest keyframe."""
+        if self._jsonl_path is None:
+            with open(self._files[index]) as f:
+                return json.load(f)
+
+        position = bisect_right(self._keyframes, index) - 1
+        if position < 0:
+            raise ValueError(f"Record {index} of {self._jsonl_path} has no keyframe before it.")
+        start, record = self._keyframes[position], None
+        cached = self._cached
+        if cached is not None and start <= cached[0] <= index:
+            start, record = cached[0] + 1, cached[1]
+
+        with self._open() as f:
+            f.seek(self._offsets[start] if start < len(self._offsets) else 0)
+            for _ in range(start, index + 1):
+                record = _apply_entry(record, json.loads(f.readline()))
+        self._cached = (index, record)
+        return record
+
+
+def read_game_log(path: str) -> List[Tuple[str, Dict[str, Any]]]:
+    """All ``(name, record)`` pairs of one game, see ``iter_game_log``."""
+    return list(iter_game_log(path))
+
+
+def _last_line(file_path: str) -> Optional[bytes]:
+    """The last non-empty line of a file, read backwards from its end."""
+    with open(file_path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        tail = b""
+        while position > 0:
+            read_size = min(_TAIL_BLOCK_SIZE, position)
+            position -= read_size
+            f.seek(position)
+            tail = f.read(read_size) + tail
+            stripped = tail.rstrip(b"\n")
+            newline = stripped.rfind(b"\n")
+            if newline >= 0:
+                return stripped[newline + 1:]
+        stripped = tail.rstrip(b"\n")
+        return stripped or None
+
+
+def read_result(path: str) -> Optional[Dict[str, Any]]:
+    """The final summary record of one game, or None if the game did not finish.
+
+    Only the end of a game.jsonl file is read.
+    """
+    jsonl_path = _jsonl_path(path)
+    if jsonl_path is None:
+        result_path = os.path.join(path, RESULT_RECORD_NAME)
+        if not os.path.isfile(result_path):
+            return None
+        with open(result_path) as f:
+            return json.load(f)
+
+    line = _last_line(jsonl_path)
+    if line is None:
+        return None
+    try:
+        entry = json.loads(line)
+    except json.JSONDecodeError:
+        return None
+    return entry["record"] if entry.get("name") == RESULT_RECORD_NAME else None
+
+
+def find_game_logs(logs_dir: str) -> List[str]:
+    """Every game log under `logs_dir`: game.jsonl files, and directories of the old
+    layout holding a result.json or step files without a game.jsonl."""
+    game_logs = set()
+    for root, _, files in os.walk(logs_dir):
+        if GAME_LOG_FILE_NAME in files:
+            game_logs.add(os.path.join(root, GAME_LOG_FILE_NAME))
+        elif RESULT_RECORD_NAME in files or any(_STEP_FILE_PATTERN.search(name) for name in files):
+            game_logs.add(root)
+    return sorted(game_logs)
+
+
+def load_results(logs_dir: str) -> List[Dict[str, Any]]:
+    """The summary records of every finished game under `logs_dir`."""
+    results = []
+    for game_log in find_game_logs(logs_dir):
+        result = read_result(game_log)
+        if result is not None:
+            results.append(result)
+    return results
@@ -0,0 +1,148 @@
+"""Process-wide logging that keeps concurrent games apart.
+
+``configure_logging`` puts a single ``QueueHandler`` on the root logger. Logging
+calls only append the record to an in-memory queue, and a ``QueueListener``
+thread does all formatting and file I/O, so game threads never wait on a file
+handler's lock. Records are tagged with the game they were logged in (see
+``game_logging``) and the listener writes them to that game's
+``logs/<game_identifier>/prompts.log``; everything else goes to the default log
+file.
+
+LLM traffic is logged on the ``dealbench.prompts`` logger: at INFO it records
+template, model, blob references and the model's output, and at DEBUG also the
+full prompt and reasoning text. Set its level with ``prompt_level`` (e.g.
+``logging.WARNING`` to switch prompt logging off).
+"""
+import atexit
+import contextvars
+import logging
+import logging.handlers
+import os
+import queue
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+PROMPT_LOGGER_NAME = "dealbench.prompts"
+LOG_FORMAT = "%(asctime)s - %(name)s - %(threadName)s - %(levelname)s - %(message)s"
+GAME_LOG_NAME = "prompts.log"
+
+# Identifier of the game whose thread is logging, if any
+current_game: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("dealbench_game", default=None)
+
+
+@contextmanager
+def game_logging(game_identifier: str) -> Iterator[None]:
+    """Routes records logged in this context to the game's own log file."""
+    token = current_game.set(game_identifier)
+    try:
+        yield
+    finally:
+        current_game.reset(token)
+
+
+class _GameQueueHandler(logging.handlers.QueueHandler):
+    """Enqueues records untouched apart from the game tag. Messages are formatted on
+    the listener thread, so logging arguments must not be mutated after the call."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.dealbench_game = current_game.get()
+        return record
+
+
+class GameFileRouter(logging.Handler):
+    """Writes each record to the log file of its game, or to the default file.
+
+    Runs on the listener thread only. At most `max_open_files` game files are kept
+    open; the least recently used is closed and reopened for appending if needed.
+    """
+
+    def __init__(self, log_dir: str, default_path: Optional[str], max_open_files: int = 32):
+        super().__init__()
+        self.log_dir = log_dir
+        self.default_path = default_path
+        self.max_open_files = max_open_files
+        self._handlers: "OrderedDict[Optional[str], logging.Handler]" = OrderedDict()
+
+    def _handler(self, game: Optional[str]) -> Optional[logging.Handler]:
+        handler = self._handlers.get(game)
+        if handler is not None:
+            self._handlers.move_to_end(game)
+            return handler
+        path = os.path.join(self.log_dir, game, GAME_LOG_NAME) if game is not None else self.default_path
+        if path is None:
+            return None
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        handler = logging.FileHandler(path, delay=False)
+        handler.setFormatter(self.formatter)
+        self._handlers[game] = handler
+        if len(self._handlers) > self.max_open_files:
+            _, oldest = self._handlers.popitem(last=False)
+            oldest.close()
+        return handler
+
+    def emit(self, record: logging.LogRecord):
+        handler = self._handler(getattr(record, "dealbench_game", None))
+        if handler is not None:
+            handler.handle(record)
+
+    def set_default_path(self, default_path: Optional[str]):
+        handler = self._handlers.pop(None, None)
+        if handler is not None:
+            handler.close()
+        self.default_path = default_path
+
+    def close(self):
+        for handler in self._handlers.values():
+            handler.close()
+        self._handlers.clear()
+        super().close()
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_router: Optional[GameFileRouter] = None
+_queue_handler: Optional[_GameQueueHandler] = None
+
+
+def configure_logging(default_path: Optional[str] = None, log_dir: str = "logs", level: int = logging.INFO,
+                      prompt_level: Optional[int] = None):
+    """Sets up queue-based, per-game logging for this process. Calling it again updates
+    the default file and the levels.
+
+    Args:
+        default_path: File for records not logged inside a game, or None to drop them.
+        log_dir: Directory holding one folder per game.
+        level: Level of the root logger.
+        prompt_level: Level of the dealbench.prompts logger, left as it is when None. DEBUG
+            adds full prompt and reasoning text; WARNING or above switches prompt logging off.
+    """
+    global _listener, _router, _queue_handler
+    root = logging.getLogger()
+    root.setLevel(level)
+    if prompt_level is not None:
+        logging.getLogger(PROMPT_LOGGER_NAME).setLevel(prompt_level)
+    if _listener is not None:
+        _listener.stop()
+        _router.set_default_path(default_path)
+        _router.log_dir = log_dir
+    else:
+        _router = GameFileRouter(log_dir, default_path)
+        _router.setFormatter(logging.Formatter(LOG_FORMAT))
+        _queue_handler = _GameQueueHandler(queue.SimpleQueue())
+        root.addHandler(_queue_handler)
+        atexit.register(shutdown_logging)
+    _listener = logging.handlers.QueueListener(_queue_handler.queue, _router)
+    _listener.start()
+
+
+def shutdown_logging():
+    """Writes out every queued record and closes the log files."""
+    global _listener, _router, _queue_handler
+    if _listener is None:
+        return
+    _listener.stop()
+    logging.getLogger().removeHandler(_queue_handler)
+    _router.close()
+    _listener = _router = _queue_handler = None
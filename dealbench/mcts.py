@@ -0,0 +1,291 @@
+"""Monte Carlo tree search player.
+
+``MCTSPlayer`` is a free, CPU-only reference opponent. For every decision of its
+action phase it runs information-set MCTS: each iteration samples a
+determinization of the hidden information (opponent hands and deck order,
+consistent with ``Game.to_json()`` and its own cards), walks a tree of its own
+moves for the rest of the turn and finishes with a short rollout through
+``fast_engine``, scoring the result with ``fast_engine.evaluate``. Statistics
+are shared across determinizations and a move's exploration term uses the
+number of times it was available rather than its parent's visits.
+
+Payments, discards and Just Say No decisions are made with simple heuristics.
+"""
+import math
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from dealbench.action import Action, ActionType
+from dealbench.card import Card, CardType, PropertyCard, WildPropertyCard
+from dealbench.catalog import get_default_catalog
+from dealbench.compact_state import CardTable, CompactState, COLOR_INDEX
+from dealbench import fast_engine
+from dealbench.fast_engine import (
+    MOVE_PASS, MOVE_BANK, MOVE_PROPERTY, MOVE_WILD, MOVE_RENT, MOVE_BUILDING, MOVE_PASS_GO,
+    MOVE_BIRTHDAY, MOVE_DEBT, MOVE_DEAL_BREAKER, MOVE_SLY_DEAL, MOVE_FORCED_DEAL,
+)
+from dealbench.player import Player
+from dealbench.rules_engine import RulesEngine
+import logging
+logger = logging.getLogger(__name__)
+
+# Wild card moves are free, so they are capped to keep a turn finite
+MAX_WILD_MOVES_PER_TURN = 2
+
+_CARD_KINDS = {
+    CardType.ACTION_RENT: MOVE_RENT,
+    CardType.ACTION_BUILDING: MOVE_BUILDING,
+    CardType.ACTION_PASS_GO: MOVE_PASS_GO,
+    CardType.ACTION_BIRTHDAY: MOVE_BIRTHDAY,
+    CardType.ACTION_DEBT_COLLECTOR: MOVE_DEBT,
+    CardType.ACTION_DEAL_BREAKER: MOVE_DEAL_BREAKER,
+    CardType.ACTION_SLY_DEAL: MOVE_SLY_DEAL,
+    CardType.ACTION_FORCED_DEAL: MOVE_FORCED_DEAL,
+}
+
+
+class _Node:
+    __slots__ = ("children", "visits", "total", "available")
+
+    def __init__(self):
+        self.children: Dict[tuple, "_Node"] = {}
+        self.visits = 0
+        self.total = 0.0
+        self.available = 0
+
+
+class MCTSPlayer(Player):
+    """Player that picks actions by determinized Monte Carlo tree search."""
+
+    blocking_decisions = True # Searches for up to `time_limit`, see Player.aget_action
+
+    def __init__(self, name: str = "mcts", iterations: Optional[int] = 1000, time_limit: Optional[float] = None,
+                 rollout_turns: int = 4, exploration: float = 0.7):
+        """
+        Args:
+            iterations: Search iterations per decision, or None for no limit.
+            time_limit: Seconds of search per decision, or None for no limit.
+            rollout_turns: Turns each rollout plays past the current one before it is scored.
+            exploration: UCB exploration constant (values are in [0, 1]).
+        """
+        super().__init__(name)
+        if iterations is None and time_limit is None:
+            raise ValueError("MCTSPlayer needs an iteration or time budget.")
+        self.iterations = iterations
+        self.time_limit = time_limit
+        self.rollout_turns = rollout_turns
+        self.exploration = exploration
+        self._table: Optional[CardTable] = None
+        self._wild_moves_turn: Optional[int] = None
+        self._wild_moves = 0
+
+    def _card_table(self) -> CardTable:
+        if self._table is None:
+            cards = list(get_default_catalog().cards)
+            for card in self.hand + self.bank:
+                if cards[card.card_id] is not card:
+                    raise ValueError(f"MCTSPlayer only supports games dealt from the default card catalog ({card}).")
+            self._table = CardTable(cards)
+        return self._table
+
+    # --- Actions ---
+
+    def get_action(self, game_state_dict: dict, game_history: List[str]) -> Tuple[Action, Optional[Dict[str, Any]]]:
+        turn = game_state_dict["turns_completed_in_game"]
+        if turn != self._wild_moves_turn:
+            self._wild_moves_turn, self._wild_moves = turn, 0
+
+        names = [player_json["name"] for player_json in game_state_dict["players"]]
+        candidates: Dict[tuple, Action] = {}
+        for action in RulesEngine.legal_actions(self, game_state_dict):
+            if action.action_type == ActionType.MOVE_PROPERTY and self._wild_moves >= MAX_WILD_MOVES_PER_TURN:
+                continue
+            candidates.setdefault(self.action_key(action, names), action)
+        if len(candidates) == 1:
+            return next(iter(candidates.values())), None
+
+        key, stats = self._search(game_state_dict, set(candidates))
+        action = candidates.get(key)
+        if action is None:
+            logger.warning("%s: search returned %s, which is not a legal action. Picking at random.", self.name, key)
+            action = self.rng.choice(list(candidates.values()))
+        if action.action_type == ActionType.MOVE_PROPERTY:
+            self._wild_moves += 1
+        return action, {"mcts": stats}
+
+    def action_key(self, action: Action, player_names: List[str]) -> tuple:
+        """The ``fast_engine.move_key`` of an Action played by this player."""
+        card = action.card
+        action_type = action.action_type
+        if action_type == ActionType.PASS:
+            return (MOVE_PASS,)
+        if action_type == ActionType.ADD_TO_BANK:
+            return (MOVE_BANK, card.name)
+        if action_type == ActionType.ADD_TO_PROPERTIES:
+            return (MOVE_PROPERTY, card.name, COLOR_INDEX[action.target_property_set])
+        if action_type == ActionType.MOVE_PROPERTY:
+            return (MOVE_WILD, card.name, COLOR_INDEX[self.get_property_color(card)], COLOR_INDEX[action.target_property_set])
+
+        kind = _CARD_KINDS[card.get_card_type()]
+        target = player_names.index(action.target_player_names[0]) if action.target_player_names else -1
+        if kind == MOVE_RENT:
+            return (kind, card.name, COLOR_INDEX[action.rent_color], target if card.is_wild else -1, action.double_the_rent_count or 0)
+        if kind == MOVE_BUILDING:
+            return (kind, card.name, COLOR_INDEX[action.target_property_set])
+        if kind in (MOVE_PASS_GO, MOVE_BIRTHDAY):
+            return (kind, card.name)
+        if kind == MOVE_DEBT:
+            return (kind, card.name, target)
+        if kind == MOVE_DEAL_BREAKER:
+            return (kind, card.name, COLOR_INDEX[action.target_property_set], target)
+        target_info = action.forced_or_sly_deal_target_property_info
+        if kind == MOVE_SLY_DEAL:
+            return (kind, card.name, COLOR_INDEX[target_info.prop_color], target, target_info.name)
+        source_info = action.forced_deal_source_property_info
+        return (kind, card.name, COLOR_INDEX[target_info.prop_color], target, target_info.name,
+                source_info.name, COLOR_INDEX[source_info.prop_color])
+
+    # --- Search ---
+
+    def _search(self, game_state_dict: dict, root_keys: set) -> Tuple[tuple, Dict[str, Any]]:
+        """Runs the search and returns the most visited root move with some statistics."""
+        table = self._card_table()
+        base, hidden = CompactState.from_observation(table, game_state_dict, self)
+        me = base.player_names.index(self.name)
+        hand_counts = [0 if p == me else player_json["hand_count"] for p, player_json in enumerate(game_state_dict["players"])]
+        deck_size = game_state_dict.get("deck_cards_left", len(hidden) - sum(hand_counts))
+
+        root = _Node()
+        deadline = time.perf_counter() + self.time_limit if self.time_limit is not None else None
+        iterations = 0
+        while True:
+            if self.iterations is not None and iterations >= self.iterations:
+                break
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+            state = base.copy()
+            state.deal_hidden(hidden, hand_counts, deck_size, self.rng)
+            self._iterate(root, state, me, root_keys)
+            iterations += 1
+
+        if not root.children:
+            return (MOVE_PASS,), {"iterations": iterations}
+        key, best = max(root.children.items(), key=lambda item: item[1].visits)
+        return key, {
+            "iterations": iterations,
+            "visits": best.visits,
+            "value": round(best.total / best.visits, 4) if best.visits else None,
+        }
+
+    def _iterate(self, root: _Node, state: CompactState, me: int, root_keys: set):
+        """One selection / expansion / rollout / backpropagation pass on a determinization."""
+        rng = self.rng
+        node = root
+        path = [root]
+        wild_moves = self._wild_moves
+        turn_over = False
+        try:
+            while True:
+                available: Dict[tuple, fast_engine.Move] = {}
+                for move in fast_engine.legal_moves(state, me, include_wild_moves=wild_moves < MAX_WILD_MOVES_PER_TURN):
+                    key = fast_engine.move_key(state, move)
+                    if node is root and key not in root_keys:
+                        continue
+                    available.setdefault(key, move)
+                if not available:
+                    break
+
+                children = node.children
+                untried = [key for key in available if key not in children]
+                for key in available:
+                    child = children.get(key)
+                    if child is not None:
+                        child.available += 1
+                if untried:
+                    key = rng.choice(untried)
+                    child = children[key] = _Node()
+                    child.available = 1
+                else:
+                    key = max(available, key=lambda k: self._ucb(children[k]))
+                    child = children[key]
+                path.append(child)
+
+                move = available[key]
+                if move[0] == MOVE_PASS:
+                    turn_over = True
+                    break
+                fast_engine.apply_move(state, me, move)
+                if move[0] == MOVE_WILD:
+                    wild_moves += 1
+                if state.winner >= 0 or untried:
+                    break
+                node = child
+            if state.winner < 0:
+                fast_engine.playout(state, rng, self.rollout_turns, turn_over=turn_over)
+        except ValueError:
+            # The deck ran out inside the tree (Pass Go); score the position as it stands
+            pass
+
+        value = fast_engine.evaluate(state, me)
+        for visited in path:
+            visited.visits += 1
+            visited.total += value
+
+    def _ucb(self, node: _Node) -> float:
+        if not node.visits:
+            return math.inf
+        return node.total / node.visits + self.exploration * math.sqrt(math.log(node.available) / node.visits)
+
+    # --- Responses ---
+
+    def provide_payment(self, reason: str, amount: int, game_state_dict: dict, game_history: List[str]):
+        """Pays from the bank with as little overpayment as a greedy pass allows, and only
+        gives up properties when the bank is not enough, cheapest incomplete sets first."""
+        bank_value = sum(card.value for card in self.bank)
+        if bank_value >= amount:
+            payment: List[Card] = []
+            skipped: List[Card] = []
+            total = 0
+            for card in sorted(self.bank, key=lambda c: c.value, reverse=True):
+                if total + card.value <= amount:
+                    payment.append(card)
+                    total += card.value
+                else:
+                    skipped.append(card)
+            if total < amount:
+                # Every skipped card covers the rest; use the smallest
+                payment.append(skipped[-1])
+            return [(card, "bank") for card in payment]
+
+        payment = [(card, "bank") for card in self.bank]
+        total = bank_value
+        # Worthless wild cards are never handed over
+        properties = [
+            (self.has_full_set(color), card.value, card)
+            for color, prop_set in self.property_sets.items()
+            for card in prop_set.cards if card.value
+        ]
+        properties.sort(key=lambda item: item[:2])
+        for _, _, card in properties:
+            if total >= amount:
+                break
+            payment.append((card, "properties"))
+            total += card.value
+        return payment
+
+    def choose_cards_to_discard(self, num_cards_to_discard, game_state_dict, game_history: List[str]) -> List[Card]:
+        """Discards the cards least worth keeping: cheap money and action cards before properties."""
+        def keep_score(card: Card) -> int:
+            if isinstance(card, (PropertyCard, WildPropertyCard)):
+                return 20 + card.value
+            if card.get_card_type() == CardType.ACTION_JUST_SAY_NO:
+                return 15
+            return card.value
+        return sorted(self.hand, key=keep_score)[:num_cards_to_discard]
+
+    def wants_to_negate(self, action_chain_str: str, target_player_name: str, game_state_dict: dict, game_history: List[str]) -> Optional[Action]:
+        """Always negates when holding a Just Say No."""
+        for card in self.hand:
+            if card.get_card_type() == CardType.ACTION_JUST_SAY_NO:
+                return Action(action_type=ActionType.PLAY_ACTION, source_player=self, card=card, target_player_names=[target_player_name])
+        return None
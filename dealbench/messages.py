@@ -0,0 +1,78 @@
+"""Assembles the chat messages of an LLM call so that provider prompt caching hits.
+
+Providers cache the longest prompt prefix they have seen recently, so a prompt
+should put what changes least first. Messages are laid out as:
+
+1. the game rules, as the system message: the same for every call;
+2. the game history: only grows during a game, so the previous call's history
+   is a prefix of this one's;
+3. the current game state and the instructions of the decision.
+
+OpenAI, DeepSeek and most other providers cache prefixes automatically.
+Anthropic and Gemini models (through OpenRouter) only cache up to explicit
+``cache_control`` breakpoints, which are put after the rules and after the
+history. The cached prompt tokens a response reports are recorded with each
+call, see ``cached_tokens``.
+"""
+from typing import Any, Dict, List, Optional
+
+CACHE_CONTROL = {"type": "ephemeral"}
+
+# OpenRouter model ids whose providers only cache up to cache_control breakpoints
+_BREAKPOINT_MODEL_PREFIXES = ("anthropic/", "google/gemini")
+
+
+def uses_cache_breakpoints(model_name: str) -> bool:
+    return model_name.startswith(_BREAKPOINT_MODEL_PREFIXES)
+
+
+def _text_block(text: str, cache: bool = False) -> Dict[str, Any]:
+    block: Dict[str, Any] = {"type": "text", "text": text}
+    if cache:
+        block["cache_control"] = CACHE_CONTROL
+    return block
+
+
+def build_messages(model_name: str, rules: str, settled_history: Optional[str], current_history: Optional[str],
+                   prompt: str) -> List[Dict[str, Any]]:
+    """The messages of one call, most stable content first.
+
+    Args:
+        rules: System message, the same for every call.
+        settled_history: Game history up to the turn in progress, or None if the prompt has
+            no history. Repeated as is by every call until the turn ends.
+        current_history: History of the turn in progress, continuing `settled_history`.
+        prompt: Game state and instructions of this decision.
+    """
+    history = (settled_history or "") + (current_history or "")
+    if not uses_cache_breakpoints(model_name):
+        user = prompt if not history else f"{history}\n\n{prompt}"
+        return [{"role": "system", "content": rules}, {"role": "user", "content": user}]
+    # Breakpoints are only matched at block boundaries, so the growing part of the
+    # history gets a block of its own after the cached one
+    user_blocks = [_text_block(settled_history, cache=True)] if settled_history else []
+    if current_history:
+        user_blocks.append(_text_block(current_history))
+    user_blocks.append(_text_block(prompt))
+    return [
+        {"role": "system", "content": [_text_block(rules, cache=True)]},
+        {"role": "user", "content": user_blocks},
+    ]
+
+
+def user_text(messages: List[Dict[str, Any]]) -> str:
+    """The text of the user message, as one string."""
+    content = messages[-1]["content"]
+    if isinstance(content, str):
+        return content
+    *history, prompt = [block["text"] for block in content]
+    return prompt if not history else "".join(history) + "\n\n" + prompt
+
+
+def cached_tokens(usage: Dict[str, Any]) -> Optional[int]:
+    """Prompt tokens served from the provider's cache, from a response's usage; None if
+    the response does not say."""
+    details = usage.get("prompt_tokens_details") or {}
+    if details.get("cached_tokens") is not None:
+        return details["cached_tokens"]
+    return usage.get("cache_read_input_tokens")
@@ -1,8 +1,13 @@
 from abc import ABC, abstractmethod
-from typing import Any, List, Dict, Optional
+import functools
+import random
+from typing import Any, List, Dict, Optional, Tuple
+
+import trio
 
 from dealbench.card import Card, MoneyCard, PropertySet, PropertyColor, PropertyCard, WildPropertyCard, CardType
 from dealbench.action import ActionPropertyInfo, Action
+from dealbench.undo import UndoLog
 import logging
 logger = logging.getLogger(__name__)
 
@@ -16,18 +21,116 @@ class Player(ABC): # Inherit from ABC
         self.hand: List[Card] = []  # Assuming Card objects will be defined later
         self.bank: List[Card] = []  # Stores MoneyCards and ActionCards banked
         self.property_sets: Dict[PropertyColor, PropertySet] = {}
+        self.version = 0 # Bumped by every change to hand, bank or properties
+        self._legal_actions_cache = None # (key, actions), see RulesEngine.legal_actions
+        self._json_cache: Dict[bool, Tuple[int, Dict[str, Any]]] = {} # debug -> (version, to_json() result)
+        # Completed colours, kept up to date by the property mutators below
+        self.full_set_count = 0
+        self.full_set_mask = 0 # Bit (1 << color.value) is set for every complete colour
+        # Where each card is, kept in sync by the mutators below: card -> (zone, color), with
+        # zone one of "hand", "bank" or "properties" and color only set for properties
+        self._card_locations: Dict[Card, Tuple[str, Optional[PropertyColor]]] = {}
+        self._cards_by_name: Dict[str, List[Card]] = {}
+        self.undo_log: Optional[UndoLog] = None # Set by Game, records the inverse of every mutation
+        self.rng = random.Random() # Replaced by Game with a stream derived from the game seed
+
+    def _bump_version(self):
+        self.version += 1
+
+    def _record_undo(self, undo, *args):
+        if self.undo_log is not None:
+            self.undo_log.record(undo, *args)
+
+    # --- Card index ---
+
+    def _index_card(self, card: Card, zone: str, color: Optional[PropertyColor] = None):
+        self._card_locations[card] = (zone, color)
+        self._cards_by_name.setdefault(card.name, []).append(card)
+
+    def _unindex_card(self, card: Card):
+        del self._card_locations[card]
+        same_name = self._cards_by_name[card.name]
+        for i, c in enumerate(same_name):
+            if c is card:
+                del same_name[i]
+                break
+        if not same_name:
+            del self._cards_by_name[card.name]
+
+    def _rebuild_index(self):
+        self._card_locations = {}
+        self._cards_by_name = {}
+        for card in self.hand:
+            self._index_card(card, "hand")
+        for card in self.bank:
+            self._index_card(card, "bank")
+        for color, prop_set in self.property_sets.items():
+            for card in prop_set.cards:
+                self._index_card(card, "properties", color)
+
+    def card_location(self, card: Card) -> Optional[Tuple[str, Optional[PropertyColor]]]:
+        """(zone, color) of one of this player's cards, None if the player does not hold it."""
+        return self._card_locations.get(card)
+
+    def find_cards(self, card_name: str, zone: Optional[str] = None, color: Optional[PropertyColor] = None) -> List[Card]:
+        """This player's cards called `card_name`, optionally limited to one zone and property color."""
+        cards = self._cards_by_name.get(card_name, [])
+        if zone is None and color is None:
+            return list(cards)
+        return [
+            card for card in cards
+            if (zone is None or self._card_locations[card][0] == zone)
+            and (color is None or self._card_locations[card][1] == color)
+        ]
+
+    def find_card(self, card_name: str, zone: Optional[str] = None, color: Optional[PropertyColor] = None) -> Optional[Card]:
+        """First card returned by find_cards, or None."""
+        for card in self._cards_by_name.get(card_name, ()):
+            card_zone, card_color = self._card_locations[card]
+            if (zone is None or card_zone == zone) and (color is None or card_color == color):
+                return card
+        return None
+
+    def _refresh_full_set(self, color: PropertyColor):
+        """Re-checks a single colour after its property set changed."""
+        prop_set = self.property_sets.get(color)
+        is_full = prop_set is not None and prop_set.is_full_set
+        bit = 1 << color.value
+        was_full = bool(self.full_set_mask & bit)
+        if is_full and not was_full:
+            self.full_set_mask |= bit
+            self.full_set_count += 1
+        elif was_full and not is_full:
+            self.full_set_mask &= ~bit
+            self.full_set_count -= 1
+
+    def refresh_property_state(self):
+        """Recomputes everything derived from hand, bank and property_sets. Call this
+        after assigning those attributes directly instead of through the mutators."""
+        self.full_set_count = 0
+        self.full_set_mask = 0
+        for color in self.property_sets:
+            self._refresh_full_set(color)
+        self._rebuild_index()
+        self._bump_version()
+
+    def has_full_set(self, color: PropertyColor) -> bool:
+        return bool(self.full_set_mask & (1 << color.value))
 
     def add_card_to_hand(self, card):
         """Adds a card to the player's hand."""
         self.hand.append(card)
+        self._index_card(card, "hand")
+        self._record_undo(self._undo_append, self.hand, card)
+        self._bump_version()
 
-    def add_card(self, card, source):
+    def add_card(self, card, source, color=None):
         if source=="bank":
             self.add_card_to_bank(card)
         elif source=="hand":
             self.add_card_to_hand(card)
         elif source=="properties":
-            self.add_card_to_properties(card)
+            self.add_card_to_properties(card, color)
         else:
             raise ValueError("Invalid source. Must be 'bank', 'hand', or 'properties'.")
     
@@ -43,78 +146,178 @@ class Player(ABC): # Inherit from ABC
 
     def remove_card_from_hand(self, card):
         """Removes a specific card from the player's hand."""
-        self.hand.remove(card)
+        position = self.hand.index(card)
+        del self.hand[position]
+        self._unindex_card(card)
+        self._record_undo(self._undo_remove, self.hand, position, card, "hand")
+        self._bump_version()
     
     def remove_double_rent_card_from_hand(self):
         for card in self.hand:
             if card.get_card_type() == CardType.ACTION_DOUBLE_THE_RENT:
-                self.hand.remove(card)
+                self.remove_card_from_hand(card)
                 return
         raise ValueError("No double the rent card found in hand.")
 
     def add_card_to_bank(self, card):
         """Adds a card (Money or Action) to the player's bank."""
         self.bank.append(card)
+        self._index_card(card, "bank")
+        self._record_undo(self._undo_append, self.bank, card)
+        self._bump_version()
 
     def remove_card_from_bank(self, card):
         """Removes a specific card from the player's bank."""
         try:
-            self.bank.remove(card)
+            position = self.bank.index(card)
         except ValueError:
-            logger.error(f"Error: Card {card} not found in bank.") # Or raise a custom exception
+            logger.error("Error: Card %s not found in bank.", card) # Or raise a custom exception
+            return
+        del self.bank[position]
+        self._unindex_card(card)
+        self._record_undo(self._undo_remove, self.bank, position, card, "bank")
+        self._bump_version()
 
     def add_card_to_properties(self, card, color=None):
+        """Places a property card on the table. Wild cards need the color they are played as."""
         if color is None:
             if isinstance(card, WildPropertyCard):
-                color = card.current_color
+                raise ValueError(f"add_card_to_properties: Error: no color given for wild card {card}")
             elif isinstance(card, PropertyCard):
                 color = card.set_color
             else:
                 raise ValueError(f"add_card_to_properties: Error: color is None for card {card}")
-        elif isinstance(card, WildPropertyCard):
-            card.current_color = color
 
-        if color not in self.property_sets:
-            self.property_sets[color] = PropertySet(card)
+        prop_set = self.property_sets.get(color)
+        if prop_set is None:
+            self.property_sets[color] = PropertySet(card, color)
+            self._record_undo(self._undo_new_property_set, color, card)
         else:
-            self.property_sets[color].add_card(card)
+            previous_state = (prop_set.number_for_full_set, prop_set.has_house, prop_set.has_hotel)
+            prop_set.add_card(card)
+            self._record_undo(self._undo_add_to_property_set, color, card, previous_state)
+        if isinstance(card, PropertyCard):
+            self._index_card(card, "properties", color)
+        self._refresh_full_set(color)
+        self._bump_version()
 
-    def remove_card_from_properties(self, card):
-        if isinstance(card, WildPropertyCard):
-            color = card.current_color
-        elif isinstance(card, PropertyCard):
-            color = card.set_color
-        else:
+    def get_property_color(self, card) -> Optional[PropertyColor]:
+        """Color of the property set holding `card` on the table, None if it is not there."""
+        if not isinstance(card, PropertyCard):
             raise ValueError(f"Error: Card {card} is not a PropertyCard.")
-        if color not in self.property_sets:
-            raise ValueError(f"Error: Player {self.name} does not have any {color} properties.")
-        self.property_sets[color].remove_card(card)
-        if self.property_sets[color].is_empty:
+        zone, color = self._card_locations.get(card, (None, None))
+        return color if zone == "properties" else None
+
+    def remove_card_from_properties(self, card):
+        color = self.get_property_color(card)
+        if color is None:
+            raise ValueError(f"Error: Player {self.name} does not have {card.name} in their properties.")
+        prop_set = self.property_sets[color]
+        previous_state = (prop_set.number_for_full_set, prop_set.has_house, prop_set.has_hotel)
+        card_position = next(i for i, c in enumerate(prop_set.cards) if c is card)
+        set_position = list(self.property_sets).index(color)
+        prop_set.remove_card(card)
+        self._unindex_card(card)
+        if prop_set.is_empty:
             del self.property_sets[color]
+        self._record_undo(self._undo_remove_from_property_set, color, prop_set, set_position, card_position, card, previous_state)
+        self._refresh_full_set(color)
+        self._bump_version()
     
     def remove_property_set(self, property_set_color):
-        return self.property_sets.pop(property_set_color)
+        set_position = list(self.property_sets).index(property_set_color)
+        property_set = self.property_sets.pop(property_set_color)
+        for card in property_set.cards:
+            self._unindex_card(card)
+        self._record_undo(self._undo_remove_property_set, property_set_color, property_set, set_position)
+        self._refresh_full_set(property_set_color)
+        self._bump_version()
+        return property_set
     
     def add_property_set(self, property_set_color, property_set):
+        replaced_set = self.property_sets.get(property_set_color)
+        set_position = None
+        if replaced_set is not None:
+            set_position = list(self.property_sets).index(property_set_color)
+            for card in replaced_set.cards:
+                self._unindex_card(card)
         self.property_sets[property_set_color] = property_set
+        for card in property_set.cards:
+            self._index_card(card, "properties", property_set_color)
+        self._record_undo(self._undo_add_property_set, property_set_color, replaced_set, set_position)
+        self._refresh_full_set(property_set_color)
+        self._bump_version()
+
+    # --- Inverse operations, replayed by UndoLog.rollback ---
+    # Versions are bumped rather than restored so caches keyed on them never see a reused version.
+
+    def _undo_append(self, cards: List[Card], card: Card):
+        cards.pop()
+        self._unindex_card(card)
+        self._bump_version()
+
+    def _undo_remove(self, cards: List[Card], position: int, card: Card, zone: str):
+        cards.insert(position, card)
+        self._index_card(card, zone)
+        self._bump_version()
+
+    def _insert_property_set(self, color: PropertyColor, prop_set: PropertySet, position: int):
+        """Puts a set back at its old position, so the iteration order of property_sets is restored too."""
+        items = list(self.property_sets.items())
+        items.insert(position, (color, prop_set))
+        self.property_sets.clear()
+        self.property_sets.update(items)
+        for card in prop_set.cards:
+            self._index_card(card, "properties", color)
+
+    def _undo_new_property_set(self, color: PropertyColor, card: Card):
+        del self.property_sets[color]
+        self._unindex_card(card)
+        self._refresh_full_set(color)
+        self._bump_version()
+
+    def _undo_add_to_property_set(self, color: PropertyColor, card: Card, previous_state: Tuple[int, bool, bool]):
+        prop_set = self.property_sets[color]
+        if isinstance(card, PropertyCard):
+            prop_set.cards.pop()
+            self._unindex_card(card)
+        prop_set.number_for_full_set, prop_set.has_house, prop_set.has_hotel = previous_state
+        self._refresh_full_set(color)
+        self._bump_version()
+
+    def _undo_remove_from_property_set(self, color: PropertyColor, prop_set: PropertySet, set_position: int, card_position: int, card: Card, previous_state: Tuple[int, bool, bool]):
+        if color not in self.property_sets:
+            self._insert_property_set(color, prop_set, set_position)
+        prop_set.cards.insert(card_position, card)
+        prop_set.number_for_full_set, prop_set.has_house, prop_set.has_hotel = previous_state
+        self._index_card(card, "properties", color)
+        self._refresh_full_set(color)
+        self._bump_version()
+
+    def _undo_remove_property_set(self, color: PropertyColor, prop_set: PropertySet, set_position: int):
+        self._insert_property_set(color, prop_set, set_position)
+        self._refresh_full_set(color)
+        self._bump_version()
+
+    def _undo_add_property_set(self, color: PropertyColor, replaced_set: Optional[PropertySet], set_position: Optional[int]):
+        prop_set = self.property_sets.pop(color)
+        for card in prop_set.cards:
+            self._unindex_card(card)
+        if replaced_set is not None:
+            self._insert_property_set(color, replaced_set, set_position)
+        self._refresh_full_set(color)
+        self._bump_version()
     
     def has_card(self, card_name: str):
         #dont leak whats in player's hand
-        for card in self.bank:
-            if card.name == card_name:
-                return True
-        for prop_set in self.property_sets.values():
-            if prop_set.has_card(card_name):
+        for card in self._cards_by_name.get(card_name, ()):
+            if self._card_locations[card][0] != "hand":
                 return True
         return False
 
     def get_card_from_properties(self, info: 'ActionPropertyInfo'):
         """Retrieve a property card object given its name and color."""
-        prop_set = self.property_sets[info.prop_color]
-        for card in prop_set.cards:
-            if card.name == info.name:
-                return card
-        return None
+        return self.find_card(info.name, "properties", info.prop_color)
 
     def get_bank_value(self) -> int:
         """Calculates the total monetary value of cards in the bank."""
@@ -126,28 +329,39 @@ class Player(ABC): # Inherit from ABC
         return self.property_sets
 
     def to_json(self, debug=False) -> Dict[str, Any]:
-        if debug:
-            return {
+        """The player's observation, only rebuilt when `version` changes.
+
+        Returned dicts are cached and shared between callers, so they must not be modified.
+        """
+        cached = self._json_cache.get(debug)
+        if cached is not None and cached[0] == self.version:
+            return cached[1]
+        public = self._json_cache.get(False)
+        if public is None or public[0] != self.version:
+            public = (self.version, {
+                "name": self.name,
+                "hand_count": len(self.hand),
+                "banked_cards": [card.to_json() for card in self.bank],
+                "bank_value": self.get_bank_value(),
+                "property_sets": {
+                    color.name: prop_set.to_json()
+                    for color, prop_set in self.property_sets.items()
+                }
+            })
+            self._json_cache[False] = public
+        if not debug:
+            return public[1]
+        data = public[1]
+        debug_json = {
             "name": self.name,
-            "hand_count": len(self.hand),
+            "hand_count": data["hand_count"],
             "hand_cards": [card.to_json() for card in self.hand],
-            "banked_cards": [card.to_json() for card in self.bank],
-            "bank_value": self.get_bank_value(),
-            "property_sets": {
-                color.name: prop_set.to_json()
-                for color, prop_set in self.property_sets.items()
-            }
-        }
-        return {
-            "name": self.name,
-            "hand_count": len(self.hand),
-            "banked_cards": [card.to_json() for card in self.bank],
-            "bank_value": self.get_bank_value(),
-            "property_sets": {
-                color.name: prop_set.to_json()
-                for color, prop_set in self.property_sets.items()
-            }
+            "banked_cards": data["banked_cards"],
+            "bank_value": data["bank_value"],
+            "property_sets": data["property_sets"],
         }
+        self._json_cache[True] = (self.version, debug_json)
+        return debug_json
 
     @property
     def cards_in_hand(self):
@@ -190,4 +404,31 @@ class Player(ABC): # Inherit from ABC
     @abstractmethod
     def wants_to_negate(self, action_chain_str: str, target_player_name: str, game_state_dict: dict, game_history: List[str]) -> Optional[Action]:
         pass
+
+    # --- Async decisions ---
+    # Used by Game.arun_game. The defaults adapt the synchronous methods above: they are
+    # called directly, or in a worker thread when `blocking_decisions` is set so a slow
+    # player does not stall the other games on the event loop. Players that wait on I/O
+    # (LLMPlayer) override them with native async versions.
+
+    blocking_decisions = False # Set by players whose decisions take long enough to block the event loop
+
+    async def _adecide(self, method, *args, **kwargs) -> Any:
+        if self.blocking_decisions:
+            return await trio.to_thread.run_sync(functools.partial(method, *args, **kwargs))
+        # Lets the other games run (and this one be cancelled) between quick decisions
+        await trio.lowlevel.checkpoint()
+        return method(*args, **kwargs)
+
+    async def aget_action(self, game_state_dict: dict, game_history: List[str]) -> Any:
+        return await self._adecide(self.get_action, game_state_dict, game_history)
+
+    async def achoose_cards_to_discard(self, num_cards_to_discard, game_state_dict, game_history: List[str]) -> Any:
+        return await self._adecide(self.choose_cards_to_discard, num_cards_to_discard, game_state_dict, game_history)
+
+    async def aprovide_payment(self, reason: str, amount: int, game_state_dict: dict, game_history: List[str]) -> List[Card]:
+        return await self._adecide(self.provide_payment, reason, amount, game_state_dict, game_history)
+
+    async def awants_to_negate(self, action_chain_str: str, target_player_name: str, game_state_dict: dict, game_history: List[str]) -> Optional[Action]:
+        return await self._adecide(self.wants_to_negate, action_chain_str, target_player_name, game_state_dict, game_history)
         
\ No newline at end of file
@@ -0,0 +1,135 @@
+"""On-disk cache of LLM responses, keyed by the request.
+
+LLM calls use temperature 0 and prompts rendered deterministically from the game
+state, so a rerun of a seeded game or of a crashed tournament repeats requests
+that were already answered. ``ResponseCache`` keeps the raw response body of
+each request under the sha256 of its payload (model, system message, prompt and
+response format schema), so a repeated request is answered from disk at no cost.
+
+Entries live in one SQLite file. It is safe to share between threads and
+processes, and once its entries exceed ``max_bytes`` the least recently used ones
+are evicted.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from contextlib import closing
+from typing import Any, Dict, Optional
+import logging
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = os.path.join("logs", "llm_cache.sqlite")
+DEFAULT_MAX_BYTES = 1 << 30
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    model TEXT,
+    body BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    created_at TEXT NOT NULL,
+    last_used REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS responses_last_used ON responses(last_used)
+"""
+
+
+class ResponseCache:
+    """Cache at `path`. Every method opens its own connection, so one instance can be
+    shared by games running on different threads."""
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_bytes: int = DEFAULT_MAX_BYTES, timeout: float = 30.0):
+        """
+        Args:
+            max_bytes: Size of the stored (compressed) responses above which the least
+                recently used are evicted.
+            timeout: Seconds to wait for another writer to release the database.
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+        self._created = False
+
+    @staticmethod
+    def key(payload: Dict[str, Any]) -> str:
+        """The cache key of a request payload."""
+        data = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+        return hashlib.sha256(data.encode()).hexdigest()
+
+    def connect(self) -> sqlite3.Connection:
+        """A new connection to the cache. Close it after use."""
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=self.timeout)
+        if not self._created:
+            conn.execute("PRAGMA journal_mode = WAL")
+            for statement in _SCHEMA.split(";"):
+                conn.execute(statement)
+            self._created = True
+        return conn
+
+    def _count(self, hit: bool):
+        with self._stats_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, key: str) -> Optional[str]:
+        """The response body stored under `key`, or None. Counts a hit or a miss."""
+        with closing(self.connect()) as conn, conn:
+            row = conn.execute("SELECT body FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+        self._count(row is not None)
+        if row is None:
+            return None
+        return zlib.decompress(row[0]).decode()
+
+    def put(self, key: str, body: str, model: Optional[str] = None):
+        """Stores a response body, evicting the least recently used entries if the cache
+        grows past `max_bytes`."""
+        data = zlib.compress(body.encode())
+        with closing(self.connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, body, size, created_at, last_used) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, data, len(data), time.strftime("%Y-%m-%d %H:%M:%S"), time.time()),
+            )
+            self._evict(conn)
+
+    def _evict(self, conn: sqlite3.Connection):
+        excess = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0] - self.max_bytes
+        if excess <= 0:
+            return
+        evicted = []
+        for key, size in conn.execute("SELECT key, size FROM responses ORDER BY last_used"):
+            evicted.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        conn.executemany("DELETE FROM responses WHERE key = ?", evicted)
+        logger.info("Evicted %s responses from %s", len(evicted), self.path)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hits and misses of this instance, and the entries and bytes stored."""
+        with closing(self.connect()) as conn:
+            entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else None,
+            "entries": entries,
+            "bytes": size,
+        }
+
+    def clear(self):
+        with closing(self.connect()) as conn, conn:
+            conn.execute("DELETE FROM responses")
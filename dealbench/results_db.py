@@ -0,0 +1,435 @@
+"""SQLite index of game and tournament results.
+
+``Game`` and ``Tournament`` write one row per game, per participant, per turn and
+per LLM call to ``logs/results.sqlite``, so that leaderboards and per-model
+statistics are a query instead of a walk over every log directory. Logs written
+before the database existed are imported with
+
+    python -m dealbench.results_db import logs
+
+which reads game.jsonl logs, the old per-action directories, archive segments
+(see ``dealbench.archive``) and ``tournament_results.json`` files. Importing
+again only adds games that are not in the database yet.
+"""
+import json
+import os
+import re
+import sqlite3
+import time
+from contextlib import closing
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from dealbench.catalog import get_default_catalog
+import logging
+logger = logging.getLogger(__name__)
+
+if TYPE_CHECKING:
+    from dealbench.game import Game
+
+DEFAULT_DB_PATH = os.path.join("logs", "results.sqlite")
+
+# Schema migrations, applied in order; PRAGMA user_version holds how many have run
+_MIGRATIONS: List[str] = [
+    """
+    CREATE TABLE tournaments (
+        tournament_id TEXT PRIMARY KEY,
+        started_at TEXT,
+        seed INTEGER,
+        results TEXT
+    );
+    CREATE TABLE games (
+        id INTEGER PRIMARY KEY,
+        game_id TEXT NOT NULL UNIQUE,
+        tournament_id TEXT,
+        started_at TEXT,
+        finished_at TEXT,
+        seed INTEGER,
+        winner TEXT,
+        turn_count INTEGER,
+        num_players INTEGER NOT NULL,
+        log_path TEXT
+    );
+    CREATE TABLE participants (
+        game INTEGER NOT NULL REFERENCES games(id) ON DELETE CASCADE,
+        seat INTEGER NOT NULL,
+        player_name TEXT NOT NULL,
+        model TEXT NOT NULL,
+        is_winner INTEGER NOT NULL,
+        bank_value INTEGER,
+        property_count INTEGER,
+        full_sets INTEGER,
+        PRIMARY KEY (game, seat)
+    ) WITHOUT ROWID;
+    CREATE TABLE turn_stats (
+        game INTEGER NOT NULL REFERENCES games(id) ON DELETE CASCADE,
+        turn INTEGER NOT NULL,
+        player_name TEXT NOT NULL,
+        cards_banked INTEGER NOT NULL,
+        value_banked INTEGER NOT NULL,
+        properties_placed INTEGER NOT NULL,
+        payments_requested INTEGER NOT NULL,
+        amount_collected INTEGER NOT NULL,
+        properties_stolen INTEGER NOT NULL,
+        just_say_nos INTEGER NOT NULL,
+        invalid_actions INTEGER NOT NULL,
+        cards_discarded INTEGER NOT NULL,
+        PRIMARY KEY (game, turn)
+    ) WITHOUT ROWID;
+    CREATE TABLE llm_calls (
+        call_id INTEGER PRIMARY KEY,
+        game INTEGER NOT NULL REFERENCES games(id) ON DELETE CASCADE,
+        player_name TEXT NOT NULL,
+        model TEXT NOT NULL,
+        template TEXT,
+        started_at TEXT,
+        latency_ms REAL,
+        attempts INTEGER,
+        success INTEGER NOT NULL,
+        prompt_tokens INTEGER,
+        completion_tokens INTEGER,
+        prompt_ref TEXT
+    );
+    CREATE INDEX games_started_at ON games(started_at);
+    CREATE INDEX games_tournament ON games(tournament_id);
+    CREATE INDEX participants_model ON participants(model, is_winner, game);
+    CREATE INDEX participants_player ON participants(player_name);
+    CREATE INDEX llm_calls_game ON llm_calls(game);
+    CREATE INDEX llm_calls_model ON llm_calls(model);
+    """,
+    """
+    ALTER TABLE llm_calls ADD COLUMN cached INTEGER NOT NULL DEFAULT 0;
+    """,
+    """
+    ALTER TABLE llm_calls ADD COLUMN cached_tokens INTEGER;
+    """,
+]
+
+_TIMESTAMP_PATTERN = re.compile(r"(\d{4}-\d{2}-\d{2})_(\d{2})-(\d{2})-(\d{2})")
+
+_STEAL_EVENTS = ("SLY_DEAL", "FORCED_DEAL", "DEAL_BREAKER")
+
+_TURN_COUNTERS = ("cards_banked", "value_banked", "properties_placed", "payments_requested", "amount_collected",
+                  "properties_stolen", "just_say_nos", "invalid_actions", "cards_discarded")
+
+
+def timestamp_from_identifier(identifier: str) -> Optional[str]:
+    """``YYYY-MM-DD HH:MM:SS`` from a game or tournament identifier, which start with their creation time."""
+    match = _TIMESTAMP_PATTERN.match(os.path.basename(identifier))
+    if match is None:
+        return None
+    day, hour, minute, second = match.groups()
+    return f"{day} {hour}:{minute}:{second}"
+
+
+def _now() -> str:
+    return time.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def player_model(player: Any) -> str:
+    """The model a player stands for: its LLM model name, or its class for bots."""
+    return getattr(player, "model_name", None) or type(player).__name__
+
+
+# Bot class of logs written before result records listed the player models
+LEGACY_BOT_MODEL = "TestPlayer"
+
+
+def logged_player_model(record: Dict[str, Any], name: str) -> str:
+    """``player_model`` of the player `name`, from the final record of a game log. Logs
+    without the models name LLM players after their OpenRouter model id, which always
+    contains a "/"; all other players of those logs are bots."""
+    models = record.get("player_models") or {}
+    if name in models:
+        return models[name]
+    return name if "/" in name else LEGACY_BOT_MODEL
+
+
+def participant_stats(player_json: Dict[str, Any]) -> Tuple[Optional[int], int, int]:
+    """``(bank_value, property_count, full_sets)`` from a ``Player.to_json()`` dict."""
+    property_sets = player_json.get("property_sets", {}).values()
+    return (
+        player_json.get("bank_value"),
+        sum(len(property_set["cards"]) for property_set in property_sets),
+        sum(1 for property_set in property_sets if property_set.get("is_full_set")),
+    )
+
+
+def turn_stats(event_records: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Per-turn statistics of the player whose turn it was, from ``Event.to_record()`` dicts."""
+    cards = get_default_catalog().cards
+    turns: Dict[int, Dict[str, Any]] = {}
+    for event in event_records:
+        event_type = event["type"]
+        if event_type == "TURN_START":
+            turns[event["turn"]] = {"turn": event["turn"], "player_name": event["actor"], **dict.fromkeys(_TURN_COUNTERS, 0)}
+        stats = turns.get(event["turn"])
+        if stats is None:
+            continue
+        player = stats["player_name"]
+        actor = event.get("actor")
+        if event_type == "BANK" and actor == player:
+            stats["cards_banked"] += 1
+            stats["value_banked"] += sum(cards[card_id].value for card_id in event.get("cards", ()))
+        elif event_type == "ADD_PROPERTY" and actor == player:
+            stats["properties_placed"] += 1
+        elif event_type in ("PAYMENT", "PAYMENT_BLOCKED") and event.get("target") == player:
+            stats["payments_requested"] += 1
+            if event_type == "PAYMENT":
+                stats["amount_collected"] += sum(cards[card_id].value for card_id in event.get("cards", ()))
+        elif event_type in _STEAL_EVENTS and actor == player:
+            stats["properties_stolen"] += len(event.get("cards", ()))
+        elif event_type == "JUST_SAY_NO" and actor == player:
+            stats["just_say_nos"] += 1
+        elif event_type == "INVALID_ACTION" and actor == player:
+            stats["invalid_actions"] += 1
+        elif event_type == "DISCARD" and actor == player:
+            stats["cards_discarded"] += 1
+    return list(turns.values())
+
+
+class ResultsDB:
+    """Results database at `path`. Every method opens its own connection, so one
+    instance can be shared by games running on different threads."""
+
+    def __init__(self, path: str = DEFAULT_DB_PATH, timeout: float = 30.0):
+        """
+        Args:
+            timeout: Seconds to wait for another writer to release the database.
+        """
+        self.path = path
+        self.timeout = timeout
+        self._migrated = False
+
+    def connect(self) -> sqlite3.Connection:
+        """A new connection to the migrated database. Close it after use."""
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=self.timeout)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA foreign_keys = ON")
+        if not self._migrated:
+            self._migrate(conn)
+            self._migrated = True
+        return conn
+
+    def _migrate(self, conn: sqlite3.Connection):
+        conn.execute("PRAGMA journal_mode = WAL")
+        if conn.execute("PRAGMA user_version").fetchone()[0] >= len(_MIGRATIONS):
+            return
+        # Take the write lock first so that concurrent games do not migrate twice
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            for number in range(version, len(_MIGRATIONS)):
+                logger.info("Migrating %s to schema version %s", self.path, number + 1)
+                for statement in _MIGRATIONS[number].split(";"):
+                    if statement.strip():
+                        conn.execute(statement)
+                conn.execute(f"PRAGMA user_version = {number + 1}")
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    # --- Writing ---
+
+    def record_tournament(self, tournament_id: str, seed: Optional[int] = None, results: Optional[Dict[str, Any]] = None,
+                          started_at: Optional[str] = None):
+        """Adds a tournament, or updates its results."""
+        with closing(self.connect()) as conn, conn:
+            conn.execute(
+                "INSERT INTO tournaments (tournament_id, started_at, seed, results) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(tournament_id) DO UPDATE SET seed = excluded.seed, "
+                "results = COALESCE(excluded.results, tournaments.results)",
+                (tournament_id, started_at or timestamp_from_identifier(tournament_id) or _now(), seed,
+                 json.dumps(results) if results is not None else None),
+            )
+
+    def record_game(self, game: "Game"):
+        """Writes a game's summary, participants, turn statistics and the LLM calls its
+        players made. A game recorded again replaces its earlier rows."""
+        winner = getattr(game.game_winner, "name", game.game_winner)
+        participants = []
+        for seat, player in enumerate(game.players):
+            participants.append((seat, player.name, player_model(player), int(player.name == winner),
+                                 *participant_stats(player.to_json(debug=True))))
+        calls = []
+        for player in game.players:
+            for call in getattr(player, "call_metrics", ()):
+                calls.append({**call, "player_name": player.name})
+        log_path = getattr(getattr(game.sink, "sink", game.sink), "path", None)
+        self._write_game(
+            game_id=game.game_identifier,
+            tournament_id=getattr(game, "tournament_id", None),
+            started_at=game.started_at,
+            finished_at=_now() if winner is not None else None,
+            seed=game.seed,
+            winner=winner,
+            turn_count=game.turn_count,
+            log_path=log_path,
+            participants=participants,
+            turns=turn_stats(game.game_history.to_records()),
+            calls=calls,
+        )
+
+    def _write_game(self, game_id: str, tournament_id: Optional[str], started_at: Optional[str], finished_at: Optional[str],
+                    seed: Optional[int], winner: Optional[str], turn_count: Optional[int], log_path: Optional[str],
+                    participants: Sequence[tuple], turns: Sequence[Dict[str, Any]], calls: Sequence[Dict[str, Any]]):
+        with closing(self.connect()) as conn, conn:
+            conn.execute("DELETE FROM games WHERE game_id = ?", (game_id,))
+            game = conn.execute(
+                "INSERT INTO games (game_id, tournament_id, started_at, finished_at, seed, winner, turn_count, num_players, log_path) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (game_id, tournament_id, started_at, finished_at, seed, winner, turn_count, len(participants), log_path),
+            ).lastrowid
+            conn.executemany(
+                "INSERT INTO participants (game, seat, player_name, model, is_winner, bank_value, property_count, full_sets) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(game, *participant) for participant in participants],
+            )
+            conn.executemany(
+                "INSERT INTO turn_stats (game, turn, player_name, cards_banked, value_banked, properties_placed, "
+                "payments_requested, amount_collected, properties_stolen, just_say_nos, invalid_actions, cards_discarded) "
+                "VALUES (:game, :turn, :player_name, :cards_banked, :value_banked, :properties_placed, :payments_requested, "
+                ":amount_collected, :properties_stolen, :just_say_nos, :invalid_actions, :cards_discarded)",
+                [{**stats, "game": game} for stats in turns],
+            )
+            conn.executemany(
+                "INSERT INTO llm_calls (game, player_name, model, template, started_at, latency_ms, attempts, success, "
+                "prompt_tokens, completion_tokens, cached_tokens, prompt_ref, cached) VALUES (:game, :player_name, :model, "
+                ":template, :started_at, :latency_ms, :attempts, :success, :prompt_tokens, :completion_tokens, :cached_tokens, "
+                ":prompt_ref, :cached)",
+                [{"cached": 0, "cached_tokens": None, **call, "game": game} for call in calls],
+            )
+
+    # --- Queries ---
+
+    def query(self, sql: str, params: Sequence[Any] = ()) -> List[Dict[str, Any]]:
+        """Runs a read query and returns its rows as dicts."""
+        with closing(self.connect()) as conn:
+            return [dict(row) for row in conn.execute(sql, params)]
+
+    def leaderboard(self, tournament_id: Optional[str] = None, since: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Games, wins and win rate per model over finished games, best first.
+
+        Args:
+            tournament_id: Only count games of this tournament.
+            since: Only count games started at or after this ``YYYY-MM-DD[ HH:MM:SS]`` time.
+        """
+        conditions, params = ["g.winner IS NOT NULL"], []
+        if tournament_id is not None:
+            conditions.append("g.tournament_id = ?")
+            params.append(tournament_id)
+        if since is not None:
+            conditions.append("g.started_at >= ?")
+            params.append(since)
+        return self.query(
+            "SELECT p.model, COUNT(*) AS games, SUM(p.is_winner) AS wins, "
+            "ROUND(AVG(p.is_winner), 4) AS win_rate, ROUND(AVG(g.turn_count), 1) AS avg_turns "
+            "FROM participants p JOIN games g ON g.id = p.game "
+            f"WHERE {' AND '.join(conditions)} GROUP BY p.model ORDER BY win_rate DESC, wins DESC",
+            params,
+        )
+
+    def games(self, finished_only: bool = True) -> List[Dict[str, Any]]:
+        """Every game in start order with its players (by seat) and winner, the shape
+        ``dealbench.archive.iter_game_summaries`` returns."""
+        rows = self.query(
+            "SELECT g.game_id, g.tournament_id, g.started_at, g.seed, g.winner, g.turn_count, "
+            "json_group_array(p.player_name) AS players FROM games g "
+            "JOIN (SELECT * FROM participants ORDER BY game, seat) p ON p.game = g.id "
+            f"{'WHERE g.winner IS NOT NULL ' if finished_only else ''}"
+            "GROUP BY g.id ORDER BY g.started_at, g.game_id"
+        )
+        for row in rows:
+            row["players"] = json.loads(row["players"])
+        return rows
+
+    def has_game(self, game_id: str) -> bool:
+        return bool(self.query("SELECT 1 FROM games WHERE game_id = ?", (game_id,)))
+
+    # --- Importing existing logs ---
+
+    def import_logs(self, logs_dir: str) -> int:
+        """Imports every game and tournament under `logs_dir` that is not in the
+        database yet. Returns the number of games imported."""
+        from dealbench.archive import GameArchive, iter_game_summaries
+        from dealbench.log_reader import iter_game_log
+
+        known = {row["game_id"] for row in self.query("SELECT game_id FROM games")}
+        imported = 0
+        for summary in iter_game_summaries(logs_dir, finished_only=False):
+            game_id = summary["game_id"]
+            if game_id in known:
+                continue
+            if "archive" in summary:
+                records = GameArchive(summary["archive"]).open_game(game_id)
+                log_path = f"{summary['archive']}#{game_id}"
+            else:
+                records = iter_game_log(summary["path"])
+                log_path = summary["path"]
+            events: List[Dict[str, Any]] = []
+            last_record: Dict[str, Any] = {}
+            try:
+                for _, record in records:
+                    events.extend(record.get("events") or ())
+                    last_record = record
+            except (OSError, ValueError) as e:
+                logger.warning("Skipping %s: %s", log_path, e)
+                continue
+            winner = summary["winner"]
+            participants = [
+                (seat, player_json["name"], logged_player_model(last_record, player_json["name"]), int(player_json["name"] == winner),
+                 *participant_stats(player_json))
+                for seat, player_json in enumerate(last_record.get("players") or ())
+            ]
+            self._write_game(
+                game_id=game_id,
+                tournament_id=None,
+                started_at=timestamp_from_identifier(game_id),
+                finished_at=timestamp_from_identifier(game_id) if summary["finished"] else None,
+                seed=summary["seed"],
+                winner=winner,
+                turn_count=last_record.get("turn_count"),
+                log_path=log_path,
+                participants=participants,
+                turns=turn_stats(events),
+                calls=(),
+            )
+            imported += 1
+
+        for root, _, files in os.walk(logs_dir):
+            if "tournament_results.json" in files:
+                self._import_tournament(root)
+        return imported
+
+    def _import_tournament(self, directory: str):
+        with open(os.path.join(directory, "tournament_results.json")) as f:
+            results = json.load(f)
+        tournament_id = os.path.basename(directory)
+        self.record_tournament(tournament_id, results.get("seed"), results)
+        game_ids = [match["game_identifier"] for match in results.get("matches", []) if match.get("game_identifier")]
+        with closing(self.connect()) as conn, conn:
+            conn.executemany("UPDATE games SET tournament_id = ? WHERE game_id = ? AND tournament_id IS NULL",
+                             [(tournament_id, game_id) for game_id in game_ids])
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="DealBench results database")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="Path of the SQLite database")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    import_parser = subparsers.add_parser("import", help="Import existing game logs and tournament results")
+    import_parser.add_argument("logs_dir", help="Directory of game logs, e.g. logs")
+    leaderboard_parser = subparsers.add_parser("leaderboard", help="Print wins and win rate per model")
+    leaderboard_parser.add_argument("--tournament", default=None)
+    leaderboard_parser.add_argument("--since", default=None, help="YYYY-MM-DD")
+    args = parser.parse_args()
+
+    db = ResultsDB(args.db)
+    if args.command == "import":
+        print(f"Imported {db.import_logs(args.logs_dir)} games into {args.db}")
+    else:
+        for row in db.leaderboard(args.tournament, args.since):
+            print(f"{row['model']:<50} {row['wins']:>5}/{row['games']:<5} {row['win_rate']:.3f}  avg turns {row['avg_turns']}")
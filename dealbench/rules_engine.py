@@ -1,4 +1,4 @@
-from typing import Any, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 from dealbench.action import Action, ActionType, ActionPropertyInfo
 from dealbench.card import CardType, PropertyColor, PropertyCard, RentCard, BuildingCard, ActionCard, Card, WildPropertyCard  # etc.
 from dealbench.player import Player
@@ -22,17 +22,12 @@ class RulesEngine:
             return False, "Source player mismatch"
 
         # Check if player has the card (unless it's a context action like passing)
-        if action.card not in action.source_player.hand:
+        card_zone, _ = current_player.card_location(action.card) or (None, None)
+        if card_zone != "hand":
             if not action.action_type == ActionType.MOVE_PROPERTY:
                 return False, f"Validation Error: {action.source_player.name} does not have {action.card.name} in hand"
-            else:
-                found=False
-                for prop_set in current_player.get_property_sets().values():
-                    if action.card in prop_set.cards:
-                        found=True
-                        break
-                if not found:
-                    return False, f"Validation Error: {current_player.name} does not have {action.card.name} in properties"
+            elif card_zone != "properties":
+                return False, f"Validation Error: {current_player.name} does not have {action.card.name} in properties"
 
         if not (action.action_type == ActionType.PLAY_ACTION and action.card.get_card_type() == CardType.ACTION_RENT):
             if action.double_the_rent_count > 0:
@@ -157,7 +152,7 @@ class RulesEngine:
         building_type = action.card.building_type
         
         # Check if the set is a full set
-        if not target_set.is_full_set:
+        if not action.source_player.has_full_set(action.target_property_set):
             return False, f"Validation Error: Cannot add {building_type} to incomplete property set {action.target_property_set}."
             
         # Check if the set can have buildings (no buildings on railroads or utilities)
@@ -197,12 +192,7 @@ class RulesEngine:
             return False, f"Validation Error: Only wild property cards can be moved. {action.card.name}"
 
         # Ensure the player actually owns this card in properties
-        found = False
-        for prop_set in action.source_player.get_property_sets().values():
-            if action.card in prop_set.cards:
-                found = True
-                break
-        if not found:
+        if action.source_player.get_property_color(action.card) is None:
             return False, f"Validation Error: Player does not own property {action.card.name}."
 
         if isinstance(action.card, WildPropertyCard):
@@ -252,7 +242,7 @@ class RulesEngine:
         target_property_set = target_players[0].get_property_sets().get(action.target_property_set)
         if target_property_set is None:
             return False, f"Validation Error: Deal Breaker target property set not found. {action}"
-        if not target_property_set.is_full_set:
+        if not target_players[0].has_full_set(action.target_property_set):
             return False, f"Validation Error: Deal Breaker can only steal full set. {action}"
         if action.rent_color is not None:
             return False, f"Validation Error: Deal Breaker cannot have rent color. {action}"
@@ -263,16 +253,12 @@ class RulesEngine:
     def _validate_sly_deal(action: Action, player: Player, target_players: List[Player]) -> Tuple[bool, Optional[str]]:
         if len(target_players) != 1:
             return False, f"Validation Error: Sly Deal must have exactly one target player. Found {action}"
-        if not target_players[0].has_card(action.forced_or_sly_deal_target_property_info.name):
-            return False, f"Validation Error: Sly Deal target property not found in target player. {action}"
-        target_property_set = None
-        for color, prop_set in target_players[0].get_property_sets().items():
-            if prop_set.has_card(action.forced_or_sly_deal_target_property_info.name):
-                target_property_set = prop_set
-                break
-        if target_property_set is None:
-            return False, f"Validation Error: Sly Deal target property set not found. {action}"
-        if target_property_set.is_full_set:
+        target_info = action.forced_or_sly_deal_target_property_info
+        if target_info is None:
+            return False, f"Validation Error: Sly Deal must name the property to steal. {action}"
+        if target_players[0].get_card_from_properties(target_info) is None:
+            return False, f"Validation Error: Sly Deal target property not found in target player's {target_info.prop_color.name} set. {action}"
+        if target_players[0].has_full_set(target_info.prop_color):
             return False, f"Validation Error: Sly Deal cannot steal from full set. {action}"
         if action.rent_color is not None:
             return False, f"Validation Error: Sly Deal cannot have rent color. {action}"
@@ -288,11 +274,11 @@ class RulesEngine:
         source_property_card = player.get_card_from_properties(action.forced_deal_source_property_info)
         if source_property_card is None:
             return False, f"Validation Error: Forced Deal source property not found in source player. {action}"
-        target_property_set = target_players[0].get_property_sets().get(target_property_card.get_color())
-        if target_property_set is None:
-            return False, f"Validation Error: Forced Deal target property set not found. {action}"
-        if target_property_set.is_full_set:
+        if target_players[0].has_full_set(action.forced_or_sly_deal_target_property_info.prop_color):
             return False, f"Validation Error: Forced Deal cannot steal from full set. {action}"
+        # Like the target, the property given away cannot be part of a complete set (see game_rules.j2)
+        if player.has_full_set(action.forced_deal_source_property_info.prop_color):
+            return False, f"Validation Error: Forced Deal cannot give away a property from a full set. {action}"
         if action.rent_color is not None:
             return False, f"Validation Error: Forced Deal cannot have rent color. {action}"
         return True, None
@@ -302,12 +288,154 @@ class RulesEngine:
         return True, None
         
 
+    # --- Legal move generation ---
+
     @staticmethod
-    def check_win_condition(player: Player) -> bool:
-        """Checks if any player has met the win condition (3 full sets)."""
+    def legal_actions(player: Player, game_state_dict: Dict[str, Any]) -> List[Action]:
+        """
+        Enumerates every action `player` can legally take on their turn.
+
+        Own cards are read from the player object, everything about the opponents
+        from `game_state_dict` (the output of Game.to_json), so bots only see what
+        they are allowed to see. The order is deterministic and PASS is always the
+        last entry. Actions that differ only in which copy of an identical card is
+        used are generated once.
+
+        As in ``validate_action``, Sly and Forced Deals never take from a full set,
+        and a Forced Deal never gives away a property of one either.
+
+        Just Say No and Double the Rent are never played on their own: Just Say No
+        is offered when a player is targeted, and Double the Rent is folded into the
+        rent actions through double_the_rent_count.
+
+        The result is cached on the player per state version, so callers must not
+        mutate the returned list.
+        """
+        actions_played = game_state_dict["actions_played_in_current_turn"]
+        state_version = game_state_dict.get("state_version")
+        cache_key = (state_version, player.version, actions_played)
+        if state_version is not None and player._legal_actions_cache is not None:
+            cached_key, cached_actions = player._legal_actions_cache
+            if cached_key == cache_key:
+                return cached_actions
+
+        actions = RulesEngine._generate_legal_actions(player, game_state_dict, actions_played)
+        if state_version is not None:
+            player._legal_actions_cache = (cache_key, actions)
+        return actions
+
+    @staticmethod
+    def _generate_legal_actions(player: Player, game_state_dict: Dict[str, Any], actions_played: int) -> List[Action]:
+        actions: List[Action] = []
+        opponents = [p for p in game_state_dict["players"] if p["name"] != player.name]
         property_sets = player.get_property_sets()
-        win_set = set()
+
+        if actions_played < ACTIONS_PER_TURN:
+            double_the_rent_held = sum(1 for c in player.hand if c.get_card_type() == CardType.ACTION_DOUBLE_THE_RENT)
+            max_double_the_rent = min(double_the_rent_held, ACTIONS_PER_TURN - actions_played - 1)
+            seen_cards = set()
+            for card in player.hand:
+                card_key = (card.name, card.get_card_type())
+                if card_key in seen_cards:
+                    continue
+                seen_cards.add(card_key)
+                actions.extend(RulesEngine._legal_actions_for_card(player, card, property_sets, opponents, max_double_the_rent))
+
+        # Moving a wild card does not use up an action
+        seen_wilds = set()
         for color, prop_set in property_sets.items():
-            if prop_set.is_full_set:
-                win_set.add(color)
-        return len(win_set) >= 3
+            for card in prop_set.cards:
+                if not isinstance(card, WildPropertyCard) or (card.name, color) in seen_wilds:
+                    continue
+                seen_wilds.add((card.name, color))
+                for target_color in card.available_colors:
+                    if target_color != color:
+                        actions.append(Action(ActionType.MOVE_PROPERTY, player, card=card, target_property_set=target_color))
+
+        actions.append(Action(ActionType.PASS, player))
+        return actions
+
+    @staticmethod
+    def _legal_actions_for_card(player: Player, card: Card, property_sets, opponents: List[Dict[str, Any]], max_double_the_rent: int) -> List[Action]:
+        card_type = card.get_card_type()
+        actions: List[Action] = []
+
+        if card_type == CardType.PROPERTY:
+            return [Action(ActionType.ADD_TO_PROPERTIES, player, card=card)]
+        if card_type == CardType.PROPERTY_WILD:
+            return [Action(ActionType.ADD_TO_PROPERTIES, player, card=card, target_property_set=color) for color in card.available_colors]
+
+        # Money and every action card can be banked
+        if card.can_use_as_money:
+            actions.append(Action(ActionType.ADD_TO_BANK, player, card=card))
+
+        match card_type:
+            case CardType.ACTION_RENT:
+                for color in property_sets:
+                    if not card.is_wild and color not in card.colors:
+                        continue
+                    for double_the_rent_count in range(max_double_the_rent + 1):
+                        if card.is_wild:
+                            for opponent in opponents:
+                                actions.append(Action(ActionType.PLAY_ACTION, player, card=card, target_player_names=[opponent["name"]],
+                                                      rent_color=color, double_the_rent_count=double_the_rent_count))
+                        else:
+                            actions.append(Action(ActionType.PLAY_ACTION, player, card=card,
+                                                  rent_color=color, double_the_rent_count=double_the_rent_count))
+            case CardType.ACTION_BUILDING:
+                for color, prop_set in property_sets.items():
+                    if not player.has_full_set(color) or color in (PropertyColor.RAILROAD, PropertyColor.UTILITY):
+                        continue
+                    if card.building_type == "house":
+                        allowed = not prop_set.has_house and not prop_set.has_hotel
+                    else:
+                        allowed = prop_set.has_house and not prop_set.has_hotel
+                    if allowed:
+                        actions.append(Action(ActionType.PLAY_ACTION, player, card=card, target_property_set=color))
+            case CardType.ACTION_PASS_GO | CardType.ACTION_BIRTHDAY:
+                actions.append(Action(ActionType.PLAY_ACTION, player, card=card))
+            case CardType.ACTION_DEBT_COLLECTOR:
+                for opponent in opponents:
+                    actions.append(Action(ActionType.PLAY_ACTION, player, card=card, target_player_names=[opponent["name"]]))
+            case CardType.ACTION_DEAL_BREAKER:
+                for opponent in opponents:
+                    for color_name, prop_set in opponent["property_sets"].items():
+                        if prop_set["is_full_set"]:
+                            actions.append(Action(ActionType.PLAY_ACTION, player, card=card, target_player_names=[opponent["name"]],
+                                                  target_property_set=PropertyColor[color_name]))
+            case CardType.ACTION_SLY_DEAL:
+                for opponent in opponents:
+                    for target_info in RulesEngine._stealable_properties(opponent):
+                        actions.append(Action(ActionType.PLAY_ACTION, player, card=card, target_player_names=[opponent["name"]],
+                                              forced_or_sly_deal_target_property_info=target_info))
+            case CardType.ACTION_FORCED_DEAL:
+                own_properties = []
+                for color, prop_set in property_sets.items():
+                    if player.has_full_set(color):
+                        continue
+                    for name in dict.fromkeys(c.name for c in prop_set.cards):
+                        own_properties.append(ActionPropertyInfo(name=name, prop_color=color))
+                for opponent in opponents:
+                    targets = RulesEngine._stealable_properties(opponent)
+                    for source_info in own_properties:
+                        for target_info in targets:
+                            actions.append(Action(ActionType.PLAY_ACTION, player, card=card, target_player_names=[opponent["name"]],
+                                                  forced_deal_source_property_info=source_info,
+                                                  forced_or_sly_deal_target_property_info=target_info))
+        return actions
+
+    @staticmethod
+    def _stealable_properties(opponent: Dict[str, Any]) -> List[ActionPropertyInfo]:
+        """Properties that can be taken from an opponent with a Sly or Forced Deal."""
+        stealable = []
+        for color_name, prop_set in opponent["property_sets"].items():
+            if prop_set["is_full_set"]:
+                continue
+            for name in dict.fromkeys(card["name"] for card in prop_set["cards"]):
+                stealable.append(ActionPropertyInfo(name=name, prop_color=PropertyColor[color_name]))
+        return stealable
+
+    @staticmethod
+    def check_win_condition(player: Player) -> bool:
+        """Checks if any player has met the win condition (3 full sets)."""
+        return player.full_set_count >= 3
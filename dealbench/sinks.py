@@ -0,0 +1,338 @@
+"""Destinations for the records a Game persists while it runs.
+
+``Game.save_game`` hands every record to an ``EventSink``. The default
+``JsonlFileSink`` appends one compact line per record to a single
+``logs/<game_identifier>/game.jsonl`` file: periodic full keyframes, deltas in
+between and the ``result.json`` summary record last. It is written through a
+``BackgroundSink``, on a writer thread shared by all games, so the game never
+waits on the disk.
+``DirectoryFileSink`` keeps the original layout of one JSON file per action;
+headless runs use ``NullSink`` or ``MemorySink`` so that a game never touches
+the filesystem. ``dealbench.log_reader`` reads both layouts.
+"""
+import json
+import os
+import queue
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple
+
+from dealbench.delta import diff
+from dealbench.disk_io import on_event_loop, run_disk_io
+import logging
+logger = logging.getLogger(__name__)
+
+GAME_LOG_FILE_NAME = "game.jsonl"
+RESULT_RECORD_NAME = "result.json"
+DEFAULT_KEYFRAME_INTERVAL = 20
+
+
+class EventSink(ABC):
+    """Receives named game records, e.g. ``("turn-3_actions-1.json", {...})``."""
+
+    # Games skip building records altogether for sinks that drop them
+    enabled: bool = True
+
+    @abstractmethod
+    def write(self, name: str, record: Dict[str, Any]):
+        """Accepts one record. ``record`` must not be mutated by the caller afterwards."""
+        pass
+
+    def flush(self):
+        """Called at turn boundaries; buffered sinks persist pending records here."""
+        pass
+
+    def close(self):
+        """Called once when the game ends (or crashes). Flushes everything still pending."""
+        self.flush()
+
+    async def await_room(self):
+        """Awaited by ``Game.arun_game`` before each decision. On the event loop
+        ``write`` and ``flush`` must not block, so a sink that is backed up holds
+        records back and hands them over here."""
+        pass
+
+
+class NullSink(EventSink):
+    """Drops every record."""
+    enabled = False
+
+    def write(self, name: str, record: Dict[str, Any]):
+        pass
+
+
+class MemorySink(EventSink):
+    """Keeps every record in memory, in the order it was written."""
+
+    def __init__(self):
+        self.records: List[Tuple[str, Dict[str, Any]]] = []
+
+    def write(self, name: str, record: Dict[str, Any]):
+        self.records.append((name, record))
+
+    def get(self, name: str) -> Dict[str, Any]:
+        """Returns the most recent record written under ``name``."""
+        for record_name, record in reversed(self.records):
+            if record_name == name:
+                return record
+        raise KeyError(name)
+
+
+class DirectoryFileSink(EventSink):
+    """Writes each record straight to its own JSON file inside ``directory``."""
+
+    def __init__(self, directory: str, indent: int = 4):
+        self.directory = directory
+        self.indent = indent
+        self._directory_created = False
+
+    def write(self, name: str, record: Dict[str, Any]):
+        self._write_file(name, record)
+
+    def _write_file(self, name: str, record: Dict[str, Any]):
+        if not self._directory_created:
+            os.makedirs(self.directory, exist_ok=True)
+            self._directory_created = True
+        with open(os.path.join(self.directory, name), "w") as f:
+            json.dump(record, f, indent=self.indent)
+
+
+class BufferedFileSink(DirectoryFileSink):
+    """Same file layout as ``DirectoryFileSink``, but records are held in memory
+    and written in batches: when the buffer fills up, at turn boundaries and at close."""
+
+    def __init__(self, directory: str, buffer_size: int = 64, indent: int = 4):
+        super().__init__(directory, indent=indent)
+        self.buffer_size = buffer_size
+        self._pending: List[Tuple[str, Dict[str, Any]]] = []
+
+    def write(self, name: str, record: Dict[str, Any]):
+        self._pending.append((name, record))
+        if len(self._pending) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        pending, self._pending = self._pending, []
+        for name, record in pending:
+            self._write_file(name, record)
+
+
+class JsonlEncoder:
+    """Turns a game's records into game.jsonl lines, one compact JSON line each.
+
+    Every ``keyframe_interval``-th line is a keyframe holding the whole record,
+    ``{"name": ..., "record": {...}}``; the lines in between hold only the change
+    from the previous record, ``{"name": ..., "delta": {...}}`` (see
+    ``dealbench.delta``). The final ``result.json`` record is always a keyframe.
+    """
+
+    def __init__(self, keyframe_interval: Optional[int] = DEFAULT_KEYFRAME_INTERVAL):
+        """
+        Args:
+            keyframe_interval: Lines per keyframe, or None to write every record in full.
+        """
+        if keyframe_interval is not None and keyframe_interval < 1:
+            raise ValueError("keyframe_interval must be at least 1.")
+        self.keyframe_interval = keyframe_interval
+        self._previous: Optional[Dict[str, Any]] = None
+        self._lines_since_keyframe = 0
+
+    def encode(self, name: str, record: Dict[str, Any]) -> str:
+        if (self.keyframe_interval is None or self._previous is None or name == RESULT_RECORD_NAME
+                or self._lines_since_keyframe >= self.keyframe_interval - 1):
+            entry = {"name": name, "record": record}
+            self._lines_since_keyframe = 0
+        else:
+            entry = {"name": name, "delta": diff(self._previous, record) or {}}
+            self._lines_since_keyframe += 1
+        self._previous = record
+        return json.dumps(entry, separators=(",", ":")) + "\n"
+
+
+class JsonlFileSink(EventSink):
+    """Appends each record as one line to a single file per game, see ``JsonlEncoder``.
+    Buffered writes are pushed to the OS at turn boundaries; nothing is fsynced
+    unless ``fsync_on_close`` is set. The file must not exist yet, so that two games
+    can never end up in one log."""
+
+    def __init__(self, path: str, fsync_on_close: bool = False, keyframe_interval: Optional[int] = DEFAULT_KEYFRAME_INTERVAL):
+        self.path = path
+        self.fsync_on_close = fsync_on_close
+        self._encoder = JsonlEncoder(keyframe_interval)
+        self._file = None
+        self._created = False
+
+    def write(self, name: str, record: Dict[str, Any]):
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            # Raises FileExistsError rather than appending to another game's log
+            self._file = open(self.path, "a" if self._created else "x")
+            self._created = True
+        self._file.write(self._encoder.encode(name, record))
+
+    def flush(self):
+        if self._file is not None:
+            self._file.flush()
+
+    def close(self):
+        if self._file is None:
+            return
+        self._file.flush()
+        if self.fsync_on_close:
+            os.fsync(self._file.fileno())
+        self._file.close()
+        self._file = None
+
+
+# Markers passed through the SinkWriter queue alongside (name, record) pairs
+_FLUSH = object()
+_CLOSE = object()
+
+
+class SinkWriter:
+    """One writer thread for any number of ``BackgroundSink``s, so that many games
+    running at once do not each keep a thread of their own.
+
+    Items are handled in the order they were queued. Once ``max_pending`` are
+    queued, ``put`` blocks until the thread catches up and ``try_put`` fails.
+    """
+
+    def __init__(self, max_pending: int = 1024):
+        self._queue: "queue.Queue[Tuple[BackgroundSink, Any]]" = queue.Queue(maxsize=max_pending)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def put(self, sink: "BackgroundSink", item: Any):
+        self._start()
+        self._queue.put((sink, item))
+
+    def try_put(self, sink: "BackgroundSink", item: Any) -> bool:
+        """Queues an item if there is room. Returns False if the queue is full."""
+        self._start()
+        try:
+            self._queue.put_nowait((sink, item))
+        except queue.Full:
+            return False
+        return True
+
+    def _start(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="dealbench-sink-writer", daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        while True:
+            # Take everything queued so far as one batch
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            for sink, item in batch:
+                sink._handle(item)
+
+
+_shared_writer: Optional[SinkWriter] = None
+_shared_writer_lock = threading.Lock()
+
+
+def shared_writer() -> SinkWriter:
+    """The process-wide writer used by BackgroundSinks that are not given one."""
+    global _shared_writer
+    with _shared_writer_lock:
+        if _shared_writer is None:
+            _shared_writer = SinkWriter()
+        return _shared_writer
+
+
+class BackgroundSink(EventSink):
+    """Hands records to another sink on a writer thread, so that serializing and
+    writing them never holds up the game.
+
+    All BackgroundSinks share one ``SinkWriter`` thread unless given their own.
+    ``flush`` queues a flush of the wrapped sink without waiting for it, and
+    ``close`` waits until everything queued so far is written and the wrapped sink
+    is closed. A write error on the thread is raised by the next ``write``,
+    ``flush`` or ``close``.
+
+    When the writer's queue is full, ``write`` and ``flush`` block until it has
+    room, except on a trio event loop: there the items are held back until the
+    game awaits ``await_room``, so that one game's backlog never stops the loop.
+    """
+
+    def __init__(self, sink: EventSink, writer: Optional[SinkWriter] = None):
+        self.sink = sink
+        self.enabled = sink.enabled
+        self.writer = writer if writer is not None else shared_writer()
+        self._queued = False
+        self._closed = threading.Event()
+        self._error: Optional[BaseException] = None
+        self._held: List[Any] = [] # Items waiting for room in the writer's queue, see await_room
+
+    def _put(self, item: Any):
+        self._raise_error()
+        self._queued = True
+        if self._held or not self.writer.try_put(self, item):
+            if on_event_loop():
+                self._held.append(item)
+            else:
+                self._put_held()
+                self.writer.put(self, item)
+
+    def _put_held(self):
+        while self._held:
+            self.writer.put(self, self._held[0])
+            del self._held[0]
+
+    async def await_room(self):
+        while self._held:
+            await run_disk_io(self.writer.put, self, self._held[0])
+            del self._held[0]
+
+    def _raise_error(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def write(self, name: str, record: Dict[str, Any]):
+        self._put((name, record))
+
+    def flush(self):
+        self._put(_FLUSH)
+
+    def close(self):
+        if not self._queued:
+            self.sink.close()
+            return
+        self._put(_CLOSE)
+        # Game.arun_game closes the sink off the event loop, where anything still held
+        # can wait for room; closing on the loop itself would hold back the close too
+        self._put_held()
+        self._closed.wait()
+        self._closed.clear()
+        self._queued = False
+        self._raise_error()
+
+    def _handle(self, item: Any):
+        """Runs on the writer thread."""
+        if item is _CLOSE:
+            self._call(self.sink.close)
+            self._closed.set()
+        # After a failure, records are dropped until the error has been raised
+        elif self._error is not None:
+            pass
+        elif item is _FLUSH:
+            self._call(self.sink.flush)
+        else:
+            self._call(self.sink.write, *item)
+
+    def _call(self, method, *args: Any):
+        try:
+            method(*args)
+        except Exception as e:
+            logger.error("Background writer for %s failed: %s", type(self.sink).__name__, e)
+            if self._error is None:
+                self._error = e
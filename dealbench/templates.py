@@ -0,0 +1,56 @@
+"""Process-wide registry of the Jinja prompt templates in ``dealbench/prompts``.
+
+All LLM players share one ``Environment``. Templates are compiled once per
+process, and the compiled bytecode is cached on disk so that later processes
+skip parsing too. The templates do not change while the process runs, so the
+environment does not check the files for updates. The game rules system message
+does not depend on the game and is rendered only once.
+"""
+import functools
+import os
+import threading
+from typing import Optional
+
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, Template
+
+PROMPTS_DIR = os.path.join(os.path.dirname(__file__), "prompts")
+GAME_RULES_TEMPLATE = "game_rules.j2"
+HISTORY_TEMPLATE = "game_history.j2" # Rendered separately from the decision prompts, see dealbench.messages
+
+_environment: Optional[Environment] = None
+_environment_lock = threading.Lock()
+
+
+def get_environment() -> Environment:
+    """The shared template environment, created on first use."""
+    global _environment
+    with _environment_lock:
+        if _environment is None:
+            _environment = Environment(
+                loader=FileSystemLoader(PROMPTS_DIR),
+                bytecode_cache=FileSystemBytecodeCache(),
+                auto_reload=False,
+            )
+        return _environment
+
+
+def get_template(name: str) -> Template:
+    """A compiled template; compiled on its first use in the process."""
+    return get_environment().get_template(name)
+
+
+def render(name: str, **kwargs) -> str:
+    return get_template(name).render(**kwargs)
+
+
+def precompile():
+    """Compiles every template now rather than on the first call that uses it."""
+    environment = get_environment()
+    for name in environment.list_templates(extensions=["j2"]):
+        environment.get_template(name)
+
+
+@functools.lru_cache(maxsize=None)
+def game_rules() -> str:
+    """The rendered game rules, the system message of every LLM call."""
+    return render(GAME_RULES_TEMPLATE)
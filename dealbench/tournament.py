@@ -1,17 +1,28 @@
 import os
 import json
+import logging
 import time
 import trio
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Optional, Tuple
 import random 
 from dealbench.game import Game, TestPlayer, setup_logging
 from dealbench.player import Player
+from dealbench.history import HistoryPolicy
+from dealbench.http_pool import get_session_pool
+from dealbench import templates
+from dealbench.results_db import ResultsDB
 from dealbench.llm import claude_4_sonnet, openai_o4_mini, openai_o3, gemini_2_5_pro
 
 class Tournament:
     """Run a simple 1v1 round robin tournament."""
 
-    def __init__(self, players: List[Player], num_concurrent_games: int = 6):
+    def __init__(self, players: List[Player], num_concurrent_games: int = 6, seed: Optional[int] = None,
+                 results_db: Optional[ResultsDB] = None):
+        """
+        Args:
+            seed: Seed every match's game seed is derived from, so a rerun replays the same deals.
+            results_db: Where the tournament and its games are recorded. Defaults to logs/results.sqlite.
+        """
         if len(players) < 2:
             raise ValueError("Tournament requires at least two players.")
 
@@ -32,20 +43,40 @@ class Tournament:
         os.makedirs(self.log_dir, exist_ok=True)
         self._lock = trio.Lock()
         self.num_concurrent_games = num_concurrent_games
+        self.seed = seed if seed is not None else random.getrandbits(32)
+        self.results_db = results_db if results_db is not None else ResultsDB()
 
     def _clone_player(self, player: Player) -> Player:
         """Create a fresh instance of a player for a new game."""
         try:
-            return player.__class__(getattr(player, "model_name", player.name))
+            clone = player.__class__(getattr(player, "model_name", player.name))
         except Exception:
-            return player.__class__(player.name)
+            clone = player.__class__(player.name)
+        policy = getattr(player, "history_policy", None)
+        if policy is not None:
+            clone.history_policy = HistoryPolicy(policy.recent_turns, policy.summarize_older)
+        blob_store = getattr(player, "blob_store", None)
+        if blob_store is not None:
+            clone.blob_store = blob_store
+        session_pool = getattr(player, "session_pool", None)
+        if session_pool is not None:
+            clone.session_pool = session_pool
+        response_cache = getattr(player, "response_cache", None)
+        if response_cache is not None:
+            clone.response_cache = response_cache
+        return clone
+
+    def _match_seed(self, player_a: Player, player_b: Player) -> int:
+        """Game seed of a match, independent of the order matches are scheduled in."""
+        return random.Random(f"{self.seed}:{player_a.name}:{player_b.name}").getrandbits(32)
 
     async def _play_match(self, player_a: Player, player_b: Player):
         fresh_players = [self._clone_player(player_a), self._clone_player(player_b)]
         print(f"starting game between {' and '.join([player.name for player in fresh_players])}")
         # time.sleep(random.randint(1, 5))
-        game = Game(fresh_players)
-        await trio.to_thread.run_sync(game.run_game)
+        game = Game(fresh_players, seed=self._match_seed(player_a, player_b), results_db=self.results_db)
+        game.tournament_id = self.tournament_identifier
+        await game.arun_game()
         winner = game.game_winner
         if winner is None:
             raise RuntimeError("Game completed without a winner.")
@@ -57,6 +88,7 @@ class Tournament:
                 {
                     "players": [player_a.name, player_b.name],
                     "winner": winner,
+                    "seed": game.seed,
                     "game_identifier": game.game_identifier,
                 }
             )
@@ -71,6 +103,11 @@ class Tournament:
 
     async def _run_async(self):
         setup_logging(self.tournament_identifier)
+        templates.precompile()
+        # One connection per endpoint for each game that can be waiting on an LLM; all
+        # games run as tasks on this event loop, see Game.arun_game
+        get_session_pool().resize(self.num_concurrent_games)
+        self.results_db.record_tournament(self.tournament_identifier, self.seed)
         matches: List[Tuple[Player, Player]] = [
             (self.players[i], self.players[j])
             for i in range(len(self.players))
@@ -83,9 +120,14 @@ class Tournament:
             async with limiter:
                 await self._play_match(player_a, player_b)
 
-        async with trio.open_nursery() as nursery:
-            for a, b in matches:
-                nursery.start_soon(run_match, a, b)
+        try:
+            async with trio.open_nursery() as nursery:
+                for a, b in matches:
+                    nursery.start_soon(run_match, a, b)
+        finally:
+            pools = {id(pool): pool for pool in [get_session_pool()] + [getattr(p, "session_pool", None) for p in self.players] if pool is not None}
+            for pool in pools.values():
+                await pool.aclose()
 
         self.save_results()
 
@@ -104,31 +146,37 @@ class Tournament:
 
     def save_results(self):
         tournament_data = {
+            "seed": self.seed,
             "matches": self.match_results,
             "results": self.results,
             "rankings": self.rankings(),
         }
         with open(os.path.join(self.log_dir, "tournament_results.json"), "w") as f:
             json.dump(tournament_data, f, indent=4)
+        self.results_db.record_tournament(self.tournament_identifier, self.seed, tournament_data)
 
-def run_tournaments(players: List[Player], num_runs: int = 1, num_concurrent_games: int = 6):
+def run_tournaments(players: List[Player], num_runs: int = 1, num_concurrent_games: int = 6, seed: Optional[int] = None):
     """Run multiple tournaments sequentially.
 
     Args:
         players: List of players participating in each tournament.
         num_runs: Number of tournaments to run.
         num_concurrent_games: Number of games to play concurrently within a tournament.
+        seed: Seed of the first tournament; run i uses seed + i. Random when not given.
     """
 
     for i in range(num_runs):
         print(f"Starting tournament {i + 1} of {num_runs}")
-        tournament = Tournament(players, num_concurrent_games=num_concurrent_games)
+        tournament = Tournament(players, num_concurrent_games=num_concurrent_games, seed=None if seed is None else seed + i)
         tournament.run()
 
 
 if __name__ == "__main__":
     import argparse
     from dealbench.llm import LLMPlayer
+    from dealbench.logging_setup import PROMPT_LOGGER_NAME
+    from dealbench.mcts import MCTSPlayer
+    from dealbench.response_cache import ResponseCache
 
     parser = argparse.ArgumentParser(description="Run a DealBench tournament")
     parser.add_argument(
@@ -136,16 +184,30 @@ if __name__ == "__main__":
         nargs="+",
         dest="models",
         required=True,
-        help="Space separated list of model names. Use 'random' for a TestPlayer.",
+        help="Space separated list of model names. Use 'random' for a TestPlayer and 'mcts' for an MCTSPlayer.",
     )
     parser.add_argument("--concurrency", type=int, default=6, help="Number of concurrent games")
+    parser.add_argument("--history-turns", type=int, default=None,
+                        help="Show LLM players only the last N turns of history verbatim, plus a summary of older turns.")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for reproducible deals across reruns")
+    parser.add_argument("--prompt-log-level", default="INFO", choices=["DEBUG", "INFO", "WARNING"],
+                        help="DEBUG also logs full prompt and reasoning text; WARNING switches prompt logging off.")
+    parser.add_argument("--response-cache", default=None, metavar="PATH",
+                        help="Answer repeated LLM requests from this cache file, e.g. logs/llm_cache.sqlite.")
     args = parser.parse_args()
+    logging.getLogger(PROMPT_LOGGER_NAME).setLevel(args.prompt_log_level)
+    response_cache = ResponseCache(args.response_cache) if args.response_cache else None
 
     players = []
     for idx, model in enumerate(args.models, start=1):
         if model.lower() == "random":
             players.append(TestPlayer(name=f"random_{idx}"))
+        elif model.lower() == "mcts":
+            players.append(MCTSPlayer(name=f"mcts_{idx}"))
         else:
-            players.append(LLMPlayer(model_name=model))
+            players.append(LLMPlayer(model_name=model, history_policy=HistoryPolicy(recent_turns=args.history_turns),
+                                     response_cache=response_cache))
 
-    run_tournaments(players, num_concurrent_games=args.concurrency)
+    run_tournaments(players, num_concurrent_games=args.concurrency, seed=args.seed)
+    if response_cache is not None:
+        print(f"Response cache: {response_cache.stats()}")
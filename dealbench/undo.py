@@ -0,0 +1,64 @@
+"""Undo journal used to branch and roll back a Game in place.
+
+While a snapshot is open, ``Deck`` and ``Player`` record the inverse of every
+mutation they make in the game's ``UndoLog``. Rolling back replays those inverses
+newest first, so the cost of a branch is proportional to what changed in it
+rather than to the size of the game. See ``Game.snapshot`` / ``Game.restore``.
+"""
+from dataclasses import dataclass
+from typing import Any, Callable, List, Optional, Tuple
+
+
+class UndoLog:
+    """Stack of inverse operations, only recorded while at least one mark is open."""
+
+    def __init__(self):
+        self._entries: List[Tuple[Callable[..., Any], Tuple[Any, ...]]] = []
+        self._open_marks = 0
+
+    @property
+    def recording(self) -> bool:
+        return self._open_marks > 0
+
+    def record(self, undo: Callable[..., Any], *args: Any):
+        """Registers `undo(*args)` as the inverse of a mutation that just happened."""
+        if self._open_marks:
+            self._entries.append((undo, args))
+
+    def mark(self) -> int:
+        """Opens a mark and returns its position. Marks must be closed in LIFO order."""
+        self._open_marks += 1
+        return len(self._entries)
+
+    def rollback(self, mark: int):
+        """Undoes every mutation recorded since `mark` and closes it."""
+        entries = self._entries
+        while len(entries) > mark:
+            undo, args = entries.pop()
+            undo(*args)
+        self._close_mark()
+
+    def commit(self, mark: int):
+        """Keeps the mutations recorded since `mark` and closes it. They can still be
+        rolled back by an enclosing mark."""
+        self._close_mark()
+
+    def _close_mark(self):
+        if not self._open_marks:
+            raise ValueError("No open undo mark to close.")
+        self._open_marks -= 1
+        if not self._open_marks:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+@dataclass(frozen=True)
+class GameSnapshot:
+    """Returned by Game.snapshot(). Holds the undo mark plus the Game's own counters."""
+    mark: int
+    turn_count: int
+    actions_played: int
+    game_winner: Optional[Any]
+    history_length: int
@@ -5,72 +5,62 @@
 Run with `python frontend_game_replay_server.py` (Python 3.9+) and visit http://localhost:5000
 """
 from flask import Flask, jsonify
-import json
 import os
-import glob
-import re
 from threading import Lock
 
+from dealbench.archive import open_game
+from dealbench.blobs import BlobStore, DEFAULT_BLOB_DIR
+from dealbench.log_reader import GameLog
+
 # Tell Flask where the frontend lives and expose it at the root URL ("/")
 app = Flask(__name__, static_folder="frontend/simple", static_url_path="")
 
-# Directory containing sequential game state JSON files.
+# Game log to replay: a game.jsonl file or a directory holding one (or per-action JSON files).
 # Can be overridden with the LOG_DIR environment variable.
 LOG_DIR = os.environ.get("LOG_DIR", "logs/2025-08-02_18-42-51_google_gemini-2.5-pro_openai_o3_game")
 
+# To replay an archived game, set GAME_ID and point LOG_DIR at an archive segment
+# or a directory of them (see dealbench/archive.py).
+GAME_ID = os.environ.get("GAME_ID")
+
+# LLM prompts and reasoning are stored out of line; records keep references into this store.
+BLOB_STORE = BlobStore(os.environ.get("BLOB_DIR", DEFAULT_BLOB_DIR))
+
 # Shared dictionary that always holds the latest loaded data.
 latest_data = {}
 
 
-def _get_json_files():
-    """Return list of game data files sorted by turn then action number.
+def _get_records():
+    """Return the game log and the index of the first record to serve.
 
-    The list includes all ``turn-*_actions-*.json`` files followed by the
-    ``result.json`` file (if present) so that the frontend receives the final
-    game summary after all turn data has been served.
+    ``LOG_DIR`` may hold a ``game.jsonl`` log or the older layout of
+    ``turn-*_actions-*.json`` files plus ``result.json``; either way the final
+    game summary comes last so that the frontend receives it after all turn data
+    has been served. Records are read on demand from the nearest keyframe.
     """
-    pattern = os.path.join(LOG_DIR, "turn-*_actions-*.json")
-    files = glob.glob(pattern)
+    records = open_game(LOG_DIR, GAME_ID) if GAME_ID else GameLog(LOG_DIR)
 
-    def sort_key(path):
-        name = os.path.basename(path)
-        m = re.match(r"turn-(\d+)_actions-(\d+)\.json", name)
-        if m:
-            return int(m.group(1)), int(m.group(2))
-        return float("inf"), float("inf")
+    first_idx = max(len(records) - 14, 0)
 
-    files = sorted(files, key=sort_key)
+    return records, first_idx
 
-    # Append the result.json file at the end if it exists.
-    result_path = os.path.join(LOG_DIR, "result.json")
-    if os.path.exists(result_path):
-        files.append(result_path)
-    
-    filtered_files = files[-14:]
-            
 
-    return filtered_files
-
-
-files = []
+records = None
 idx = 0
 idx_lock = Lock()
 
 
 def load_next_data():
-    """Load the next log file on demand."""
-    global files, idx
-    if not files:
-        files = _get_json_files()
-    if idx < len(files):
-        with open(files[idx], "r") as f:
-            print(files[idx])
-            data = json.load(f)
+    """Load the next record on demand."""
+    global records, idx
+    if records is None:
+        records, idx = _get_records()
+    if idx < len(records):
+        name, data = records[idx]
+        print(name)
         latest_data.clear()
         latest_data.update(data)
 
-                
-
         idx += 1
 
 
@@ -92,6 +82,13 @@ def game_data():
     metadata = data.get("metadata")
     if metadata:
         reasoning = metadata.get("reasoning", "")
+        reasoning_ref = metadata.get("reasoning_ref")
+        if reasoning_ref:
+            # Resolved only for the step being viewed
+            try:
+                reasoning = BLOB_STORE.get(reasoning_ref)
+            except ValueError as e:
+                reasoning = f"[{e}]"
     else:
         reasoning = ""
 